@@ -1,6 +1,7 @@
 """Dreo HomeAssistant Integration."""
 import json
 import logging
+import os
 import time
 
 from .haimports import *  # pylint: disable=W0401,W0614
@@ -9,7 +10,17 @@ from .const import (
     DOMAIN,
     PYDREO_MANAGER,
     DREO_PLATFORMS,
+    SERVICE_UPDATE_DEVS,
     CONF_AUTO_RECONNECT,
+    CONF_OPTIMISTIC_UPDATES,
+    CONF_SUPPRESS_REDUNDANT_COMMANDS,
+    CONF_LOG_STARTUP_TIMING,
+    CONF_SLOW_PARSE_THRESHOLD,
+    CONF_SLOW_CALLBACK_THRESHOLD,
+    CONF_REST_RATE,
+    CONF_REST_BURST,
+    CONF_WEBSOCKET_RATE,
+    CONF_WEBSOCKET_BURST,
     DEBUG_TEST_MODE,
     DEBUG_TEST_MODE_DIRECTORY_NAME,
     DEBUG_TEST_MODE_DEVICES_FILE_NAME
@@ -32,8 +43,10 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     region = "us"
 
+    _backfill_unique_id(hass, config_entry)
+
     from .pydreo import PyDreo  # pylint: disable=C0415
-    from .pydreo.constant import DreoDeviceType # pylint: disable=C0415
+    from .devicelist import async_refresh_devices, DEVICE_LIST_REFRESH_INTERVAL  # pylint: disable=C0415
 
     if DEBUG_TEST_MODE:
         _LOGGER.error("DEBUG_TEST_MODE is True!")
@@ -50,6 +63,22 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     else:
         pydreo_manager = PyDreo(username, password, region)
         pydreo_manager.auto_reconnect = auto_reconnect
+        pydreo_manager.optimistic_updates = config_entry.options.get(CONF_OPTIMISTIC_UPDATES, False)
+        pydreo_manager.suppress_redundant_commands = config_entry.options.get(CONF_SUPPRESS_REDUNDANT_COMMANDS, False)
+        slow_parse_ms = config_entry.options.get(CONF_SLOW_PARSE_THRESHOLD)
+        if slow_parse_ms is not None:
+            pydreo_manager.slow_detector.parse_threshold = slow_parse_ms / 1000
+        slow_callback_ms = config_entry.options.get(CONF_SLOW_CALLBACK_THRESHOLD)
+        if slow_callback_ms is not None:
+            pydreo_manager.slow_detector.callback_threshold = slow_callback_ms / 1000
+        _configure_rate_limiter(pydreo_manager, config_entry)
+
+    startup_timing = pydreo_manager.startup_timing
+    startup_timing.begin()
+
+    # Device settings read on earlier runs are reused until they go stale.
+    await hass.async_add_executor_job(
+        pydreo_manager.settings_store.load, _settings_path(hass, config_entry))
 
     login = await hass.async_add_executor_job(pydreo_manager.login)
 
@@ -63,12 +92,67 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
         _LOGGER.error("Unable to load devices from the dreo server")
         return False
 
+    _LOGGER.info("%d Dreo devices found", len(pydreo_manager.devices))
+    platforms = platforms_for_devices(pydreo_manager.devices)
+
+    with startup_timing.span("transport"):
+        pydreo_manager.start_transport()
+
+    # Keyed by entry so that several Dreo accounts can be set up side by side.
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = {
+        PYDREO_MANAGER: pydreo_manager,
+        DREO_PLATFORMS: platforms
+    }
+
+    _LOGGER.debug("Platforms are: %s", platforms)
+
+    with startup_timing.span("platforms", platforms=sorted(platforms)):
+        await hass.config_entries.async_forward_entry_setups(config_entry, platforms)
+
+    # Settings such as fan temperature calibration load in the background from here on;
+    # entities update as the values arrive.
+    await hass.async_add_executor_job(pydreo_manager.load_deferred_settings)
+
+    # Pick up devices added or removed in the Dreo app, periodically and on demand.
+    async def _refresh_devices(_now=None):
+        await async_refresh_devices(hass, config_entry)
+
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, _refresh_devices, DEVICE_LIST_REFRESH_INTERVAL))
+
+    if not hass.services.has_service(DOMAIN, SERVICE_UPDATE_DEVS):
+        async def _handle_update_devices(_call: ServiceCall) -> None:
+            for entry_id in list(hass.data.get(DOMAIN, {})):
+                entry = hass.config_entries.async_get_entry(entry_id)
+                if entry is not None:
+                    await async_refresh_devices(hass, entry)
+
+        hass.services.async_register(DOMAIN, SERVICE_UPDATE_DEVS, _handle_update_devices)
+
+    startup_timing.finish()
+    if config_entry.options.get(CONF_LOG_STARTUP_TIMING, False):
+        _LOGGER.info(startup_timing.summary())
+    else:
+        _LOGGER.debug(startup_timing.summary())
+
+    async def _update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
+        """Handle options update."""
+        await hass.config_entries.async_reload(config_entry.entry_id)
+
+    ## Create update listener
+    config_entry.async_on_unload(config_entry.add_update_listener(_update_listener))
+
+    return True
+
+def platforms_for_devices(devices: list) -> set[Platform]:
+    """The platforms needed for a set of devices."""
+    from .pydreo.constant import DreoDeviceType # pylint: disable=C0415
+
     _LOGGER.debug("Checking for supported installed device types")
     device_types = set()
-    for device in pydreo_manager.devices:
+    for device in devices:
         device_types.add(device.type)   
     _LOGGER.debug("Device types found are: %s", device_types)
-    _LOGGER.info("%d Dreo devices found", len(pydreo_manager.devices))
 
     platforms = set()
     if (DreoDeviceType.TOWER_FAN in device_types or 
@@ -114,33 +198,61 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
         platforms.add(Platform.SWITCH)
         platforms.add(Platform.NUMBER)
 
-    pydreo_manager.start_transport()
-
-    hass.data[DOMAIN] = {}
-    hass.data[DOMAIN][PYDREO_MANAGER] = pydreo_manager
-    hass.data[DOMAIN][DREO_PLATFORMS] = platforms
-
-    _LOGGER.debug("Platforms are: %s", platforms)
-
-    await hass.config_entries.async_forward_entry_setups(config_entry, platforms)
-
-    async def _update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-        """Handle options update."""
-        await hass.config_entries.async_reload(config_entry.entry_id)
-
-    ## Create update listener
-    config_entry.async_on_unload(config_entry.add_update_listener(_update_listener))
-
-    return True
+    return platforms
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    pydreo_manager = hass.data[DOMAIN][PYDREO_MANAGER]
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    pydreo_manager = entry_data[PYDREO_MANAGER]
     if unload_ok := await hass.config_entries.async_unload_platforms(
         config_entry,
-        hass.data[DOMAIN][DREO_PLATFORMS],
+        entry_data[DREO_PLATFORMS],
     ):
-        hass.data.pop(DOMAIN)
+        hass.data[DOMAIN].pop(config_entry.entry_id)
+        if not hass.data[DOMAIN]:
+            hass.data.pop(DOMAIN)
+            hass.services.async_remove(DOMAIN, SERVICE_UPDATE_DEVS)
 
     pydreo_manager.stop_transport()
+    pydreo_manager.settings_store.shutdown()
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Delete the entry's stored device settings when the entry is removed."""
+    path = _settings_path(hass, config_entry)
+
+    def remove() -> None:
+        if os.path.exists(path):
+            os.remove(path)
+
+    await hass.async_add_executor_job(remove)
+
+def _backfill_unique_id(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Give entries created before the config flow set one the account's unique_id, so that
+    the same account can't be added a second time."""
+    username = config_entry.data.get(CONF_USERNAME)
+    if config_entry.unique_id is not None or not username:
+        return
+    unique_id = username.lower()
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.unique_id == unique_id:
+            _LOGGER.warning("Dreo entry %s is for the same account as %s; it is a duplicate",
+                            config_entry.title, entry.title)
+            return
+    hass.config_entries.async_update_entry(config_entry, unique_id=unique_id)
+
+def _settings_path(hass: HomeAssistant, config_entry: ConfigEntry) -> str:
+    """The file the entry's device settings are kept in between runs."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.settings.{config_entry.entry_id}.json")
+
+def _configure_rate_limiter(pydreo_manager, config_entry: ConfigEntry) -> None:
+    """Apply the rate limit options to the account's rate limiter."""
+    from .pydreo.ratelimiter import DEFAULT_REST_RATE, DEFAULT_WEBSOCKET_RATE # pylint: disable=C0415
+
+    options = config_entry.options
+    pydreo_manager.rate_limiter.configure(
+        rest_rate=(options.get(CONF_REST_RATE, DEFAULT_REST_RATE[0]),
+                   options.get(CONF_REST_BURST, DEFAULT_REST_RATE[1])),
+        websocket_rate=(options.get(CONF_WEBSOCKET_RATE, DEFAULT_WEBSOCKET_RATE[0]),
+                        options.get(CONF_WEBSOCKET_BURST, DEFAULT_WEBSOCKET_RATE[1])),
+    )
@@ -7,6 +7,7 @@
 import logging
 
 from .haimports import *  # pylint: disable=W0401,W0614
+from .devicelist import async_register_entity_factory
 from .pydreo import PyDreo, PyDreoBaseDevice
 from .pydreo.constant import DreoDeviceType
 from .dreoairconditioner import DreoAirConditionerHA
@@ -52,7 +53,7 @@ async def async_setup_entry(
     _LOGGER.info("Starting Dreo Climate Platform")
     _LOGGER.debug("Dreo Climate:async_setup_entry")
 
-    pydreo_manager: PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager: PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
     climate_entities_ha = get_entries(pydreo_manager.devices)
 
@@ -61,3 +62,4 @@ async def async_setup_entry(
         len(climate_entities_ha),
     )
     async_add_entities(climate_entities_ha)
+    async_register_entity_factory(hass, config_entry, Platform.CLIMATE, async_add_entities, get_entries)
@@ -7,15 +7,37 @@ import voluptuous as vol
 from .haimports import * # pylint: disable=W0401,W0614
 from .const import (
     DOMAIN,
-    CONF_AUTO_RECONNECT
+    CONF_AUTO_RECONNECT,
+    CONF_OPTIMISTIC_UPDATES,
+    CONF_SUPPRESS_REDUNDANT_COMMANDS,
+    CONF_LOG_STARTUP_TIMING,
+    CONF_SLOW_PARSE_THRESHOLD,
+    CONF_SLOW_CALLBACK_THRESHOLD,
+    CONF_REST_RATE,
+    CONF_REST_BURST,
+    CONF_WEBSOCKET_RATE,
+    CONF_WEBSOCKET_BURST
 )
 from .pydreo import PyDreo
+from .pydreo.slowdetector import SLOW_PARSE_THRESHOLD, SLOW_CALLBACK_THRESHOLD
+from .pydreo.ratelimiter import DEFAULT_REST_RATE, DEFAULT_WEBSOCKET_RATE
 
 _LOGGER = logging.getLogger("dreo")
 
 OPTIONS_SCHEMA = vol.Schema(
     {
-        vol.Required(CONF_AUTO_RECONNECT): bool
+        vol.Required(CONF_AUTO_RECONNECT): bool,
+        vol.Optional(CONF_OPTIMISTIC_UPDATES, default=False): bool,
+        vol.Optional(CONF_SUPPRESS_REDUNDANT_COMMANDS, default=False): bool,
+        vol.Optional(CONF_LOG_STARTUP_TIMING, default=False): bool,
+        vol.Optional(CONF_SLOW_PARSE_THRESHOLD,
+                     default=round(SLOW_PARSE_THRESHOLD * 1000)): vol.All(int, vol.Range(min=0)),
+        vol.Optional(CONF_SLOW_CALLBACK_THRESHOLD,
+                     default=round(SLOW_CALLBACK_THRESHOLD * 1000)): vol.All(int, vol.Range(min=0)),
+        vol.Optional(CONF_REST_RATE, default=DEFAULT_REST_RATE[0]): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+        vol.Optional(CONF_REST_BURST, default=DEFAULT_REST_RATE[1]): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(CONF_WEBSOCKET_RATE, default=DEFAULT_WEBSOCKET_RATE[0]): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+        vol.Optional(CONF_WEBSOCKET_BURST, default=DEFAULT_WEBSOCKET_RATE[1]): vol.All(vol.Coerce(float), vol.Range(min=1))
     }
 )
 
@@ -63,15 +85,16 @@ class DreoFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(self, user_input=None):
         """Handle a flow start."""
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-
         if not user_input:
             return self._show_form()
 
         self._username = user_input[CONF_USERNAME]
         self._password = user_input[CONF_PASSWORD]
 
+        # One entry per Dreo account; several accounts can be added side by side.
+        await self.async_set_unique_id(self._username.lower())
+        self._abort_if_unique_id_configured()
+
         pydreo_manager = PyDreo(self._username, self._password, "us")
         login = await self.hass.async_add_executor_job(pydreo_manager.login)
         if not login:
@@ -6,7 +6,17 @@ DREO_DISCOVERY = "dreo_discovery_{}"
 SERVICE_UPDATE_DEVS = "update_devices"
 PYDREO_MANAGER = "pydreo_manager"
 DREO_PLATFORMS = "platforms"
+DREO_ENTITY_FACTORIES = "entity_factories"
 
 CONF_AUTO_RECONNECT = "auto_reconnect"
+CONF_OPTIMISTIC_UPDATES = "optimistic_updates"
+CONF_SUPPRESS_REDUNDANT_COMMANDS = "suppress_redundant_commands"
+CONF_LOG_STARTUP_TIMING = "log_startup_timing"
+CONF_SLOW_PARSE_THRESHOLD = "slow_parse_threshold_ms"
+CONF_SLOW_CALLBACK_THRESHOLD = "slow_callback_threshold_ms"
+CONF_REST_RATE = "rest_rate"
+CONF_REST_BURST = "rest_burst"
+CONF_WEBSOCKET_RATE = "websocket_rate"
+CONF_WEBSOCKET_BURST = "websocket_burst"
 
 from .const_debug_test_mode import *  # pylint: disable=W0401,W0614
\ No newline at end of file
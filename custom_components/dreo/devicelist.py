@@ -0,0 +1,73 @@
+"""Adding and removing Dreo devices without reloading the integration."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+import logging
+
+from .haimports import *  # pylint: disable=W0401,W0614
+from .pydreo import PyDreo
+from .pydreo.pydreobasedevice import PyDreoBaseDevice
+
+from .const import (
+    LOGGER,
+    DOMAIN,
+    PYDREO_MANAGER,
+    DREO_PLATFORMS,
+    DREO_ENTITY_FACTORIES,
+)
+
+_LOGGER = logging.getLogger(LOGGER)
+
+# How often the device list is checked for devices added or removed in the Dreo app.
+DEVICE_LIST_REFRESH_INTERVAL = timedelta(hours=1)
+
+
+@callback
+def async_register_entity_factory(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    platform: Platform,
+    async_add_entities: AddEntitiesCallback,
+    get_entries: Callable[[list[PyDreoBaseDevice]], list[Entity]],
+) -> None:
+    """Remember how a platform creates entities, so entities can be added for new devices."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    entry_data.setdefault(DREO_ENTITY_FACTORIES, {})[platform] = (async_add_entities, get_entries)
+
+
+async def async_refresh_devices(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Pick up devices added to or removed from the account since the device list was loaded."""
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    pydreo_manager : PyDreo = entry_data[PYDREO_MANAGER]
+
+    changes = await hass.async_add_executor_job(pydreo_manager.refresh_devices)
+    if changes is None:
+        return
+    added, removed = changes
+
+    if removed:
+        registry = dr.async_get(hass)
+        for pydreo_device in removed:
+            device_entry = registry.async_get_device(identifiers={(DOMAIN, pydreo_device.serial_number)})
+            if device_entry is not None:
+                _LOGGER.info("Removing Dreo device %s", pydreo_device.name)
+                registry.async_update_device(device_entry.id, remove_config_entry_id=config_entry.entry_id)
+
+    if not added:
+        return
+
+    # Imported here, like in async_setup_entry, to keep the platform list in one place.
+    from . import platforms_for_devices  # pylint: disable=C0415
+
+    if not platforms_for_devices(added) <= entry_data[DREO_PLATFORMS]:
+        _LOGGER.info("New Dreo devices need platforms that aren't set up yet; reloading")
+        hass.async_create_task(hass.config_entries.async_reload(config_entry.entry_id))
+        return
+
+    for platform, (async_add_entities, get_entries) in entry_data.get(DREO_ENTITY_FACTORIES, {}).items():
+        entities = get_entries(added)
+        if entities:
+            _LOGGER.debug("Adding %d %s entities for new devices", len(entities), platform)
+            async_add_entities(entities)
@@ -20,6 +20,7 @@ from .const import (
 KEYS_TO_REDACT = {
     "sn",
     "_sn",
+    "serial_number",
     "wifi_ssid",
     "module_hardware_mac",
     "password",
@@ -38,7 +39,7 @@ async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
-    pydreo_manager: PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager: PyDreo = hass.data[DOMAIN][entry.entry_id][PYDREO_MANAGER]
 
     return _get_diagnostics(pydreo_manager)
 
@@ -47,12 +48,29 @@ def _get_diagnostics(pydreo_manager: PyDreo) -> dict[str, Any]:
         DOMAIN: {
             "device_count": len(pydreo_manager.devices),
             "raw_devicelist": _redact_values(pydreo_manager.raw_response),
+            "startup_timing": _redact_values(pydreo_manager.startup_timing.as_dict()),
+            "metrics": pydreo_manager.metrics.snapshot(),
+            "slow_operations": _redact_values(pydreo_manager.slow_detector.as_dict()),
+            "rate_limiter": pydreo_manager.rate_limiter.as_dict(),
+            # Settings are stored per device serial number, so the keys are redacted.
+            "device_settings": list(pydreo_manager.settings_store.as_dict().values()),
+            # Polls are scheduled per device serial number, so only the times and counts are kept.
+            "degraded_polling": _degraded_polling(pydreo_manager),
+            # Messages are throttled per device serial number, so the keys are redacted.
+            "throttled_log_messages": [{**message, "key": REDACTED}
+                                       for message in pydreo_manager.log_throttle.summary()],
         },
         "devices": [_redact_values(device.__dict__) for device in pydreo_manager.devices],
     }
 
     return data
 
+def _degraded_polling(pydreo_manager: PyDreo) -> dict[str, Any]:
+    polling = pydreo_manager.degraded_poller.as_dict()
+    polling["next_poll"] = sorted(polling["next_poll"].values())
+    polling["failed"] = len(polling["failed"])
+    return polling
+
 def _redact_values(data: dict) -> dict:
     """Rebuild and redact values of a dictionary, recursively"""
 
@@ -33,8 +33,7 @@ class DreoBaseDeviceHA(Entity):
     @property
     def available(self) -> bool:
         """Return True if device is available."""
-        # return self.device.connection_status == "online"
-        return True
+        return self.pydreo_device.available
 
     @property
     def should_poll(self):
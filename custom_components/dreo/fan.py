@@ -6,6 +6,7 @@ from .haimports import * # pylint: disable=W0401,W0614
 from .pydreo import PyDreo, PyDreoBaseDevice
 from .pydreo.constant import DreoDeviceType
 from .dreofan import DreoFanHA 
+from .devicelist import async_register_entity_factory
 
 from .const import (
     LOGGER,
@@ -33,7 +34,7 @@ def get_entries(pydreo_devices : list[PyDreoBaseDevice]) -> list[DreoFanHA]:
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    config_entry: ConfigEntry, # pylint: disable=unused-argument
+    config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
     _discovery_info=None,
 ) -> None:
@@ -41,9 +42,10 @@ async def async_setup_entry(
     _LOGGER.info("Starting Dreo Fan Platform")
     _LOGGER.debug("Dreo Fan:async_setup_entry")
 
-    pydreo_manager : PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager : PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
     fan_entities_ha = get_entries(pydreo_manager.devices)
 
     _LOGGER.debug("Fan:async_setup_entry: Adding Fans (%s)", len(fan_entities_ha))
     async_add_entities(fan_entities_ha)
+    async_register_entity_factory(hass, config_entry, Platform.FAN, async_add_entities, get_entries)
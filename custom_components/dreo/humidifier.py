@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 
 from .haimports import * # pylint: disable=W0401,W0614
+from .devicelist import async_register_entity_factory
 from .pydreo import PyDreo, PyDreoBaseDevice, PyDreoHumidifier, PyDreoDehumidifier
 from .pydreo.constant import DreoDeviceType
 from .dreobasedevice import DreoBaseDeviceHA
@@ -34,7 +35,7 @@ def get_entries(pydreo_devices : list[PyDreoBaseDevice]) -> list:
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    config_entry: ConfigEntry, # pylint: disable=unused-argument
+    config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
     _discovery_info=None,
 ) -> None:
@@ -42,10 +43,11 @@ async def async_setup_entry(
     _LOGGER.info("Starting Dreo Humidifier Platform")
     _LOGGER.debug("Dreo Humidifier:async_setup_entry")
 
-    pydreo_manager : PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager : PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
     humidifier_entities_ha = get_entries(pydreo_manager.devices)
 
     _LOGGER.debug("Humidifier:async_setup_entry: Adding Humidifiers (%s)", len(humidifier_entities_ha))
     async_add_entities(humidifier_entities_ha)
+    async_register_entity_factory(hass, config_entry, Platform.HUMIDIFIER, async_add_entities, get_entries)
 
@@ -10,6 +10,7 @@ import logging
 import math
 
 from .haimports import * # pylint: disable=W0401,W0614
+from .devicelist import async_register_entity_factory
 from .pydreo import PyDreo
 from .pydreo.pydreobasedevice import PyDreoBaseDevice
 from .pydreo.constant import DreoDeviceType # pylint: disable=C0415
@@ -44,9 +45,10 @@ async def async_setup_entry(
     """Set up the Dreo Light platform."""
     _LOGGER.info("Starting Dreo Light Platform")
 
-    pydreo_manager : PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager : PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
     async_add_entities(get_entries(pydreo_manager.devices))
+    async_register_entity_factory(hass, config_entry, Platform.LIGHT, async_add_entities, get_entries)
 
 
 class DreoLightHA(DreoBaseDeviceHA, LightEntity): # pylint: disable=abstract-method
@@ -9,6 +9,7 @@ from dataclasses import dataclass
 import logging
 
 from .haimports import * # pylint: disable=W0401,W0614
+from .devicelist import async_register_entity_factory
 from .pydreo import PyDreo
 from .pydreo.pydreobasedevice import PyDreoBaseDevice
 from .dreobasedevice import DreoBaseDeviceHA
@@ -161,9 +162,10 @@ async def async_setup_entry(
     """Set up the Dreo Number platform."""
     _LOGGER.info("Starting Dreo Number Platform")
 
-    pydreo_manager : PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager : PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
     async_add_entities(get_entries(pydreo_manager.devices))
+    async_register_entity_factory(hass, config_entry, Platform.NUMBER, async_add_entities, get_entries)
 
 
 class DreoNumberHA(DreoBaseDeviceHA, NumberEntity): # pylint: disable=abstract-method
@@ -4,7 +4,9 @@
 # from .pydreo import PyDreo
 import logging
 import threading
+import concurrent.futures
 import sys
+import time
 
 import json
 from itertools import chain
@@ -15,6 +17,27 @@ from .constant import *
 from .helpers import Helpers
 from .models import *
 from .commandtransport import CommandTransport
+from .wsenvelope import WS_REPORT_METHODS, loads
+from .commandtracker import CommandAckTracker, CommandAckWaiter, CommandTimeoutError
+from .recorder import TrafficRecorder, replay_recording
+from .timing import StartupTiming
+from .slowdetector import SlowOperationDetector
+from .logthrottle import LogThrottle
+from .retrypolicy import RetryPolicy, DEFAULT_RETRY_POLICY
+from .ratelimiter import AccountRateLimiter
+from .singleflight import SingleFlight
+from .settingsstore import DeviceSettingsStore, SETTINGS_FETCH_TIMEOUT
+from .restpoller import DegradedModePoller
+from .metrics import (
+    MetricsRegistry,
+    METRIC_REST_CALLS,
+    METRIC_REST_ERRORS,
+    METRIC_REST_LATENCY,
+    METRIC_REST_RETRIES,
+    METRIC_REST_RATE_LIMIT_WAIT,
+    METRIC_COMMANDS_SENT
+)
+from .events import DreoEventBus, DreoEventFilter, DreoEventSource, DreoStateEvent, EVENT_QUEUE_SIZE
 from .pydreobasedevice import PyDreoBaseDevice, UnknownModelError, UnknownProductError
 from .pydreounknowndevice import PyDreoUnknownDevice
 from .pydreotowerfan import PyDreoTowerFan
@@ -51,8 +74,34 @@ class PyDreo:  # pylint: disable=function-redefined
                  password, 
                  redact=True, 
                  debug_test_mode=False,
-                 debug_test_mode_payload=None) -> None:
-        self._transport = CommandTransport(self._transport_consume_message)
+                 debug_test_mode_payload=None,
+                 optimistic_updates=False,
+                 suppress_redundant_commands=False,
+                 api_base_url=None,
+                 ws_base_url=None) -> None:
+        self.metrics = MetricsRegistry()
+        self.rate_limiter = AccountRateLimiter()
+        self._transport = CommandTransport(self._transport_consume_message,
+                                           self._transport_accepts_message,
+                                           metrics=self.metrics,
+                                           rate_limit_bucket=self.rate_limiter.websocket)
+        self.metrics.gauge("ratelimit.rest_wait", lambda: self.rate_limiter.rest.wait_time)
+        self.metrics.gauge("ratelimit.websocket_wait", lambda: self.rate_limiter.websocket.wait_time)
+        self._ack_tracker = CommandAckTracker()
+        self.event_bus = DreoEventBus()
+        self.startup_timing = StartupTiming()
+        self.slow_detector = SlowOperationDetector()
+        self.log_throttle = LogThrottle()
+        self.retry_policy : RetryPolicy = DEFAULT_RETRY_POLICY
+        self._single_flight = SingleFlight()
+        self.metrics.gauge("rest.coalesced", lambda: self._single_flight.coalesced_count)
+        self.settings_store = DeviceSettingsStore(self._fetch_device_setting)
+        self.settings_store.add_listener(self._setting_changed)
+        self.degraded_poller = DegradedModePoller(lambda: self._transport.disconnected_for,
+                                                  lambda: self.devices,
+                                                  self.load_device_state)
+        self.metrics.gauge("rest.degraded_mode", lambda: int(self.degraded_poller.degraded))
+        self.metrics.gauge("rest.degraded_polls", lambda: self.degraded_poller.poll_count)
 
         """Initialize Dreo class with username, password and time zone."""
         self.auth_region = DREO_AUTH_REGION_NA  # Will get the region from the auth call
@@ -72,6 +121,16 @@ class PyDreo:  # pylint: disable=function-redefined
         self._device_list_by_sn = {}
         self.devices: list[PyDreoBaseDevice] = []
         
+        self.optimistic_updates : bool = optimistic_updates
+        self.optimistic_timeout : float = OPTIMISTIC_ROLLBACK_TIMEOUT
+        self.suppress_redundant_commands : bool = suppress_redundant_commands
+        self.suppressed_command_count : int = 0
+        self.metrics.gauge("command.suppressed", lambda: self.suppressed_command_count)
+
+        # Override the regional Dreo servers, e.g. to point at a local test server.
+        self.api_base_url : str = api_base_url
+        self.ws_base_url : str = ws_base_url
+
         self.debug_test_mode : bool = debug_test_mode
         self.debug_test_mode_payload : dict = debug_test_mode_payload
 
@@ -160,55 +219,62 @@ class PyDreo:  # pylint: disable=function-redefined
 
         # detail_keys = ['deviceType', 'deviceName', 'deviceStatus']
         for dev in devices:
-            # Get the state of the device...separate API call...boo
-            try:
-                model = dev.get("model", None)
-                
-                _LOGGER.debug("Found device with model %s", model)
-
-                if model is not None: 
-                    # Get the prefix of the model number to match against the supported devices.
-                    # Not all models will have known prefixes.
-                    model_prefix = None
-                    for prefix in SUPPORTED_MODEL_PREFIXES:
-                        if model[:len(prefix):] == prefix:
-                            model_prefix = prefix
-                            _LOGGER.debug("Prefix %s assigned from model %s", model_prefix, model)
-                            break
-                    
-                    device_details = None
-                    if model in SUPPORTED_DEVICES:
-                        _LOGGER.debug("Device %s found!", model)
-                        device_details = SUPPORTED_DEVICES[model]
-                    elif model_prefix is not None and model_prefix in SUPPORTED_DEVICES:
-                        _LOGGER.debug("Device %s found! via prefix %s", model, model_prefix)
-                        device_details = SUPPORTED_DEVICES[model_prefix]
-
-                # If device_details is None at this point, we have an unknown device model.
-                # Unsupported/Unknown Device.  Load the state, but store it in an "unsupported objects"
-                # list for later use in diagnostics.
-                device_class = None
-                
-                if device_details is not None:
-                    device_class = _DREO_DEVICE_TYPE_TO_CLASS.get(device_details.device_type, None)
-                else:
-                    device_details = DreoDeviceDetails(device_type = DreoDeviceType.UNKNOWN)
+            self._add_device(dev)
 
-                if device_class is None:
-                    device_class = PyDreoUnknownDevice
+        return True
+
+    def _add_device(self, dev: dict) -> PyDreoBaseDevice | None:
+        """Construct a device from its devicelist entry, load its state and add it."""
+        # Get the state of the device...separate API call...boo
+        try:
+            model = dev.get("model", None)
+            
+            _LOGGER.debug("Found device with model %s", model)
+
+            if model is not None: 
+                # Get the prefix of the model number to match against the supported devices.
+                # Not all models will have known prefixes.
+                model_prefix = None
+                for prefix in SUPPORTED_MODEL_PREFIXES:
+                    if model[:len(prefix):] == prefix:
+                        model_prefix = prefix
+                        _LOGGER.debug("Prefix %s assigned from model %s", model_prefix, model)
+                        break
                 
+                device_details = None
+                if model in SUPPORTED_DEVICES:
+                    _LOGGER.debug("Device %s found!", model)
+                    device_details = SUPPORTED_DEVICES[model]
+                elif model_prefix is not None and model_prefix in SUPPORTED_DEVICES:
+                    _LOGGER.debug("Device %s found! via prefix %s", model, model_prefix)
+                    device_details = SUPPORTED_DEVICES[model_prefix]
+
+            # If device_details is None at this point, we have an unknown device model.
+            # Unsupported/Unknown Device.  Load the state, but store it in an "unsupported objects"
+            # list for later use in diagnostics.
+            device_class = None
+            
+            if device_details is not None:
+                device_class = _DREO_DEVICE_TYPE_TO_CLASS.get(device_details.device_type, None)
+            else:
+                device_details = DreoDeviceDetails(device_type = DreoDeviceType.UNKNOWN)
+
+            if device_class is None:
+                device_class = PyDreoUnknownDevice
+            
+            with self.startup_timing.span("device", sn=dev.get("sn"), model=model):
                 device : PyDreoBaseDevice = device_class(device_details, dev, self)
 
                 self.load_device_state(device)
 
-                self.devices.append(device)
+            self.devices.append(device)
 
-                self._device_list_by_sn[device.serial_number] = device
-            except UnknownModelError as ume:
-                _LOGGER.warning("Unknown device model: %s", ume)
-                _LOGGER.debug(dev)
-
-        return True
+            self._device_list_by_sn[device.serial_number] = device
+            return device
+        except UnknownModelError as ume:
+            _LOGGER.warning("Unknown device model: %s", ume)
+            _LOGGER.debug(dev)
+        return None
 
     def load_devices(self) -> bool:
         """Load devices from API. This is called once upon initialization."""
@@ -224,7 +290,8 @@ class PyDreo:  # pylint: disable=function-redefined
             _LOGGER.debug("Debug Test Mode is enabled.  Using test payload.")
             response = self.debug_test_mode_payload.get("get_devices", None)    
         else:
-            response, _ = self.call_dreo_api(DREO_API_DEVICELIST)
+            with self.startup_timing.span("list"):
+                response, _ = self.call_dreo_api(DREO_API_DEVICELIST)
 
         # Stash the raw response for use by the diagnostics system, so we don't have to pull
         # logs
@@ -233,7 +300,8 @@ class PyDreo:  # pylint: disable=function-redefined
         if response and Helpers.code_check(response):
             if DATA_KEY in response and LIST_KEY in response[DATA_KEY]:
                 device_list = response[DATA_KEY][LIST_KEY]
-                proc_return = self._process_devices(device_list)
+                with self.startup_timing.span("states", count=len(device_list)):
+                    proc_return = self._process_devices(device_list)
             else:
                 _LOGGER.error("Device list in response not found")
         else:
@@ -243,8 +311,53 @@ class PyDreo:  # pylint: disable=function-redefined
 
         return proc_return
 
+    def refresh_devices(self) -> tuple[list[PyDreoBaseDevice], list[PyDreoBaseDevice]] | None:
+        """Fetch the device list again and bring the loaded devices in line with it.
+
+        Only devices that are new are constructed (and have their state and deferred settings
+        loaded); devices no longer in the list are removed.  Devices that are in both are left
+        alone.  Returns (added, removed), or None if the device list couldn't be fetched."""
+        if not self.enabled:
+            return None
+
+        if self.debug_test_mode:
+            response = self.debug_test_mode_payload.get("get_devices", None)
+        else:
+            response, _ = self.call_dreo_api(DREO_API_DEVICELIST)
+        if not (response and Helpers.code_check(response)
+                and DATA_KEY in response and LIST_KEY in response[DATA_KEY]):
+            _LOGGER.warning("refresh_devices: error retrieving device list")
+            return None
+
+        device_list = response[DATA_KEY][LIST_KEY]
+        self.raw_response = response
+        listed_sns = {dev.get("sn") for dev in device_list}
+
+        added : list[PyDreoBaseDevice] = []
+        for dev in device_list:
+            if dev.get("sn") not in self._device_list_by_sn:
+                device = self._add_device(dev)
+                if device is not None:
+                    added.append(device)
+
+        removed = [device for device in self.devices if device.serial_number not in listed_sns]
+        for device in removed:
+            self.devices.remove(device)
+            self._device_list_by_sn.pop(device.serial_number, None)
+            self.settings_store.forget(device.serial_number)
+
+        for device in added:
+            for setting in device.deferred_settings:
+                self.settings_store.refresh_in_background(device.serial_number, setting)
+
+        if added or removed:
+            _LOGGER.info("refresh_devices: added %s, removed %s",
+                         [device.name for device in added], [device.name for device in removed])
+        return added, removed
+
     def load_device_state(self, device: PyDreoBaseDevice) -> bool:
-        """Load device state from API. This is called once upon initialization for each supported device."""
+        """Load device state from API. This is called once upon initialization for each supported device,
+        and by the degraded mode poller while the WebSocket is down."""
         _LOGGER.debug("load_device_state: %s, enabled: %s", device.name, self.enabled)
         if not self.enabled:
             return False
@@ -258,9 +371,10 @@ class PyDreo:  # pylint: disable=function-redefined
             _LOGGER.debug("Debug Test Mode is enabled.  Using test payload.")
             response = self.debug_test_mode_payload.get(device.serial_number, None)    
         else:
-            response, _ = self.call_dreo_api(
-                DREO_API_DEVICESTATE, {DEVICESN_KEY: device.serial_number}
-            )
+            with self.startup_timing.span("state"):
+                response, _ = self.call_dreo_api(
+                    DREO_API_DEVICESTATE, {DEVICESN_KEY: device.serial_number}
+                )
 
         # stash the raw return value from the devicestate api call
         device.raw_state = response
@@ -295,7 +409,8 @@ class PyDreo:  # pylint: disable=function-redefined
         if pass_check is False:
             _LOGGER.error("Password invalid")
             return False
-        response, _ = self.call_dreo_api(DREO_API_LOGIN)
+        with self.startup_timing.span("login", region=self.auth_region):
+            response, _ = self.call_dreo_api(DREO_API_LOGIN)
 
         if Helpers.code_check(response) and DATA_KEY in response:
             # get the region code from auth
@@ -316,9 +431,14 @@ class PyDreo:  # pylint: disable=function-redefined
         return False
 
     def get_device_setting(self, device: PyDreoBaseDevice, setting : DreoDeviceSetting) -> bool | int:
+        """Get a device setting, from the settings store if it has it.  Otherwise waits (up to
+        SETTINGS_FETCH_TIMEOUT seconds) for it to be fetched; entities use the store's cached()."""
+        return self.settings_store.get(device.serial_number, setting, timeout=SETTINGS_FETCH_TIMEOUT)
+
+    def _fetch_device_setting(self, device_sn: str, setting : DreoDeviceSetting) -> bool | int:
         """Get a device setting from the API."""
-        _LOGGER.debug("get_device_setting: %s(%s), enabled: %s", 
-                    device.name, 
+        _LOGGER.debug("_fetch_device_setting: %s(%s), enabled: %s",
+                    device_sn,
                     setting,
                     self.enabled)
         if not self.enabled:
@@ -326,12 +446,13 @@ class PyDreo:  # pylint: disable=function-redefined
 
         self.in_process = True
         setting_value = None
-        response, _ = self.call_dreo_api(
-            DREO_API_SETTING_GET, 
-            {   DEVICESN_KEY: device.serial_number,
-                DREO_API_SETTING_DATA_KEY: setting
-            }
-        )
+        with self.startup_timing.span("setting", key=str(setting)):
+            response, _ = self.call_dreo_api(
+                DREO_API_SETTING_GET, 
+                {   DEVICESN_KEY: device_sn,
+                    DREO_API_SETTING_DATA_KEY: setting
+                }
+            )
 
         if response and Helpers.code_check(response):
             if DATA_KEY in response:
@@ -373,6 +494,7 @@ class PyDreo:  # pylint: disable=function-redefined
         device.raw_state = response
 
         if response and Helpers.code_check(response):
+            self.settings_store.put(device.serial_number, setting, value)
             if DATA_KEY in response and MIXED_KEY in response[DATA_KEY]:
                 device_state = response[DATA_KEY][MIXED_KEY]
                 device.update_state(device_state)
@@ -390,43 +512,135 @@ class PyDreo:  # pylint: disable=function-redefined
         """Call the Dreo API. This is used for login and the initial device list and states as well
            as device settings."""
         _LOGGER.debug("Calling Dreo API: {%s}", api)
-        api_url = DREO_API_URL_FORMAT.format(self.api_server_region)
-
         if json_object is None:
             json_object = {}
 
+        if DREO_APIS[api][DREO_API_METHOD] != "get":
+            return self._request_dreo_api(api, json_object)
+
+        # Identical GETs in flight at the same time share one network call.  Nothing is cached
+        # here: setting values are kept (and expire) in settings_store.
+        key = (api, json.dumps(json_object, sort_keys=True, default=str))
+        return self._single_flight.do(key, lambda: self._request_dreo_api(api, json_object))
+
+    def _request_dreo_api(self, api: str, json_object: dict) -> tuple:
+        api_url = self.api_base_url or DREO_API_URL_FORMAT.format(self.api_server_region)
+
         json_object_full = {**Helpers.req_body(self, api), **json_object}
 
-        return Helpers.call_api(
-            api_url,
-            DREO_APIS[api][DREO_API_PATH],
-            DREO_APIS[api][DREO_API_METHOD],
-            json_object_full,
-            Helpers.req_headers(self),
-        )
+        waited = self.rate_limiter.rest.acquire()
+        if waited > 0:
+            _LOGGER.debug("call_dreo_api: waited %.2fs for the REST rate limit before %s", waited, api)
+            self.metrics.histogram(METRIC_REST_RATE_LIMIT_WAIT).observe(waited)
+        self.metrics.counter(f"{METRIC_REST_CALLS}.{api}").inc()
+        start = time.perf_counter()
+        try:
+            response, status_code = Helpers.call_api(
+                api_url,
+                DREO_APIS[api][DREO_API_PATH],
+                DREO_APIS[api][DREO_API_METHOD],
+                json_object_full,
+                Helpers.req_headers(self),
+                retry_policy=self.retry_policy,
+                on_retry=lambda reason: self.metrics.counter(f"{METRIC_REST_RETRIES}.{api}").inc(),
+            )
+        finally:
+            # Per API, and across all of them.
+            latency = time.perf_counter() - start
+            self.metrics.histogram(f"{METRIC_REST_LATENCY}.{api}").observe(latency)
+            self.metrics.histogram(METRIC_REST_LATENCY).observe(latency)
+        if status_code != 200:
+            self.metrics.counter(f"{METRIC_REST_ERRORS}.{api}").inc()
+        return response, status_code
 
     def start_transport(self) -> None:
         """Initialize the websocket and start transport"""
         if not self.debug_test_mode:
-            self._transport.start_transport(self.api_server_region, self.token)
+            self._transport.start_transport(self.api_server_region, self.token, self.ws_base_url)
+            self.degraded_poller.start()
 
     def stop_transport(self) -> None:
         """Close down the transport socket"""
         if not self.debug_test_mode:
+            self.degraded_poller.stop()
             self._transport.stop_transport()
 
+    def is_device_available(self, device: PyDreoBaseDevice) -> bool:
+        """False if the WebSocket is down and the device's state couldn't be polled."""
+        return self.degraded_poller.is_available(device.serial_number)
+
     def testonly_interrupt_transport(self) -> None:
         """Close down the transport socket"""
         self._transport.testonly_interrupt_transport()
 
+    def start_recording(self, path: str, redact: bool = True) -> None:
+        """Append all raw WebSocket traffic (in and out) to a log file at path."""
+        self.stop_recording()
+        self._transport.recorder = TrafficRecorder(path, redact)
+        _LOGGER.info("Recording WebSocket traffic to %s", path)
+
+    def stop_recording(self) -> None:
+        """Stop recording WebSocket traffic."""
+        recorder = self._transport.recorder
+        if recorder is not None:
+            self._transport.recorder = None
+            recorder.close()
+
+    def replay_recording(self, path: str, speed: float | None = 1.0) -> int:
+        """Feed the inbound frames of a recording through the normal message handling, as if
+        they had just arrived on the WebSocket.  Blocks until done.
+
+        speed 1 keeps the recorded timing, N is N times faster, None is as fast as possible.
+        Returns the number of frames replayed."""
+        return replay_recording(path, self._replay_frame, speed)
+
+    def _replay_frame(self, frame: str) -> None:
+        try:
+            message = loads(frame)
+        except ValueError:
+            _LOGGER.debug("replay_recording: unable to decode frame: %s", frame)
+            return
+        if isinstance(message, dict):
+            self._transport_consume_message(message)
+
+    def _transport_accepts_message(self, device_sn: str, method: str) -> bool:
+        """Decide from a frame's envelope alone whether it's worth decoding."""
+        if device_sn not in self._device_list_by_sn:
+            _LOGGER.debug("Skipping message for unknown or unsupported device. SN: %s", device_sn)
+            return False
+        return method is None or method in WS_REPORT_METHODS
+
+    def load_deferred_settings(self, wait: bool = False) -> int:
+        """Fetch the settings devices deferred during start up (see defer_setting) that the
+        settings store doesn't already have fresh values for.  The fetches run on the store's
+        bounded pool of background threads; devices run their callbacks as values arrive.
+        Returns the number of settings being fetched."""
+        futures = []
+        for device in self.devices:
+            for setting in device.deferred_settings:
+                if not self.settings_store.is_fresh(device.serial_number, setting):
+                    futures.append(self.settings_store.refresh_in_background(device.serial_number, setting))
+        _LOGGER.debug("load_deferred_settings: fetching %d settings", len(futures))
+        if wait:
+            concurrent.futures.wait(futures)
+        return len(futures)
+
+    def _setting_changed(self, device_sn: str, setting: str, value) -> None:
+        """Let a device's listeners know one of its settings has a new value."""
+        device = self._device_list_by_sn.get(device_sn)
+        if device is not None:
+            _LOGGER.debug("_setting_changed: %s %s=%s", device.name, setting, value)
+            device.setting_changed(setting, value)
+
     def _transport_consume_message(self, message):
         _LOGGER.debug("pydreo._transport_consume_message: %s", message)
 
-        message_device_sn = message["devicesn"]
+        message_device_sn = message.get("devicesn")
 
         if message_device_sn in self._device_list_by_sn:
             device = self._device_list_by_sn[message_device_sn]
             device.handle_server_update_base(message)
+            self._ack_tracker.process_report(message_device_sn, message.get(REPORTED_KEY))
         else:
             # Message is to an unknown device, log it out just in case...
             _LOGGER.debug(
@@ -435,6 +649,34 @@ class PyDreo:  # pylint: disable=function-redefined
             )
             _LOGGER.debug("Message: %s", message)
 
+    def expect_command_ack(self, device: PyDreoBaseDevice, params: dict, on_ack) -> CommandAckWaiter:
+        """Register a callback for when the device reports back the values in params.
+        on_ack is called with the command-to-ack latency, from the thread processing the report."""
+        return self._ack_tracker.expect(device.serial_number, params, on_ack)
+
+    def cancel_command_ack(self, waiter: CommandAckWaiter) -> None:
+        """Stop waiting for a command registered with expect_command_ack."""
+        self._ack_tracker.cancel(waiter)
+
+    def command_ack_latency(self, device: PyDreoBaseDevice) -> dict:
+        """Return command-to-ack latency stats (seconds) for a device."""
+        return self._ack_tracker.latency_stats(device.serial_number)
+
+    async def events(self,
+                     filter: DreoEventFilter = None, # pylint: disable=redefined-builtin
+                     max_queue: int = EVENT_QUEUE_SIZE):
+        """Async iterator over device state changes, e.g. `async for event in dreo.events()`.
+
+        The filter is applied before events are queued, so unwanted devices and keys cost
+        nothing.  At most max_queue events are buffered; if the consumer falls behind, the
+        oldest are dropped."""
+        subscription = self.event_bus.subscribe(filter, max_queue)
+        try:
+            async for event in subscription:
+                yield event
+        finally:
+            subscription.close()
+
     def send_command(self, device: PyDreoBaseDevice, params) -> None:
         """Send a command to Dreo servers via the WebSocket."""
         full_params = {
@@ -443,8 +685,8 @@ class PyDreo:  # pylint: disable=function-redefined
             "params": params,
             "timestamp": Helpers.api_timestamp(),
         }
-        content = json.dumps(full_params)
-        _LOGGER.debug(content)
+        _LOGGER.debug("send_command: %s", full_params)
+        self.metrics.counter(METRIC_COMMANDS_SENT).inc()
 
         if self.debug_test_mode:
             _LOGGER.debug("Debug Test Mode is enabled.  Pretending we received the message...")
@@ -453,4 +695,4 @@ class PyDreo:  # pylint: disable=function-redefined
                                              "reported": params})
         else:
             # Send the message to the transport, which will then send it to the Dreo servers
-            self._transport.send_message(content)
+            self._transport.send_message(full_params)
@@ -0,0 +1,104 @@
+"""Journal of control commands issued while the WebSocket is disconnected."""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from .constant import LOGGER_NAME
+from .helpers import Helpers
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+JOURNAL_MAX_DEVICES = 64
+JOURNAL_TTL = 60
+
+
+class CommandJournal:
+    """Holds control messages until a new socket is established.
+
+    Commands are collapsed per device: a later value for the same key replaces the earlier
+    one, so a burst of changes during an outage is flushed as a single control message per
+    device.  Each key expires individually after ttl seconds, and the journal holds at most
+    max_devices devices (the least recently commanded device is dropped first).
+    """
+
+    def __init__(self, max_devices: int = JOURNAL_MAX_DEVICES, ttl: float = JOURNAL_TTL):
+        self.max_devices = max_devices
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # devicesn -> {key: (value, queued_at)}, ordered by most recent command last.
+        self._entries : OrderedDict[str, dict[str, tuple[any, float]]] = OrderedDict()
+        self._collapsed_count = 0
+        self._expired_count = 0
+        self._dropped_count = 0
+
+    def add(self, content: dict) -> None:
+        """Journal a control message (as built by PyDreo.send_command)."""
+        device_sn = content.get("devicesn")
+        params = content.get("params") or {}
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(device_sn)
+            if entry is None:
+                entry = {}
+                self._entries[device_sn] = entry
+            else:
+                self._entries.move_to_end(device_sn)
+
+            for key, value in params.items():
+                if key in entry:
+                    self._collapsed_count += 1
+                    # Re-insert so the key order reflects when it was last commanded.
+                    del entry[key]
+                entry[key] = (value, now)
+
+            while len(self._entries) > self.max_devices:
+                dropped_sn, dropped = self._entries.popitem(last=False)
+                self._dropped_count += len(dropped)
+                _LOGGER.warning("CommandJournal: full, dropping queued commands for %s", dropped_sn)
+
+    def drain(self) -> list[dict]:
+        """Remove and return the unexpired journaled commands as control messages, oldest first."""
+        now = time.monotonic()
+        messages = []
+        with self._lock:
+            entries = self._entries
+            self._entries = OrderedDict()
+
+            for device_sn, entry in entries.items():
+                params = {}
+                for key, (value, queued_at) in entry.items():
+                    if now - queued_at > self.ttl:
+                        self._expired_count += 1
+                        _LOGGER.info("CommandJournal: %s %s=%s expired before reconnect", device_sn, key, value)
+                    else:
+                        params[key] = value
+                if params:
+                    messages.append({
+                        "devicesn": device_sn,
+                        "method": "control",
+                        "params": params,
+                        "timestamp": Helpers.api_timestamp(),
+                    })
+        return messages
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def collapsed_count(self) -> int:
+        """Number of journaled values replaced by a newer value for the same key."""
+        return self._collapsed_count
+
+    @property
+    def expired_count(self) -> int:
+        """Number of journaled values discarded because they outlived the TTL."""
+        return self._expired_count
+
+    @property
+    def dropped_count(self) -> int:
+        """Number of journaled values discarded because the journal was full."""
+        return self._dropped_count
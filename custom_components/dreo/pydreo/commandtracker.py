@@ -0,0 +1,124 @@
+"""Tracking of commands awaiting confirmation from the device."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+COMMAND_ACK_TIMEOUT = 10
+
+
+class CommandTimeoutError(Exception):
+    """Exception thrown when a device doesn't confirm a command in time."""
+
+
+class CommandAckWaiter:
+    """A command waiting for the device to report back the values it set."""
+
+    def __init__(self, device_sn: str, params: dict, on_ack: Callable[[float], None]):
+        self.device_sn = device_sn
+        self.params = params
+        self.pending_keys = set(params)
+        self.on_ack = on_ack
+        self.sent_at = time.monotonic()
+
+
+class CommandLatencyStats:
+    """Command-to-ack latency for a single device, in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+        self.min = None
+        self.max = None
+
+    def record(self, latency: float) -> None:
+        """Record a confirmed command."""
+        self.count += 1
+        self.total += latency
+        self.last = latency
+        self.min = latency if self.min is None else min(self.min, latency)
+        self.max = latency if self.max is None else max(self.max, latency)
+
+    @property
+    def mean(self) -> float:
+        """Mean latency of all confirmed commands."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        """Return the stats as a plain dict (for diagnostics)."""
+        return {
+            "count": self.count,
+            "last": self.last,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+        }
+
+
+class CommandAckTracker:
+    """Matches incoming reports against commands that are waiting for confirmation.
+
+    A command is confirmed once every key it set has been reported back with the
+    value that was sent (possibly across several reports)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters : dict[str, list[CommandAckWaiter]] = {}
+        self._latency : dict[str, CommandLatencyStats] = {}
+
+    def expect(self, device_sn: str, params: dict, on_ack: Callable[[float], None]) -> CommandAckWaiter:
+        """Register interest in the confirmation of a command.  Call before sending it."""
+        waiter = CommandAckWaiter(device_sn, dict(params), on_ack)
+        with self._lock:
+            self._waiters.setdefault(device_sn, []).append(waiter)
+        return waiter
+
+    def cancel(self, waiter: CommandAckWaiter) -> None:
+        """Stop waiting for a command (timed out or no longer interested)."""
+        with self._lock:
+            waiters = self._waiters.get(waiter.device_sn)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[waiter.device_sn]
+
+    def process_report(self, device_sn: str, reported: dict) -> None:
+        """Check a report against the commands pending for the device."""
+        if not isinstance(reported, dict):
+            return
+
+        acked : list[tuple[CommandAckWaiter, float]] = []
+        with self._lock:
+            waiters = self._waiters.get(device_sn)
+            if not waiters:
+                return
+
+            now = time.monotonic()
+            for waiter in list(waiters):
+                for key in list(waiter.pending_keys):
+                    if key in reported and reported[key] == waiter.params[key]:
+                        waiter.pending_keys.discard(key)
+                if not waiter.pending_keys:
+                    waiters.remove(waiter)
+                    latency = now - waiter.sent_at
+                    self._latency.setdefault(device_sn, CommandLatencyStats()).record(latency)
+                    acked.append((waiter, latency))
+
+            if not waiters:
+                del self._waiters[device_sn]
+
+        for waiter, latency in acked:
+            _LOGGER.debug("CommandAckTracker: %s confirmed %s in %.3fs", device_sn, waiter.params, latency)
+            waiter.on_ack(latency)
+
+    def latency_stats(self, device_sn: str) -> dict:
+        """Return command-to-ack latency stats for a device."""
+        with self._lock:
+            stats = self._latency.get(device_sn)
+            return stats.as_dict() if stats is not None else CommandLatencyStats().as_dict()
@@ -3,10 +3,9 @@
 # flake8: noqa
 # from .pydreo import PyDreo
 import logging
-import threading
+import time
 
 import asyncio
-import json
 from asyncio.exceptions import CancelledError
 from collections.abc import Callable
 
@@ -15,6 +14,24 @@ import websockets
 from .constant import * # pylint: disable=W0401,W0614
 from .helpers import Helpers
 from .models import * # pylint: disable=W0401,W0614
+from .messagedispatcher import MessageDispatcher
+from .wsenvelope import parse_envelope, loads
+from .commandjournal import CommandJournal
+from .outboundscheduler import OutboundScheduler, CommandLane
+from .transporthub import TransportHub
+from .ratelimiter import TokenBucket
+from .recorder import TrafficRecorder, RECORD_INBOUND, RECORD_OUTBOUND
+from .metrics import (
+    MetricsRegistry,
+    METRIC_WS_FRAMES_IN,
+    METRIC_WS_FRAMES_OUT,
+    METRIC_WS_BYTES_IN,
+    METRIC_WS_BYTES_OUT,
+    METRIC_WS_CONNECTS,
+    METRIC_WS_RECONNECTS,
+    METRIC_WS_DECODE_TIME,
+    METRIC_COMMANDS_REQUEUED
+)
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
@@ -22,11 +39,19 @@ class CommandTransport:
     """Command transport class for Dreo API."""
 
     def __init__(self, 
-                 recv_callback: Callable[[dict], None] ):
+                 recv_callback: Callable[[dict], None],
+                 recv_filter: Callable[[str, str], bool] = None,
+                 hub: TransportHub = None,
+                 metrics: MetricsRegistry = None,
+                 rate_limit_bucket: TokenBucket = None):
 
-        self._event_thread = None
+        self._hub = hub if hub is not None else TransportHub.shared()
         self._ws = None
-        self._ws_send_lock = threading.Lock()
+        self._scheduler = OutboundScheduler(shared_bucket=rate_limit_bucket)
+        self._loop : asyncio.AbstractEventLoop = None
+        self._connected = False
+        self._disconnected_since : float = None
+        self._journal = CommandJournal()
         self._transport_enabled = False
         self._signal_close = False
         self._testonly_signal_interrupt = False
@@ -34,7 +59,26 @@ class CommandTransport:
 
         self._api_server_region = None
         self._token = None
+        self._ws_base_url = None
         self._recv_callback = recv_callback
+        self._recv_filter = recv_filter
+        self._skipped_frame_count = 0
+        self._recorder : TrafficRecorder = None
+        self._dispatcher = MessageDispatcher(recv_callback, executor=self._hub.dispatch_executor)
+
+        self._metrics = metrics if metrics is not None else MetricsRegistry()
+        self._frames_in = self._metrics.counter(METRIC_WS_FRAMES_IN)
+        self._bytes_in = self._metrics.counter(METRIC_WS_BYTES_IN)
+        self._frames_out = self._metrics.counter(METRIC_WS_FRAMES_OUT)
+        self._bytes_out = self._metrics.counter(METRIC_WS_BYTES_OUT)
+        self._decode_time = self._metrics.histogram(METRIC_WS_DECODE_TIME)
+        self._metrics.gauge("ws.skipped_frames", lambda: self._skipped_frame_count)
+        self._metrics.gauge("ws.merged_reports", lambda: self._dispatcher.merged_count)
+        self._metrics.gauge("ws.dropped_reports", lambda: self._dispatcher.dropped_count)
+        self._metrics.gauge("command.journal_collapsed", lambda: self._journal.collapsed_count)
+        self._metrics.gauge("command.journal_expired", lambda: self._journal.expired_count)
+        self._metrics.gauge("command.journal_dropped", lambda: self._journal.dropped_count)
+        self._metrics.gauge("command.pending", lambda: self._scheduler.pending)
    
     @property
     def auto_reconnect(self) -> bool:
@@ -47,35 +91,83 @@ class CommandTransport:
         _LOGGER.debug("CommandTransport::Setting auto_reconnect to %s", value)
         self._auto_reconnect = value
 
+    @property
+    def metrics(self) -> MetricsRegistry:
+        """Return the metrics registry the transport records into."""
+        return self._metrics
+
+    @property
+    def dispatcher(self) -> MessageDispatcher:
+        """Return the inbound message dispatcher (queue limits and counters)."""
+        return self._dispatcher
+
+    @property
+    def journal(self) -> CommandJournal:
+        """Return the journal holding commands issued while disconnected."""
+        return self._journal
+
+    @property
+    def scheduler(self) -> OutboundScheduler:
+        """Return the outbound frame scheduler (lanes, rate limits and counters)."""
+        return self._scheduler
+
+    @property
+    def recorder(self) -> TrafficRecorder:
+        """Return the recorder tapping raw traffic, if recording."""
+        return self._recorder
+
+    @recorder.setter
+    def recorder(self, value: TrafficRecorder) -> None:
+        """Start (or with None, stop) tapping raw inbound and outbound frames."""
+        self._recorder = value
+
+    @property
+    def is_connected(self) -> bool:
+        """Returns True if the WebSocket is currently open."""
+        return self._connected
+
+    @property
+    def disconnected_for(self) -> float:
+        """Seconds the WebSocket has been down while the transport is supposed to be running.
+        0 when it's open, or when the transport isn't running."""
+        disconnected_since = self._disconnected_since
+        if disconnected_since is None:
+            return 0.0
+        return time.monotonic() - disconnected_since
+
+    @property
+    def skipped_frame_count(self) -> int:
+        """Number of frames rejected from their envelope without a full decode."""
+        return self._skipped_frame_count
 
     def start_transport(self,
                         api_server_region: str,
-                        token: str) -> None:
-        """Initialize the websocket and start monitoring"""
+                        token: str,
+                        ws_base_url: str = None) -> None:
+        """Initialize the websocket and start monitoring.  ws_base_url overrides the regional
+        Dreo server (e.g. to point at a local test server)."""
         
-        if self._event_thread is not None and self._event_thread.is_alive():
+        if self._hub.is_running(self):
             _LOGGER.warning("Transport already started")
             return
 
         self._api_server_region = api_server_region
         self._token = token
+        self._ws_base_url = ws_base_url
         self._transport_enabled = True
         self._signal_close = False
+        self._disconnected_since = time.monotonic()
 
-        def start_ws_wrapper():
-            asyncio.run(self._start_websocket())
-
-        self._event_thread = threading.Thread(
-            name="DreoWebSocketStream", target=start_ws_wrapper, args=()
-        )
-        self._event_thread.daemon = True
-        self._event_thread.start()
+        # The WebSocket runs on the hub's shared event loop thread rather than a thread per account.
+        self._hub.start(self, self._start_websocket())
 
     def stop_transport(self) -> None:
         '''Close down the monitoring socket'''
         _LOGGER.info("Stopping Transport - May take up to 15s")
         self._signal_close = True
         self._transport_enabled = False
+        self._disconnected_since = None
+        self._dispatcher.stop()
 
     def testonly_interrupt_transport(self) -> None:
         '''Close down the monitoring socket'''
@@ -86,8 +178,12 @@ class CommandTransport:
         """Start the websocket connection to monitor for device changes and send commands.
         This function exits when monitoring is stopped."""
         _LOGGER.info("Starting WebSocket for incoming changes and commands.")
+        self._loop = asyncio.get_running_loop()
+        self._scheduler.reset()
+        connected_before = False
         # open websocket
-        url = f"wss://wsb-{self._api_server_region}.dreo-tech.com/websocket?accessToken={self._token}&timestamp={Helpers.api_timestamp()}"
+        base_url = self._ws_base_url or DREO_WS_URL_FORMAT.format(self._api_server_region)
+        url = f"{base_url}/websocket?accessToken={self._token}&timestamp={Helpers.api_timestamp()}"
         async for ws in websockets.connect(url):
             
             if self._signal_close:
@@ -96,10 +192,24 @@ class CommandTransport:
             
             try:
                 self._ws = ws
+                self._connected = True
+                self._disconnected_since = None
+                self._metrics.counter(METRIC_WS_CONNECTS).inc()
+                if connected_before:
+                    self._metrics.counter(METRIC_WS_RECONNECTS).inc()
+                connected_before = True
                 _LOGGER.info("WebSocket successfully opened")
+                self._submit_journal()
                 await self._ws_handler(ws)
             except websockets.exceptions.ConnectionClosed:
                 pass
+            finally:
+                self._connected = False
+                if self._transport_enabled:
+                    self._disconnected_since = time.monotonic()
+                # Anything the sender didn't get to waits for the next connection.
+                for unsent in self._scheduler.drain():
+                    self._requeue(unsent)
 
             if not self._auto_reconnect:
                 _LOGGER.error("WebSocket appears closed.  Not Reconnecting.  Restart HA to reconnect.")
@@ -112,8 +222,9 @@ class CommandTransport:
     async def _ws_handler(self, ws):
         consumer_task = asyncio.create_task(self._ws_consumer_handler(ws))
         ping_task = asyncio.create_task(self._ws_ping_handler(ws))
+        sender_task = asyncio.create_task(self._scheduler.run(ws, self._requeue, self._on_frame_sent))
         done, pending = await asyncio.wait(
-            [consumer_task, ping_task],
+            [consumer_task, ping_task, sender_task],
             return_when=asyncio.FIRST_COMPLETED
         )
         _LOGGER.debug("CommandTransport::_ws_handler - WebSocket appears closed.")
@@ -129,9 +240,9 @@ class CommandTransport:
     async def _ws_consumer_handler(self, ws):
         _LOGGER.debug("CommandTransport::_ws_consumer_handler")
         try:
-            async for message in ws:
+            async for frame in ws:
                 _LOGGER.debug("CommandTransport::_ws_consumer_handler - got message")
-                self._ws_consume_message(json.loads(message))
+                self._ws_consume_frame(frame)
         except websockets.exceptions.ConnectionClosedError:
             _LOGGER.debug("CommandTransport::_ws_consumer_handler - WebSocket appears closed.")
         
@@ -151,8 +262,7 @@ class CommandTransport:
                         await ws.close()
                     except CancelledError:
                         pass
-                with self._ws_send_lock:
-                    await ws.send('2')
+                self._scheduler.submit(CommandLane.KEEPALIVE, '2')
                 await asyncio.sleep(15)
                
             except websockets.exceptions.ConnectionClosedError:
@@ -162,30 +272,90 @@ class CommandTransport:
                 _LOGGER.info('Dreo WebSocket Cancelled - Unless intended, will reconnect')
                 break
 
+    def _ws_consume_frame(self, frame):
+        """Decode a raw frame, skipping the full decode if the envelope says nobody wants it."""
+        self._frames_in.inc()
+        self._bytes_in.inc(len(frame))
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record(RECORD_INBOUND, frame)
+
+        if self._recv_filter is not None:
+            device_sn, method = parse_envelope(frame)
+            if device_sn is not None and not self._recv_filter(device_sn, method):
+                self._skipped_frame_count += 1
+                return
+
+        try:
+            with self._decode_time.time():
+                message = loads(frame)
+        except ValueError:
+            _LOGGER.debug("CommandTransport::_ws_consume_frame - unable to decode frame: %s", frame)
+            return
+
+        if isinstance(message, dict):
+            self._ws_consume_message(message)
+
+    def _requeue(self, content: dict) -> None:
+        """Journal a command that was queued but never sent, for the next connection."""
+        self._metrics.counter(METRIC_COMMANDS_REQUEUED).inc()
+        self._journal.add(content)
+
+    def _on_frame_sent(self, frame: str) -> None:
+        self._frames_out.inc()
+        self._bytes_out.inc(len(frame))
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record(RECORD_OUTBOUND, frame)
+
     def _ws_consume_message(self, message):
-        self._recv_callback(message)
+        # Hand off to the per-device queues; never run the consumers inline in the read loop.
+        self._dispatcher.dispatch(message)
+
+    def _submit_journal(self) -> None:
+        """Move everything journaled while disconnected onto the outbound queue, in order.
+        Runs on the transport's event loop."""
+        messages = self._journal.drain()
+        if messages:
+            _LOGGER.info("CommandTransport: flushing %d journaled commands", len(messages))
+        for message in messages:
+            self._scheduler.submit_command(message)
+
+    def _submit_command(self, content: dict) -> None:
+        """Queue a control message for sending.  Runs on the transport's event loop."""
+        if not self._connected:
+            self._journal.add(content)
+        elif len(self._journal) > 0:
+            # Older commands are still waiting; keep ordering by queuing behind them.
+            self._journal.add(content)
+            self._submit_journal()
+        else:
+            self._scheduler.submit_command(content)
 
     def send_message(self, content: dict):
-        """Send a command to Dreo servers via the WebSocket."""
+        """Send a command to Dreo servers via the WebSocket.
+
+        This never blocks the caller.  The command is queued on the outbound scheduler
+        (safety-critical commands first, cosmetic ones last).  If the WebSocket is down, or
+        the send fails, the command is journaled and sent as soon as a new socket is established."""
         if not self._transport_enabled:
             _LOGGER.error("Command transport disabled. Run start_transport first.")
             raise RuntimeError("Command transport disabled. Run start_transport first.")
-        
-        async def send_internal() -> None:
-            MAX_RETRY_COUNT = 3
-            RETRY_DELAY = 5
-            retry_count = 0
-            while retry_count < MAX_RETRY_COUNT:
-                try:
-                    with self._ws_send_lock: 
-                        await self._ws.send(content)
-                    break
-                except: # pylint: disable=bare-except
-                    retry_count += 1
-                    _LOGGER.error("Error sending command. Retrying in %s seconds. Retry count: %s", 
-                                  RETRY_DELAY, 
-                                  retry_count)
-                    await asyncio.sleep(RETRY_DELAY)
-
-        asyncio.run(send_internal())
-        
+
+        if not self._connected:
+            _LOGGER.info("WebSocket not connected; journaling command for %s", content.get("devicesn"))
+            self._journal.add(content)
+            if not self._connected:
+                return
+            # Connected while we were journaling; make sure the journal gets flushed.
+            content = None
+
+        try:
+            if content is None:
+                self._loop.call_soon_threadsafe(self._submit_journal)
+            else:
+                self._loop.call_soon_threadsafe(self._submit_command, content)
+        except RuntimeError:
+            # The event loop is shutting down underneath us.
+            if content is not None:
+                self._journal.add(content)
@@ -67,6 +67,9 @@ FANON_KEY = "fanon"
 DREO_API_URL_FORMAT = (
     "https://app-api-{0}.dreo-tech.com"  # {0} is the 2 letter region code
 )
+DREO_WS_URL_FORMAT = (
+    "wss://wsb-{0}.dreo-tech.com"  # {0} is the 2 letter region code
+)
 
 DREO_API_PATH = "path"
 DREO_API_METHOD = "method"
@@ -107,6 +110,9 @@ class DreoDeviceSetting(StrEnum):
     """Dreo device settings"""
     FAN_TEMP_OFFSET = "kHafFanTempOffsetKey"
 
+# Seconds to wait for the device to report an optimistically applied value before rolling back.
+OPTIMISTIC_ROLLBACK_TIMEOUT = 5
+
 DREO_AUTH_REGION_NA = "NA"
 DREO_AUTH_REGION_EU = "EU"
 
@@ -0,0 +1,148 @@
+"""Stream of device state changes for library consumers."""
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import StrEnum
+
+EVENT_QUEUE_SIZE = 256
+
+
+class DreoEventSource(StrEnum):
+    """Where a state change came from."""
+    REST = "rest"
+    REPORT = "report"
+    OPTIMISTIC = "optimistic"
+    ROLLBACK = "rollback"
+
+
+@dataclass(frozen=True)
+class DreoStateEvent:
+    """A change to one or more raw state keys of a device."""
+    serial_number: str
+    source: DreoEventSource
+    # Raw key name -> (old value, new value).  The old value is None the first time a key is seen.
+    changes: dict[str, tuple[any, any]]
+    # time.monotonic() when the change was processed.
+    timestamp: float
+
+    @property
+    def changed_keys(self) -> frozenset[str]:
+        """The raw key names that changed."""
+        return frozenset(self.changes)
+
+
+@dataclass(frozen=True)
+class DreoEventFilter:
+    """Restricts a subscription to some devices, keys and sources.  None means no restriction."""
+    serial_numbers: frozenset[str] | None = None
+    keys: frozenset[str] | None = None
+    sources: frozenset[DreoEventSource] | None = None
+
+    @classmethod
+    def create(cls,
+               serial_numbers: Iterable[str] = None,
+               keys: Iterable[str] = None,
+               sources: Iterable[DreoEventSource] = None) -> "DreoEventFilter":
+        """Build a filter from any iterables."""
+        return cls(frozenset(serial_numbers) if serial_numbers is not None else None,
+                   frozenset(keys) if keys is not None else None,
+                   frozenset(sources) if sources is not None else None)
+
+    def apply(self, event: DreoStateEvent) -> DreoStateEvent | None:
+        """Return the event narrowed to the filtered keys, or None if nothing of it passes."""
+        if self.serial_numbers is not None and event.serial_number not in self.serial_numbers:
+            return None
+        if self.sources is not None and event.source not in self.sources:
+            return None
+        if self.keys is None:
+            return event
+        changes = {key: change for key, change in event.changes.items() if key in self.keys}
+        if not changes:
+            return None
+        if len(changes) == len(event.changes):
+            return event
+        return DreoStateEvent(event.serial_number, event.source, changes, event.timestamp)
+
+
+class DreoEventSubscription:
+    """One consumer's bounded queue of events, read with `async for`.
+
+    Events are delivered onto the subscriber's event loop.  If the consumer falls behind
+    and the queue is full, the oldest event is dropped."""
+
+    def __init__(self,
+                 bus: "DreoEventBus",
+                 loop: asyncio.AbstractEventLoop,
+                 event_filter: DreoEventFilter,
+                 max_queue: int = EVENT_QUEUE_SIZE):
+        self.bus = bus
+        self.loop = loop
+        self.event_filter = event_filter
+        self.dropped_count = 0
+        self._queue : asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+
+    def offer(self, event: DreoStateEvent) -> None:
+        """Queue an event from any thread."""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: DreoStateEvent) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped_count += 1
+        self._queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Stop receiving events."""
+        self.bus.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> DreoStateEvent:
+        return await self._queue.get()
+
+
+class DreoEventBus:
+    """Fans state change events out to subscribers, filtering before they're queued."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions : list[DreoEventSubscription] = []
+
+    @property
+    def has_subscribers(self) -> bool:
+        """Returns True if anyone is listening."""
+        return bool(self._subscriptions)
+
+    def subscribe(self,
+                  event_filter: DreoEventFilter = None,
+                  max_queue: int = EVENT_QUEUE_SIZE) -> DreoEventSubscription:
+        """Subscribe from within the event loop that will consume the events."""
+        subscription = DreoEventSubscription(self,
+                                             asyncio.get_running_loop(),
+                                             event_filter or DreoEventFilter(),
+                                             max_queue)
+        with self._lock:
+            self._subscriptions = [*self._subscriptions, subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: DreoEventSubscription) -> None:
+        """Remove a subscription; unknown subscriptions are ignored."""
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def publish(self, serial_number: str, source: DreoEventSource, changes: dict[str, tuple[any, any]]) -> None:
+        """Deliver a change to every subscriber whose filter it passes.  Safe from any thread."""
+        subscriptions = self._subscriptions
+        if not subscriptions or not changes:
+            return
+        event = DreoStateEvent(serial_number, source, changes, time.monotonic())
+        for subscription in subscriptions:
+            filtered = subscription.event_filter.apply(event)
+            if filtered is not None:
+                subscription.offer(filtered)
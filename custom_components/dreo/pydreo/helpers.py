@@ -4,16 +4,23 @@ import hashlib
 import logging
 import time
 import json
+from collections.abc import Callable
 from typing import Optional, Union
+from urllib.parse import urlparse
 import re
 import requests
 
 from .constant import LOGGER_NAME
+from .retrypolicy import (
+    RetryPolicy,
+    DEFAULT_RETRY_POLICY,
+    CircuitBreaker,
+    CircuitOpenError,
+    parse_retry_after
+)
 
 _LOGGER = logging.getLogger(LOGGER_NAME)
 
-API_TIMEOUT = 30
-
 NUMERIC = Optional[Union[int, float, str]]
 
 
@@ -112,56 +119,126 @@ class Helpers:
         method: str,
         json_object: Optional[dict] = None,
         headers: Optional[dict] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        on_retry: Optional[Callable[[str], None]] = None,
     ) -> tuple:
-        """Make API calls by passing endpoint, header and body."""
-        response = None
-        status_code = None
-        r = None # Response object
-        try:
-            _LOGGER.debug("=======call_api=============================")
-            _LOGGER.debug("[%s] calling '%s' api", method, api)
-            _LOGGER.debug("API call URL: \n  %s%s", url, api)
-            _LOGGER.debug(
-                "API call headers: \n  %s", Helpers.redactor(
-                    json.dumps(headers))
+        """Make API calls by passing endpoint, header and body.
+
+        Retries according to retry_policy (calling on_retry with the reason before each
+        retry) and fails fast while the host's circuit breaker is open."""
+        policy = retry_policy or DEFAULT_RETRY_POLICY
+        breaker = CircuitBreaker.for_host(urlparse(url).netloc)
+        idempotent = method.lower() == "get"
+
+        _LOGGER.debug("=======call_api=============================")
+        _LOGGER.debug("[%s] calling '%s' api", method, api)
+        _LOGGER.debug("API call URL: \n  %s%s", url, api)
+        _LOGGER.debug(
+            "API call headers: \n  %s", Helpers.redactor(
+                json.dumps(headers))
+        )
+        _LOGGER.debug(
+            "API call json: \n  %s", Helpers.redactor(
+                json.dumps(json_object))
+        )
+
+        attempt = 0
+        total_backoff = 0.0
+        while True:
+            attempt += 1
+            try:
+                breaker.before_call()
+            except CircuitOpenError as exception:
+                _LOGGER.debug("%s; not calling %s", exception, api)
+                return None, None
+
+            retry_reason = None
+            wait = None
+            try:
+                r = Helpers._send_request(url, api, method, json_object, headers, policy.timeout)
+            except requests.exceptions.ConnectTimeout as exception:
+                # The request was never sent, so even non-idempotent calls can be retried.
+                _LOGGER.debug(exception)
+                breaker.record_failure()
+                retry_reason = "connect timeout"
+            except requests.exceptions.RequestException as exception:
+                _LOGGER.debug(exception)
+                breaker.record_failure()
+                if idempotent and isinstance(exception, (requests.exceptions.ConnectionError,
+                                                         requests.exceptions.Timeout)):
+                    retry_reason = type(exception).__name__
+            except Exception:
+                # Anything else still ends a half open trial, so the circuit can't get stuck.
+                breaker.record_failure()
+                raise
+            else:
+                if r.status_code == 200:
+                    breaker.record_success()
+                    response = None
+                    if r.content:
+                        response = r.json()
+                        _LOGGER.debug(
+                            "API response: \n\n  %s \n ",
+                            Helpers.redactor(json.dumps(response)),
+                        )
+                    return response, 200
+
+                _LOGGER.debug("Unable to fetch %s%s (HTTP %s)", url, api, r.status_code)
+                if r.status_code == 429:
+                    # A throttled account counts against the circuit, so it stops hammering the API.
+                    breaker.record_failure()
+                    retry_reason = "HTTP 429"
+                    wait = parse_retry_after(r.headers.get("Retry-After"))
+                    if wait is not None and wait > policy.max_retry_after:
+                        _LOGGER.warning("Dreo API asked us to wait %.0fs before calling %s again; giving up",
+                                        wait, api)
+                        return None, None
+                elif r.status_code >= 500:
+                    breaker.record_failure()
+                    if idempotent:
+                        retry_reason = f"HTTP {r.status_code}"
+                else:
+                    breaker.record_success()
+
+            if retry_reason is None or attempt >= policy.max_attempts:
+                return None, None
+
+            if wait is None:
+                wait = policy.backoff(attempt)
+            if total_backoff + wait > policy.max_total_backoff:
+                _LOGGER.debug("Not retrying %s after %s: waiting %.2fs more would exceed %.0fs of backoff",
+                              api, retry_reason, wait, policy.max_total_backoff)
+                return None, None
+            total_backoff += wait
+            _LOGGER.debug("Retrying %s in %.2fs after %s (attempt %d of %d)",
+                          api, wait, retry_reason, attempt + 1, policy.max_attempts)
+            if on_retry is not None:
+                on_retry(retry_reason)
+            time.sleep(wait)
+
+    @staticmethod
+    def _send_request(url: str, api: str, method: str, json_object: Optional[dict],
+                      headers: Optional[dict], timeout) -> requests.Response:
+        if method.lower() == "get":
+            return requests.get(
+                url + api,
+                headers=headers,
+                params={**json_object, "timestamp": Helpers.api_timestamp()},
+                timeout=timeout,
             )
-            _LOGGER.debug(
-                "API call json: \n  %s", Helpers.redactor(
-                    json.dumps(json_object))
+        if method.lower() == "post":
+            return requests.post(
+                url + api,
+                json=json_object,
+                headers=headers,
+                params={"timestamp": Helpers.api_timestamp()},
+                timeout=timeout,
             )
-            if method.lower() == "get":
-                r = requests.get(
-                    url + api,
-                    headers=headers,
-                    params={**json_object, "timestamp": Helpers.api_timestamp()},
-                    timeout=API_TIMEOUT,
-                )
-            elif method.lower() == "post":
-                r = requests.post(
-                    url + api,
-                    json=json_object,
-                    headers=headers,
-                    params={"timestamp": Helpers.api_timestamp()},
-                    timeout=API_TIMEOUT,
-                )
-            elif method.lower() == "put":
-                r = requests.put(
-                    url + api, json=json_object, headers=headers, timeout=API_TIMEOUT
-                )
-        except requests.exceptions.RequestException as exception:
-            _LOGGER.debug(exception)
-        else:
-            if r.status_code == 200:
-                status_code = 200
-                if r.content:
-                    response = r.json()
-                    _LOGGER.debug(
-                        "API response: \n\n  %s \n ",
-                        Helpers.redactor(json.dumps(response)),
-                    )
-            else:
-                _LOGGER.debug("Unable to fetch %s%s", url, api)
-        return response, status_code
+        if method.lower() == "put":
+            return requests.put(
+                url + api, json=json_object, headers=headers, timeout=timeout
+            )
+        raise ValueError(f"Unsupported method {method}")
 
     @staticmethod
     def     code_check(reponse_dict: dict) -> bool:
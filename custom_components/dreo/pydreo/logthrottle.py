@@ -0,0 +1,92 @@
+"""Rate limiting for log messages that repeat on every state load or update."""
+
+import logging
+import threading
+import time
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# After a message is logged, identical messages (same device and template) are suppressed for
+# LOG_THROTTLE_INITIAL_WINDOW seconds.  Each time the message recurs after a window the window
+# doubles, up to LOG_THROTTLE_MAX_WINDOW.
+LOG_THROTTLE_INITIAL_WINDOW = 60.0
+LOG_THROTTLE_MAX_WINDOW = 3600.0
+
+
+class _ThrottleState:
+    """Tracking for one (key, template) pair."""
+
+    __slots__ = ("window", "suppress_until", "suppressed", "total", "last_logged")
+
+    def __init__(self):
+        self.window = 0.0
+        self.suppress_until = 0.0
+        self.suppressed = 0
+        self.total = 0
+        self.last_logged = 0.0
+
+
+class LogThrottle:
+    """Deduplicates log messages by (key, message template).
+
+    The first occurrence is logged as normal.  Repeats within the suppression window are only
+    counted; the window doubles each time the message is logged again, so a message that
+    recurs forever ends up logged about once an hour.  When a message is logged after being
+    suppressed, the number of suppressed repeats is appended.  Arguments are only formatted
+    when a message is actually logged."""
+
+    def __init__(self,
+                 logger: logging.Logger = _LOGGER,
+                 initial_window: float = LOG_THROTTLE_INITIAL_WINDOW,
+                 max_window: float = LOG_THROTTLE_MAX_WINDOW):
+        self._logger = logger
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self._lock = threading.Lock()
+        self._states : dict[tuple[str, str], _ThrottleState] = {}
+
+    def log(self, key: str, level: int, msg: str, *args) -> bool:
+        """Log msg % args at level, unless it was logged for key recently.  Returns True if logged."""
+        if not self._logger.isEnabledFor(level):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get((key, msg))
+            if state is None:
+                state = self._states[(key, msg)] = _ThrottleState()
+            state.total += 1
+            if now < state.suppress_until:
+                state.suppressed += 1
+                return False
+            suppressed = state.suppressed
+            elapsed = now - state.last_logged
+            state.suppressed = 0
+            state.window = min(self.max_window, state.window * 2 if state.window else self.initial_window)
+            state.suppress_until = now + state.window
+            state.last_logged = now
+            window = state.window
+
+        if suppressed:
+            self._logger.log(level, msg + " (repeated %d more times in the last %.0fs; next report in %.0fs)",
+                             *args, suppressed, elapsed, window)
+        else:
+            self._logger.log(level, msg, *args)
+        return True
+
+    def reset(self, key: str = None) -> None:
+        """Forget the history for key (or for everything), so the next message logs immediately."""
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                for state_key in [k for k in self._states if k[0] == key]:
+                    del self._states[state_key]
+
+    def summary(self) -> list[dict]:
+        """Counts per (key, template), most frequent first, suitable for diagnostics."""
+        with self._lock:
+            items = [(key, msg, state.total, state.suppressed) for (key, msg), state in self._states.items()]
+        return [{"key": key, "message": msg, "count": total, "suppressed_since_last_log": suppressed}
+                for key, msg, total, suppressed in sorted(items, key=lambda item: -item[2])]
@@ -0,0 +1,157 @@
+"""Per-device ordered dispatch of inbound WebSocket messages."""
+
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from .constant import LOGGER_NAME, REPORTED_KEY
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+DISPATCH_MAX_WORKERS = 4
+DISPATCH_MAX_PENDING_PER_DEVICE = 32
+
+
+class MessageDispatcher:
+    """Routes inbound messages into per-device queues drained by a bounded worker pool.
+
+    Messages for the same device are always processed in the order they were received,
+    while messages for different devices can be processed in parallel.  dispatch() never
+    blocks on the consumer, so the WebSocket read loop (and the ping task sharing its
+    event loop) keeps running even if a callback is slow.
+
+    Each device queue is bounded.  A report that arrives while the previous report for the
+    same device is still waiting is merged into it (last value per key wins), so a burst
+    turns into one update instead of N stale ones.  If a queue is still full, the oldest
+    message is dropped.
+    """
+
+    def __init__(self,
+                 consumer: Callable[[dict], None],
+                 max_workers: int = DISPATCH_MAX_WORKERS,
+                 max_pending_per_device: int = DISPATCH_MAX_PENDING_PER_DEVICE,
+                 merge_reports: bool = True,
+                 executor: ThreadPoolExecutor = None):
+        self._consumer = consumer
+        self._max_workers = max_workers
+        # A shared executor (from the TransportHub) is used but never shut down by us.
+        self._shared_executor = executor
+        self._max_pending_per_device = max_pending_per_device
+        self._merge_reports = merge_reports
+        self._merged_count = 0
+        self._dropped_count = 0
+        self._executor : ThreadPoolExecutor = None
+        self._queues : dict[str, deque] = {}
+        self._active : set[str] = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def dispatch(self, message: dict) -> None:
+        """Queue a message for its device and make sure a worker is draining that queue."""
+        device_sn = message.get("devicesn") if isinstance(message, dict) else None
+
+        with self._lock:
+            queue = self._queues.get(device_sn)
+            if queue is None:
+                queue = deque()
+                self._queues[device_sn] = queue
+
+            if self._merge_reports and queue and self._try_merge(queue[-1], message):
+                self._merged_count += 1
+            else:
+                if len(queue) >= self._max_pending_per_device:
+                    queue.popleft()
+                    self._dropped_count += 1
+                    _LOGGER.debug("MessageDispatcher: queue for %s full, dropped oldest message", device_sn)
+                queue.append(message)
+
+            if device_sn in self._active:
+                return
+            self._active.add(device_sn)
+
+            if self._executor is None:
+                self._executor = self._shared_executor or ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix="DreoDispatch")
+            executor = self._executor
+
+        executor.submit(self._drain, device_sn)
+
+    @staticmethod
+    def _try_merge(pending: dict, message: dict) -> bool:
+        """Merge a report into a still-queued report for the same device, if both are reports."""
+        pending_reported = pending.get(REPORTED_KEY)
+        reported = message.get(REPORTED_KEY)
+        if not isinstance(pending_reported, dict) or not isinstance(reported, dict):
+            return False
+        if pending.get("method") != message.get("method"):
+            return False
+
+        pending_reported.update(reported)
+        for key, value in message.items():
+            if key != REPORTED_KEY:
+                pending[key] = value
+        return True
+
+    def _drain(self, device_sn: str) -> None:
+        """Process all queued messages for one device, in order."""
+        while True:
+            with self._lock:
+                queue = self._queues.get(device_sn)
+                if not queue:
+                    self._queues.pop(device_sn, None)
+                    self._active.discard(device_sn)
+                    if not self._active:
+                        self._idle.notify_all()
+                    return
+                message = queue.popleft()
+
+            try:
+                self._consumer(message)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("MessageDispatcher: error processing message for %s", device_sn)
+
+    @property
+    def max_pending_per_device(self) -> int:
+        """Maximum number of messages queued per device before the oldest is dropped."""
+        return self._max_pending_per_device
+
+    @max_pending_per_device.setter
+    def max_pending_per_device(self, value: int) -> None:
+        if value < 1:
+            raise ValueError("max_pending_per_device must be at least 1")
+        self._max_pending_per_device = value
+
+    @property
+    def merge_reports(self) -> bool:
+        """Whether queued reports for the same device are merged."""
+        return self._merge_reports
+
+    @merge_reports.setter
+    def merge_reports(self, value: bool) -> None:
+        self._merge_reports = value
+
+    @property
+    def merged_count(self) -> int:
+        """Number of reports merged into an already queued report."""
+        return self._merged_count
+
+    @property
+    def dropped_count(self) -> int:
+        """Number of messages dropped because a device queue was full."""
+        return self._dropped_count
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until every queued message has been processed.  Returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._active, timeout)
+
+    def stop(self) -> None:
+        """Drop anything still queued and release the worker threads."""
+        with self._lock:
+            self._queues.clear()
+            executor = self._executor
+            self._executor = None
+        if executor is not None and executor is not self._shared_executor:
+            executor.shutdown(wait=False)
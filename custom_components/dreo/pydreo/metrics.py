@@ -0,0 +1,179 @@
+"""Lightweight runtime metrics: counters, histograms and gauges."""
+
+import bisect
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is unbounded.
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Weight of each new observation in a histogram's recent mean, which therefore reflects
+# roughly the last 1 / RECENT_MEAN_WEIGHT observations.
+RECENT_MEAN_WEIGHT = 0.1
+
+# Metric names used by the library.
+METRIC_WS_FRAMES_IN = "ws.frames_in"
+METRIC_WS_FRAMES_OUT = "ws.frames_out"
+METRIC_WS_BYTES_IN = "ws.bytes_in"
+METRIC_WS_BYTES_OUT = "ws.bytes_out"
+METRIC_WS_CONNECTS = "ws.connects"
+METRIC_WS_RECONNECTS = "ws.reconnects"
+METRIC_WS_DECODE_TIME = "ws.decode_time"
+METRIC_DEVICE_PARSE_TIME = "device.parse_time"
+METRIC_DEVICE_CALLBACK_TIME = "device.callback_time"
+METRIC_REST_CALLS = "rest.calls"
+METRIC_REST_ERRORS = "rest.errors"
+METRIC_REST_LATENCY = "rest.latency"
+METRIC_REST_RETRIES = "rest.retries"
+METRIC_REST_RATE_LIMIT_WAIT = "rest.rate_limit_wait"
+METRIC_COMMANDS_SENT = "command.sent"
+METRIC_COMMANDS_REQUEUED = "command.requeued"
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        """Add to the count."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        """The current count."""
+        return self._value
+
+
+class Histogram:
+    """Distribution of observed values (typically durations in seconds) in fixed buckets,
+    plus an exponentially weighted mean of the recent observations."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self._lock = threading.Lock()
+        self._bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._min : float = None
+        self._max : float = None
+        self._recent_mean : float = None
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            self._min = value if self._min is None else min(self._min, value)
+            self._max = value if self._max is None else max(self._max, value)
+            if self._recent_mean is None:
+                self._recent_mean = value
+            else:
+                self._recent_mean += RECENT_MEAN_WEIGHT * (value - self._recent_mean)
+
+    @contextmanager
+    def time(self):
+        """Observe how long the enclosed block takes, using the monotonic clock."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return self._count
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of the observations, or None if there are none."""
+        with self._lock:
+            return self._sum / self._count if self._count else None
+
+    @property
+    def recent_mean(self) -> float | None:
+        """Exponentially weighted mean of the observations, or None if there are none."""
+        return self._recent_mean
+
+    def as_dict(self) -> dict:
+        """Summary suitable for diagnostics."""
+        with self._lock:
+            buckets = {f"le_{bound:g}": count for bound, count in zip(self._bounds, self._counts)}
+            buckets["le_inf"] = self._counts[-1]
+            return {
+                "count": self._count,
+                "sum": round(self._sum, 6),
+                "min": self._min,
+                "max": self._max,
+                "mean": round(self._sum / self._count, 6) if self._count else None,
+                "recent_mean": round(self._recent_mean, 6) if self._recent_mean is not None else None,
+                "buckets": buckets,
+            }
+
+
+class MetricsRegistry:
+    """Named counters, histograms and gauges.  Metrics are created on first use.
+
+    Gauges are callables read when a snapshot is taken; they fold counts kept elsewhere
+    (dispatcher, journal, ...) into the same view."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters : dict[str, Counter] = {}
+        self._histograms : dict[str, Histogram] = {}
+        self._gauges : dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str) -> Counter:
+        """The counter with the given name."""
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(name, Counter())
+        return counter
+
+    def histogram(self, name: str, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        """The histogram with the given name."""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(buckets))
+        return histogram
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register (or replace) a gauge."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def value(self, name: str):
+        """Current value of a counter or gauge (None if there's no such metric)."""
+        if name in self._counters:
+            return self._counters[name].value
+        read = self._gauges.get(name)
+        return read() if read is not None else None
+
+    def total(self, prefix: str) -> int:
+        """Sum of all counters named prefix or prefix.<something>."""
+        with self._lock:
+            counters = list(self._counters.items())
+        return sum(counter.value for name, counter in counters
+                   if name == prefix or name.startswith(prefix + "."))
+
+    def snapshot(self) -> dict:
+        """All metrics, suitable for diagnostics."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+            gauges = dict(self._gauges)
+        return {
+            "counters": {name: counter.value for name, counter in sorted(counters.items())},
+            "gauges": {name: read() for name, read in sorted(gauges.items())},
+            "histograms": {name: histogram.as_dict() for name, histogram in sorted(histograms.items())},
+        }
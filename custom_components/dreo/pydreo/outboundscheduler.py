@@ -0,0 +1,209 @@
+"""Priority scheduling of outbound WebSocket frames."""
+
+import asyncio
+import itertools
+import json
+import logging
+from collections import deque
+from enum import IntEnum
+
+from .constant import (
+    LOGGER_NAME,
+    POWERON_KEY,
+    FANON_KEY,
+    CHILDLOCKON_KEY,
+    LEDALWAYSON_KEY,
+    LIGHTSENSORON_KEY,
+    RGB_LEVEL,
+    VOICEON_KEY,
+    MUTEON_KEY
+)
+from .ratelimiter import TokenBucket
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class CommandLane(IntEnum):
+    """Outbound lanes, highest priority first."""
+    SAFETY = 0
+    CONTROL = 1
+    COSMETIC = 2
+    KEEPALIVE = 3
+
+
+# Keys that only change how the device looks or sounds.
+COSMETIC_KEYS = frozenset((LEDALWAYSON_KEY, LIGHTSENSORON_KEY, RGB_LEVEL, VOICEON_KEY, MUTEON_KEY))
+
+# (rate per second, burst) per lane.  None means the lane is not rate limited.
+DEFAULT_LANE_RATES : dict[CommandLane, tuple[float, float] | None] = {
+    CommandLane.SAFETY: None,
+    CommandLane.CONTROL: (10, 10),
+    CommandLane.COSMETIC: (2, 4),
+    CommandLane.KEEPALIVE: None,
+}
+
+
+def command_lane(params: dict) -> CommandLane:
+    """Pick the lane for a control command from its params."""
+    if params.get(POWERON_KEY) is False or params.get(FANON_KEY) is False or CHILDLOCKON_KEY in params:
+        return CommandLane.SAFETY
+    if params and all(key in COSMETIC_KEYS for key in params):
+        return CommandLane.COSMETIC
+    return CommandLane.CONTROL
+
+
+class OutboundScheduler:
+    """Orders outbound frames by lane and paces each lane with its own token bucket.
+
+    Frames for the same device go out in submission order whatever their lanes, so a later
+    command is never overtaken by an earlier one; lanes only decide the order between
+    devices.  A safety frame drops the device's queued frames it completely overrides (e.g.
+    a queued poweron True when poweron False arrives), so a shutoff isn't held up behind
+    them.  A frame is only taken off its lane once the lane's rate limit lets it out, so a
+    throttled lane never holds up the others (keep-alives in particular).  If a shared
+    bucket is given (the account's WebSocket bucket), every frame except keep-alives also
+    needs a token from it.  submit() must be called from the transport's event loop; run()
+    is the single sender task for a connected socket."""
+
+    def __init__(self,
+                 lane_rates: dict[CommandLane, tuple[float, float] | None] = None,
+                 shared_bucket: TokenBucket = None):
+        if lane_rates is None:
+            lane_rates = DEFAULT_LANE_RATES
+        self._buckets : dict[CommandLane, TokenBucket] = {
+            lane: TokenBucket(*rate) for lane, rate in lane_rates.items() if rate is not None
+        }
+        self._shared_bucket = shared_bucket
+        self._sequence = itertools.count()
+        self._lanes : dict[CommandLane, deque[tuple[int, dict | str]]] = {lane: deque() for lane in CommandLane}
+        self._wakeup : asyncio.Event = None
+        self._sent_by_lane : dict[CommandLane, int] = {lane: 0 for lane in CommandLane}
+        self.superseded_count = 0
+
+    def _ensure_wakeup(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def reset(self) -> None:
+        """Start with fresh, empty queues (call from the event loop that will use them)."""
+        for queue in self._lanes.values():
+            queue.clear()
+        self._wakeup = asyncio.Event()
+
+    def submit(self, lane: CommandLane, content: dict | str) -> None:
+        """Queue a frame (a control dict or a raw string) on a lane."""
+        if lane == CommandLane.SAFETY and isinstance(content, dict):
+            self._supersede(content)
+        self._lanes[lane].append((next(self._sequence), content))
+        self._ensure_wakeup().set()
+
+    def submit_command(self, content: dict) -> CommandLane:
+        """Queue a control message on the lane its params call for."""
+        lane = command_lane(content.get("params") or {})
+        self.submit(lane, content)
+        return lane
+
+    def _supersede(self, content: dict) -> None:
+        """Drop the device's queued control messages that only set keys content also sets."""
+        device_sn = content.get("devicesn")
+        keys = set(content.get("params") or {})
+        if not keys:
+            return
+        for queue in self._lanes.values():
+            kept = [(sequence, queued) for sequence, queued in queue
+                    if not (isinstance(queued, dict) and queued.get("devicesn") == device_sn
+                            and set(queued.get("params") or {}) <= keys)]
+            if len(kept) != len(queue):
+                self.superseded_count += len(queue) - len(kept)
+                _LOGGER.debug("OutboundScheduler: %d queued frames for %s superseded by %s",
+                              len(queue) - len(kept), device_sn, content.get("params"))
+                queue.clear()
+                queue.extend(kept)
+
+    def _next_frame(self) -> tuple[CommandLane | None, int, float | None]:
+        """The lane and index of the frame to send now.  If none can go yet, (None, 0, seconds
+        until one can), with None seconds if nothing is queued that could go."""
+        # The oldest queued frame per device; later frames for a device wait for it.
+        oldest : dict[str, int] = {}
+        for queue in self._lanes.values():
+            for sequence, content in queue:
+                if isinstance(content, dict):
+                    device_sn = content.get("devicesn")
+                    if sequence < oldest.get(device_sn, sequence + 1):
+                        oldest[device_sn] = sequence
+
+        soonest = None
+        for lane in CommandLane:
+            for index, (sequence, content) in enumerate(self._lanes[lane]):
+                if isinstance(content, dict) and oldest[content.get("devicesn")] != sequence:
+                    continue
+                wait = self.wait_time(lane)
+                if wait <= 0:
+                    return lane, index, 0.0
+                soonest = wait if soonest is None else min(soonest, wait)
+                break
+        return None, 0, soonest
+
+    async def run(self, ws, on_unsent, on_sent=None) -> None:
+        """Send queued frames until the socket closes.  A frame that fails to send is passed
+        to on_unsent before the exception propagates; each raw frame sent is passed to
+        on_sent, if given."""
+        wakeup = self._ensure_wakeup()
+        while True:
+            lane, index, wait = self._next_frame()
+            if lane is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            queue = self._lanes[lane]
+            _, content = queue[index]
+            del queue[index]
+            bucket = self._buckets.get(lane)
+            if bucket is not None:
+                bucket.reserve()
+            if self._shared_bucket is not None and lane != CommandLane.KEEPALIVE:
+                self._shared_bucket.reserve()
+
+            frame = content if isinstance(content, str) else json.dumps(content)
+            try:
+                await ws.send(frame)
+            except Exception:
+                if not isinstance(content, str):
+                    on_unsent(content)
+                raise
+            self._sent_by_lane[lane] += 1
+            if on_sent is not None:
+                on_sent(frame)
+            _LOGGER.debug("OutboundScheduler: sent %s frame", lane.name)
+
+    def drain(self) -> list[dict]:
+        """Remove and return queued control messages in submission order (keep-alives are
+        discarded)."""
+        queued = []
+        for queue in self._lanes.values():
+            queued.extend(entry for entry in queue if not isinstance(entry[1], str))
+            queue.clear()
+        return [content for _, content in sorted(queued, key=lambda entry: entry[0])]
+
+    def wait_time(self, lane: CommandLane) -> float:
+        """How long a new frame on the lane would wait for its rate limit."""
+        bucket = self._buckets.get(lane)
+        wait = bucket.wait_time if bucket is not None else 0.0
+        if self._shared_bucket is not None and lane != CommandLane.KEEPALIVE:
+            wait = max(wait, self._shared_bucket.wait_time)
+        return wait
+
+    @property
+    def pending(self) -> int:
+        """Number of frames waiting to be sent."""
+        return sum(len(queue) for queue in self._lanes.values())
+
+    @property
+    def sent_by_lane(self) -> dict[str, int]:
+        """Number of frames sent per lane."""
+        return {lane.name: count for lane, count in self._sent_by_lane.items()}
@@ -1,11 +1,16 @@
 """Base class for all Dreo devices."""
+import asyncio
 import threading
 import logging
+import time
 from typing import Dict
 from typing import TYPE_CHECKING
 
 from .constant import LOGGER_NAME, REPORTED_KEY, POWERON_KEY, STATE_KEY, PRESET_MODE_STRINGS
 from .models import DreoDeviceDetails
+from .commandtracker import CommandTimeoutError, COMMAND_ACK_TIMEOUT
+from .events import DreoEventSource
+from .metrics import METRIC_DEVICE_PARSE_TIME, METRIC_DEVICE_CALLBACK_TIME
 
 if TYPE_CHECKING:
     from pydreo import PyDreo
@@ -53,6 +58,23 @@ class PyDreoBaseDevice(object):
         self.raw_state = None
         self._attr_cbs = []
         self._lock = threading.Lock()
+        # Serialises applying values to the device's attributes (reports, optimistic values and
+        # rollbacks), so a rollback can't land on top of a newer report.  Taken before _lock,
+        # never while holding it; handle_server_update overrides run under it but not _lock.
+        self._update_lock = threading.RLock()
+
+        # Last value confirmed by the device (REST state or WebSocket report), keyed by the
+        # raw key name.  Used to roll back optimistic updates.
+        self._confirmed_state : Dict[str, any] = {}
+        # Last value sent for a key that the device hasn't reported back yet, with the time it
+        # was sent, keyed by the raw key name.
+        self._outstanding_commands : Dict[str, tuple[any, float]] = {}
+        # Optimistically applied values waiting for a report, keyed by the raw key name.
+        self._optimistic_pending : Dict[str, tuple[any, threading.Timer]] = {}
+        # Last value published to the event stream, keyed by the raw key name.
+        self._published_state : Dict[str, any] = {}
+        # Settings the device uses that are loaded after start up rather than while constructing it.
+        self._deferred_settings : list[str] = []
 
     def __repr__(self):
         # Representation string of object.
@@ -102,6 +124,17 @@ class PyDreoBaseDevice(object):
         _LOGGER.debug("PyDreoBaseDevice:get_setting: %s -> %s", setting_name, setting_val)
         return setting_val
     
+    def defer_setting(self, setting_name: str) -> None:
+        """Mark a setting as used by this device, to be loaded by PyDreo.load_deferred_settings()
+        once start up is done.  Until then reads of it return their default."""
+        if setting_name not in self._deferred_settings:
+            self._deferred_settings.append(setting_name)
+
+    @property
+    def deferred_settings(self) -> list[str]:
+        """Settings this device loads after start up."""
+        return list(self._deferred_settings)
+
     def get_mode_string(self, mode_id: str) -> str:
         """Get the mode string from the device definition."""
         if (mode_id in PRESET_MODE_STRINGS):
@@ -117,20 +150,206 @@ class PyDreoBaseDevice(object):
 
         # This method exists so that we can run the polymorphic function to process updates, and then
         # run a _do_callbacks() command safely afterwards.
-        self.handle_server_update(message)
+        start = time.perf_counter()
+        reported = message.get(REPORTED_KEY) if isinstance(message, dict) else None
+        with self._update_lock:
+            if isinstance(reported, dict):
+                self._confirm_reported(reported)
+            self.handle_server_update(message)
+        if isinstance(reported, dict):
+            self._publish_state(DreoEventSource.REPORT, reported)
+        duration = time.perf_counter() - start
+        self._dreo.metrics.histogram(METRIC_DEVICE_PARSE_TIME).observe(duration)
+        self._dreo.slow_detector.check_parse(self, message, duration)
         self._do_callbacks()
 
+    def _confirm_reported(self, reported: dict):
+        """Record values reported by the device and settle any optimistic updates for them."""
+        with self._lock:
+            self._confirmed_state.update(reported)
+            for key in reported:
+                outstanding = self._outstanding_commands.get(key)
+                if outstanding is not None and outstanding[0] == reported[key]:
+                    del self._outstanding_commands[key]
+                pending = self._optimistic_pending.pop(key, None)
+                if pending is not None:
+                    pending[1].cancel()
+                    _LOGGER.debug("%s: optimistic %s=%s settled by report (%s)",
+                                  self, key, pending[0], reported[key])
+
+    def _publish_state(self, source: DreoEventSource, values: dict):
+        """Publish the keys in values whose value changed since they were last published."""
+        changes = {}
+        with self._lock:
+            for key, value in values.items():
+                if key not in self._published_state or self._published_state[key] != value:
+                    changes[key] = (self._published_state.get(key), value)
+                    self._published_state[key] = value
+        if changes:
+            self._dreo.event_bus.publish(self._sn, source, changes)
+
     def handle_server_update(self, message: dict):
         """Method to process WebSocket message"""
 
-    def _send_command(self, command_key: str, value):
-        """Send a command to the Dreo servers via WebSocket."""
+    def _send_command(self, command_key: str, value, force: bool = False):
+        """Send a command to the Dreo servers via WebSocket.
+
+        If redundant command suppression is on, the command is skipped when the device has
+        already confirmed the same value and no other command for the key is outstanding
+        (unless force is True)."""
         _LOGGER.debug(
             "pyDreoBaseDevice(%s):send_command: %s-> %s", self, command_key, value
         )
 
+        if not force and self._is_redundant_command(command_key, value):
+            _LOGGER.debug("pyDreoBaseDevice(%s):send_command: %s is already %s, not sending",
+                          self, command_key, value)
+            self._dreo.suppressed_command_count += 1
+            return
+
+        with self._lock:
+            self._outstanding_commands[command_key] = (value, time.monotonic())
         params: dict = {command_key: value}
-        self._dreo.send_command(self, params)
+        if self._dreo.optimistic_updates:
+            self._apply_optimistic(command_key, value)
+            try:
+                self._dreo.send_command(self, params)
+            except Exception:
+                self._rollback_optimistic(command_key, value)
+                raise
+        else:
+            self._dreo.send_command(self, params)
+
+    def _is_redundant_command(self, command_key: str, value) -> bool:
+        """Returns True if suppression is on, the device already confirmed this value and
+        nothing newer for the key is still outstanding."""
+        if not self._dreo.suppress_redundant_commands:
+            return False
+        with self._lock:
+            # A pending optimistic value means the device may be about to change; always send.
+            if command_key in self._optimistic_pending:
+                return False
+            # So does a command the device hasn't echoed yet (e.g. A, B, A in quick succession:
+            # the second A must still go out even though A is the confirmed value).  Commands
+            # whose echo never arrived stop counting after COMMAND_ACK_TIMEOUT.
+            outstanding = self._outstanding_commands.get(command_key)
+            if outstanding is not None:
+                if time.monotonic() - outstanding[1] < COMMAND_ACK_TIMEOUT:
+                    return False
+                del self._outstanding_commands[command_key]
+            return command_key in self._confirmed_state and self._confirmed_state[command_key] == value
+
+    def _apply_optimistic(self, command_key: str, value):
+        """Apply a commanded value locally before the device confirms it.
+
+        If no report for the key arrives within the PyDreo optimistic_timeout, the value is
+        rolled back to the last confirmed one."""
+        timer = threading.Timer(self._dreo.optimistic_timeout,
+                                self._rollback_optimistic,
+                                args=(command_key, value))
+        timer.daemon = True
+        with self._lock:
+            previous = self._optimistic_pending.get(command_key)
+            if previous is not None:
+                previous[1].cancel()
+            self._optimistic_pending[command_key] = (value, timer)
+
+        _LOGGER.debug("%s: optimistic %s=%s", self, command_key, value)
+        with self._update_lock:
+            self.handle_server_update({REPORTED_KEY: {command_key: value}})
+        self._publish_state(DreoEventSource.OPTIMISTIC, {command_key: value})
+        self._do_callbacks()
+        timer.start()
+
+    def _rollback_optimistic(self, command_key: str, value):
+        """Restore the last confirmed value if an optimistic update was never confirmed.
+
+        Reports and optimistic values are applied under _update_lock too, so a report for
+        the key is either already applied (and there is nothing to roll back) or applied after
+        the rollback."""
+        with self._update_lock:
+            with self._lock:
+                pending = self._optimistic_pending.get(command_key)
+                if pending is None or pending[0] != value:
+                    # Confirmed, or superseded by a newer optimistic value.
+                    return
+                del self._optimistic_pending[command_key]
+                pending[1].cancel()
+                has_confirmed = command_key in self._confirmed_state
+                confirmed = self._confirmed_state.get(command_key)
+            if has_confirmed:
+                self.handle_server_update({REPORTED_KEY: {command_key: confirmed}})
+
+        if not has_confirmed:
+            _LOGGER.warning("%s: %s=%s was not confirmed and there is no known value to roll back to",
+                            self, command_key, value)
+            return
+
+        _LOGGER.info("%s: %s=%s was not confirmed, rolled back to %s", self, command_key, value, confirmed)
+        self._publish_state(DreoEventSource.ROLLBACK, {command_key: confirmed})
+        self._do_callbacks()
+
+    def is_pending(self, command_key: str) -> bool:
+        """Returns True if an optimistic value for the key is waiting for confirmation."""
+        with self._lock:
+            return command_key in self._optimistic_pending
+
+    async def async_set(self,
+                        command_key: str,
+                        value,
+                        timeout: float = COMMAND_ACK_TIMEOUT,
+                        force: bool = False) -> None:
+        """Send a command and wait until the device reports the new value back.
+
+        Raises CommandTimeoutError if no matching report arrives within timeout seconds.
+        Returns immediately if the command is suppressed as redundant."""
+        if not force and self._is_redundant_command(command_key, value):
+            self._dreo.suppressed_command_count += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        confirmed = loop.create_future()
+
+        def resolve(latency: float):
+            if not confirmed.done():
+                confirmed.set_result(latency)
+
+        waiter = self._dreo.expect_command_ack(
+            self, {command_key: value}, lambda latency: loop.call_soon_threadsafe(resolve, latency)
+        )
+        try:
+            await loop.run_in_executor(None, self._send_command, command_key, value, True)
+            await asyncio.wait_for(confirmed, timeout)
+        except asyncio.TimeoutError as ex:
+            raise CommandTimeoutError(
+                f"{self} did not confirm {command_key}={value} within {timeout}s"
+            ) from ex
+        finally:
+            self._dreo.cancel_command_ack(waiter)
+
+    @property
+    def command_ack_latency(self) -> dict:
+        """Command-to-ack latency stats (seconds) for commands sent with async_set."""
+        return self._dreo.command_ack_latency(self)
+
+    def setting_changed(self, setting_key: str, value) -> None: # pylint: disable=unused-argument
+        """Called when the settings store learns a new value for one of this device's settings."""
+        self._do_callbacks()
+
+    def state_refreshed(self) -> None:
+        """Called when the device's state (or availability) was refreshed other than by a
+        WebSocket report, e.g. by polling while the WebSocket is down."""
+        self._do_callbacks()
+
+    @property
+    def is_active(self) -> bool:
+        """True if the device is running, so is worth polling more often."""
+        return bool(self._is_on)
+
+    @property
+    def available(self) -> bool:
+        """False if the WebSocket is down and the device's state couldn't be polled."""
+        return self._dreo.is_device_available(self)
 
     def _set_setting(self, setting_key: str, value):
         """Set a setting on the device."""
@@ -155,6 +374,10 @@ class PyDreoBaseDevice(object):
         _LOGGER.debug("State value (%s) not present.  Device: %s", key, self.name)
         return None
     
+    def _log_throttled(self, level: int, msg: str, *args) -> None:
+        """Log a message that may recur on every update, at most occasionally for this device."""
+        self._dreo.log_throttle.log(self.serial_number, level, msg, *args)
+
     def get_state_update_value_mapped(self, state: dict, key: str, mapping: dict):
         """Get a value from the state update in a safe manner, and map it to something."""
         raw_value = self.get_state_update_value(state, key)
@@ -163,7 +386,8 @@ class PyDreoBaseDevice(object):
             if raw_value in mapping:
                 return mapping[raw_value]
             else:
-                _LOGGER.error("Value (%s) not in mapping for key %s.  Device: %s", raw_value, key, self.name)
+                self._log_throttled(logging.ERROR, "Value (%s) not in mapping for key %s.  Device: %s",
+                                    raw_value, key, self.name)
         else:
             _LOGGER.debug("State value (%s) not present.  Device: %s", key, self.name)
 
@@ -173,6 +397,15 @@ class PyDreoBaseDevice(object):
         """Process the state dictionary from the REST API."""
         _LOGGER.debug("pyDreoBaseDevice:update_state: %s", state)
 
+        values = {
+            key: key_val_object[STATE_KEY]
+            for key, key_val_object in state.items()
+            if isinstance(key_val_object, dict) and STATE_KEY in key_val_object
+        }
+        with self._lock:
+            self._confirmed_state.update(values)
+        self._publish_state(DreoEventSource.REST, values)
+
         # TODO: Inconsistent placement of POWERON between BaseDevice and Fan for State/WebSocket
         self._is_on = self.get_state_update_value(state, POWERON_KEY)
 
@@ -186,8 +419,13 @@ class PyDreoBaseDevice(object):
         with self._lock:
             for cb in self._attr_cbs:
                 cbs.append(cb)
+        slow_detector = self._dreo.slow_detector
+        start = time.perf_counter()
         for cb in cbs:
+            cb_start = time.perf_counter()
             cb()
+            slow_detector.check_callback(self, cb, time.perf_counter() - cb_start)
+        self._dreo.metrics.histogram(METRIC_DEVICE_CALLBACK_TIME).observe(time.perf_counter() - start)
 
     @property
     def device_definition(self) -> DreoDeviceDetails:
@@ -133,7 +133,8 @@ class PyDreoCeilingFan(PyDreoFanBase):
 
         self._fan_speed = self.get_state_update_value(state, WINDLEVEL_KEY)
         if self._fan_speed is None:
-            _LOGGER.error("Unable to get fan speed from state. Check debug logs for more information.")
+            self._log_throttled(logging.ERROR, "Unable to get fan speed from state for %s. "
+                                "Check debug logs for more information.", self.name)
 
         self._is_on = self.get_state_update_value(state, FANON_KEY)
         self._light_on = self.get_state_update_value(state, LIGHTON_KEY)
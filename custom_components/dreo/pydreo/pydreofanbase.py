@@ -49,10 +49,12 @@ class PyDreoFanBase(PyDreoBaseDevice):
         if (self._preset_modes is None):
             self._preset_modes = self.parse_preset_modes(details)
 
-        # Check to see if temperature calibration is supported.
-        self._temperature_offset = None
-        if self.is_preference_supported(PREFERENCE_TYPE_TEMPERATURE_CALIBRATION, details):
-            self._temperature_offset = int(self.get_setting(dreo, DreoDeviceSetting.FAN_TEMP_OFFSET, 0))
+        # Check to see if temperature calibration is supported.  The value itself lives in the
+        # settings store and is loaded after start up.
+        self._temperature_offset_supported = self.is_preference_supported(PREFERENCE_TYPE_TEMPERATURE_CALIBRATION,
+                                                                          details)
+        if self._temperature_offset_supported:
+            self.defer_setting(DreoDeviceSetting.FAN_TEMP_OFFSET)
 
         self._is_on = False
         self._power_on_key = None
@@ -206,9 +208,11 @@ class PyDreoFanBase(PyDreoBaseDevice):
         return TemperatureUnit.CELSIUS
 
     @property
-    def temperature_offset(self) -> bool:
+    def temperature_offset(self) -> int:
         """Get the temperature calibration value"""
-        return self._temperature_offset
+        if not self._temperature_offset_supported:
+            return None
+        return int(self._dreo.settings_store.cached(self.serial_number, DreoDeviceSetting.FAN_TEMP_OFFSET, 0))
     
     @temperature_offset.setter
     def temperature_offset(self, value: int) -> None:
@@ -323,12 +327,14 @@ class PyDreoFanBase(PyDreoBaseDevice):
                 self._is_on = fan_on
                 self._power_on_key = FANON_KEY
             else:
-                _LOGGER.error("Unable to get power on state from state. Check debug logs for more information.")
+                self._log_throttled(logging.ERROR, "Unable to get power on state from state for %s. "
+                                    "Check debug logs for more information.", self.name)
                 self._power_on_key = None
                 
         self._fan_speed = self.get_state_update_value(state, WINDLEVEL_KEY)
         if self._fan_speed is None:
-            _LOGGER.error("Unable to get fan speed from state. Check debug logs for more information.")
+            self._log_throttled(logging.ERROR, "Unable to get fan speed from state for %s. "
+                                "Check debug logs for more information.", self.name)
 
         self._temperature = self.get_state_update_value(state, TEMPERATURE_KEY)
         self._led_always_on = self.get_state_update_value(state, LEDALWAYSON_KEY)
@@ -304,7 +304,8 @@ class PyDreoHeater(PyDreoBaseDevice):
         _LOGGER.debug("update_state: %s", state)
         self._htalevel = self.get_state_update_value(state, HTALEVEL_KEY)
         if self._htalevel is None:
-            _LOGGER.error("Unable to get heat level from state. Check debug logs for more information.")
+            self._log_throttled(logging.ERROR, "Unable to get heat level from state for %s. "
+                                "Check debug logs for more information.", self.name)
 
         self._temperature = self.get_state_update_value(state, TEMPERATURE_KEY)
         self._hvac_mode = self.get_state_update_value(state, MODE_KEY)
@@ -0,0 +1,118 @@
+"""Token bucket rate limiting for outbound traffic."""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity` tokens, refilled at `rate` tokens per second.
+
+    Safe to share between threads.  Callers that can't get a token right away wait for it
+    (acquire / acquire_async) rather than fail."""
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens, going into debt if needed.  Returns how long the caller must wait
+        before using them (0 if they were available)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Block until the tokens are available.  Returns the time spent waiting."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """Wait (without blocking the event loop) until the tokens are available."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    @property
+    def wait_time(self) -> float:
+        """How long a caller asking for one token right now would have to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                return 0.0
+            return (1 - self._tokens) / self._rate
+
+    def configure(self, rate: float, capacity: float) -> None:
+        """Change the refill rate and capacity, keeping the tokens (or debt) already there."""
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        with self._lock:
+            self._refill(time.monotonic())
+            self._rate = rate
+            self._capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    @property
+    def rate(self) -> float:
+        """Refill rate in tokens per second."""
+        return self._rate
+
+    @property
+    def capacity(self) -> float:
+        """Maximum number of tokens (burst size)."""
+        return self._capacity
+
+
+# Defaults for the per account limiter: (rate per second, burst).
+DEFAULT_REST_RATE = (10.0, 30.0)
+DEFAULT_WEBSOCKET_RATE = (10.0, 20.0)
+
+
+class AccountRateLimiter:
+    """Token buckets shared by everything that talks to the Dreo cloud for one account.
+
+    REST calls and WebSocket control frames draw from separate buckets.  Callers queue for
+    tokens rather than fail, so a burst (parallel start up, a scene touching many devices) is
+    spread out instead of tripping the cloud's own limits."""
+
+    def __init__(self,
+                 rest_rate: tuple[float, float] = DEFAULT_REST_RATE,
+                 websocket_rate: tuple[float, float] = DEFAULT_WEBSOCKET_RATE):
+        self.rest = TokenBucket(*rest_rate)
+        self.websocket = TokenBucket(*websocket_rate)
+
+    def configure(self,
+                  rest_rate: tuple[float, float] = None,
+                  websocket_rate: tuple[float, float] = None) -> None:
+        """Change the rate and burst of either bucket."""
+        if rest_rate is not None:
+            self.rest.configure(*rest_rate)
+        if websocket_rate is not None:
+            self.websocket.configure(*websocket_rate)
+
+    def wait_times(self) -> dict[str, float]:
+        """Seconds a new REST call or WebSocket frame would wait right now."""
+        return {"rest": self.rest.wait_time, "websocket": self.websocket.wait_time}
+
+    def as_dict(self) -> dict:
+        """Diagnostics view."""
+        return {
+            "rest": {"rate": self.rest.rate, "burst": self.rest.capacity},
+            "websocket": {"rate": self.websocket.rate, "burst": self.websocket.capacity},
+            "wait_times": self.wait_times(),
+        }
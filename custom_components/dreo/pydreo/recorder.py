@@ -0,0 +1,128 @@
+"""Recording and replay of raw WebSocket traffic."""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+RECORD_INBOUND = "in"
+RECORD_OUTBOUND = "out"
+# Marks the start of a recording session; its frame is the wall clock start time.
+RECORD_SESSION = "session"
+
+# Values of these JSON keys never make it into a recording.
+REDACTED_KEYS = ("token", "password", "email", "tk", "accountId", "authKey", "uuid", "cid", "authorization")
+_REDACT_PATTERN = re.compile(
+    r'(?i)("(?:' + "|".join(REDACTED_KEYS) + r')"\s*:\s*")[^"]+'
+)
+
+
+def redact_frame(frame: str) -> str:
+    """Blank out the values of sensitive keys in a raw JSON frame."""
+    return _REDACT_PATTERN.sub(r"\1##_REDACTED_##", frame)
+
+
+class TrafficRecorder:
+    """Appends WebSocket frames to a log file, one JSON array per line:
+
+        [seconds since recording started, "in" | "out", frame]
+
+    Timestamps come from time.monotonic(), so a recording replays with its original pacing
+    regardless of wall clock changes.  Each recorder starts with a "session" line, so that
+    sessions appended to the same file (whose offsets start again at 0) replay one after
+    the other.  Safe to call from any thread."""
+
+    def __init__(self, path: str, redact: bool = True):
+        self.path = path
+        self.redact = redact
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") # pylint: disable=consider-using-with
+        self._started = time.monotonic()
+        self._frame_count = 0
+        self._write(0, RECORD_SESSION, time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+
+    def record(self, direction: str, frame: str | bytes) -> None:
+        """Append a frame travelling in the given direction."""
+        if isinstance(frame, bytes):
+            frame = frame.decode("utf-8", errors="replace")
+        if self.redact:
+            frame = redact_frame(frame)
+        if self._write(round(time.monotonic() - self._started, 4), direction, frame):
+            self._frame_count += 1
+
+    def _write(self, offset: float, direction: str, frame: str) -> bool:
+        line = json.dumps([offset, direction, frame], separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return False
+            self._file.write(line + "\n")
+            self._file.flush()
+            return True
+
+    def close(self) -> None:
+        """Stop recording and close the file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        _LOGGER.info("TrafficRecorder: recorded %d frames to %s", self._frame_count, self.path)
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames recorded so far."""
+        return self._frame_count
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_recording(path: str) -> Iterator[tuple[float, str, str]]:
+    """Yield (offset, direction, frame) from a recording, session markers included, skipping
+    lines that don't parse (such as a truncated last line)."""
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            try:
+                offset, direction, frame = json.loads(line)
+            except ValueError:
+                _LOGGER.debug("read_recording: skipping bad line %d in %s", line_number, path)
+                continue
+            yield offset, direction, frame
+
+
+def replay_recording(path: str,
+                     consume: Callable[[str], None],
+                     speed: float | None = 1.0,
+                     direction: str = RECORD_INBOUND) -> int:
+    """Feed the frames of one direction to consume, in order, on the calling thread.
+
+    speed 1 replays with the recorded timing, N replays N times faster, and None (or 0)
+    replays as fast as possible.  The timing restarts with each session in the file (or, in
+    recordings without session markers, wherever the offsets go back).  Returns the number of
+    frames replayed."""
+    started = time.monotonic()
+    last_offset = 0.0
+    count = 0
+    for offset, frame_direction, frame in read_recording(path):
+        if frame_direction == RECORD_SESSION:
+            started = time.monotonic()
+        elif offset < last_offset and speed:
+            started = time.monotonic() - offset / speed
+        last_offset = offset
+        if frame_direction != direction:
+            continue
+        if speed:
+            delay = started + offset / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        consume(frame)
+        count += 1
+    return count
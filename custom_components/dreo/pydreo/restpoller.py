@@ -0,0 +1,187 @@
+"""REST polling of device state while the WebSocket is down."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Seconds the WebSocket has to be down before falling back to polling.
+DEGRADED_MODE_DELAY = 60.0
+
+# Seconds between polls of a device that is running (e.g. a heater that is on).
+ACTIVE_POLL_INTERVAL = 30.0
+
+# Seconds between polls of a device that is off, or whose last poll failed.
+IDLE_POLL_INTERVAL = 300.0
+
+# Maximum number of devices polled at once.
+POLL_CONCURRENCY = 2
+
+# Seconds between checks of the transport's health.
+POLL_CHECK_INTERVAL = 5.0
+
+
+class DegradedModePoller:
+    """Falls back to polling device state over REST when the WebSocket stops delivering updates.
+
+    A background thread checks the transport every POLL_CHECK_INTERVAL seconds.  Once the
+    WebSocket has been down for degraded_after seconds (it was closed with auto reconnect off,
+    or reconnects keep failing) every device is polled, and from then on each device is polled
+    again after active_interval seconds if it is running and idle_interval seconds if not.  At
+    most max_concurrency polls run at once.  Polling stops as soon as the WebSocket is back.
+
+    poll(device) loads the device's state and returns False if that failed; a device whose
+    last poll failed is reported unavailable until a poll succeeds or the WebSocket returns.
+    Devices are told (state_refreshed) after every poll and whenever availability changes."""
+
+    def __init__(self,
+                 disconnected_for: Callable[[], float],
+                 devices: Callable[[], list],
+                 poll: Callable[[object], bool],
+                 degraded_after: float = DEGRADED_MODE_DELAY,
+                 active_interval: float = ACTIVE_POLL_INTERVAL,
+                 idle_interval: float = IDLE_POLL_INTERVAL,
+                 max_concurrency: int = POLL_CONCURRENCY):
+        self._disconnected_for = disconnected_for
+        self._devices = devices
+        self._poll = poll
+        self.degraded_after = degraded_after
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self._max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._degraded = False
+        self._next_poll : dict[str, float] = {}
+        self._in_flight : set[str] = set()
+        self._failed : set[str] = set()
+        self._executor : ThreadPoolExecutor = None
+        self._thread : threading.Thread = None
+        self._stop = threading.Event()
+        self.poll_count = 0
+        self.failure_count = 0
+        self.degraded_count = 0
+
+    @property
+    def degraded(self) -> bool:
+        """True while devices are being polled because the WebSocket is down."""
+        return self._degraded
+
+    def is_available(self, serial_number: str) -> bool:
+        """False if the WebSocket is down and the device's last poll failed."""
+        with self._lock:
+            return not (self._degraded and serial_number in self._failed)
+
+    def interval_for(self, device) -> float:
+        """Seconds until a device is polled again."""
+        with self._lock:
+            failed = device.serial_number in self._failed
+        return self.active_interval if device.is_active and not failed else self.idle_interval
+
+    def start(self) -> None:
+        """Start watching the transport."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="DreoDegradedModePoller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the transport, and polling."""
+        self._stop.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._degraded = False
+            self._next_poll.clear()
+            self._failed.clear()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _run(self) -> None:
+        while not self._stop.wait(POLL_CHECK_INTERVAL):
+            try:
+                self.check()
+            except Exception: # pylint: disable=broad-except
+                _LOGGER.exception("DegradedModePoller: check failed")
+
+    def check(self) -> int:
+        """Enter or leave degraded mode as the transport's health requires, and start polls of
+        the devices that are due.  Returns the number of polls started."""
+        unhealthy = self._disconnected_for() >= self.degraded_after
+        devices = list(self._devices() or [])
+
+        if not unhealthy:
+            if self._degraded:
+                with self._lock:
+                    self._degraded = False
+                    recovered = self._failed.copy()
+                    self._next_poll.clear()
+                    self._failed.clear()
+                _LOGGER.info("DegradedModePoller: WebSocket is back; stopped polling device state")
+                for device in devices:
+                    if device.serial_number in recovered:
+                        device.state_refreshed()
+            return 0
+
+        if not self._degraded:
+            self._degraded = True
+            self.degraded_count += 1
+            _LOGGER.warning("DegradedModePoller: WebSocket down for %.0fs; polling device state instead",
+                            self._disconnected_for())
+
+        now = time.monotonic()
+        started = 0
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency,
+                                                    thread_name_prefix="DreoDegradedModePoll")
+            for device in devices:
+                serial_number = device.serial_number
+                if serial_number in self._in_flight or now < self._next_poll.get(serial_number, 0.0):
+                    continue
+                self._in_flight.add(serial_number)
+                self._executor.submit(self._poll_device, device)
+                started += 1
+        return started
+
+    def _poll_device(self, device) -> None:
+        serial_number = device.serial_number
+        succeeded = False
+        try:
+            succeeded = bool(self._poll(device))
+        except Exception: # pylint: disable=broad-except
+            _LOGGER.exception("DegradedModePoller: polling %s failed", device.name)
+        finally:
+            interval = self.active_interval if succeeded and device.is_active else self.idle_interval
+            with self._lock:
+                self.poll_count += 1
+                if succeeded:
+                    self._failed.discard(serial_number)
+                else:
+                    self.failure_count += 1
+                    self._failed.add(serial_number)
+                self._in_flight.discard(serial_number)
+                if self._degraded:
+                    self._next_poll[serial_number] = time.monotonic() + interval
+        _LOGGER.debug("DegradedModePoller: polled %s (%s), next in %.0fs",
+                      device.name, "ok" if succeeded else "failed", interval)
+        device.state_refreshed()
+
+    def as_dict(self) -> dict:
+        """Diagnostics view: whether polling is on, counts, and seconds until each device's next poll."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "degraded": self._degraded,
+                "disconnected_for": round(self._disconnected_for()),
+                "degraded_count": self.degraded_count,
+                "polls": self.poll_count,
+                "failures": self.failure_count,
+                "next_poll": {serial_number: max(0, round(next_poll - now))
+                              for serial_number, next_poll in self._next_poll.items()},
+                "failed": sorted(self._failed),
+            }
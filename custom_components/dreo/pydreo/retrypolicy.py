@@ -0,0 +1,144 @@
+"""Retry, backoff and circuit breaking for REST calls."""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Consecutive failures that open a host's circuit, and how long it stays open.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How Helpers.call_api times out and retries.
+
+    GETs are idempotent, so they are retried after connection errors, timeouts and 5xx
+    responses.  Other methods are only retried when the request can't have been processed:
+    a connect timeout or a 429.  Backoff is capped exponential with full jitter; a 429's
+    Retry-After is honoured unless it is longer than max_retry_after, in which case the call
+    gives up.  The waits run on the calling (executor) thread, so all of a call's waits
+    together are kept within max_total_backoff: a retry that would go over it isn't made."""
+
+    connect_timeout: float = 5.0
+    read_timeout: float = 20.0
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_cap: float = 8.0
+    max_retry_after: float = 30.0
+    max_total_backoff: float = 10.0
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        """(connect, read) timeout for requests."""
+        return (self.connect_timeout, self.read_timeout)
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt (1 based)."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta seconds or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the host's circuit is open."""
+
+
+class CircuitBreaker:
+    """Per host circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail fast for
+    reset_timeout seconds.  After that one trial call is let through (half open); success
+    closes the circuit, failure opens it again."""
+
+    _breakers : dict[str, "CircuitBreaker"] = {}
+    _breakers_lock = threading.Lock()
+
+    def __init__(self,
+                 host: str,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at : float = None
+        self._trial_in_progress = False
+
+    @classmethod
+    def for_host(cls, host: str) -> "CircuitBreaker":
+        """The breaker shared by every call to host."""
+        with cls._breakers_lock:
+            breaker = cls._breakers.get(host)
+            if breaker is None:
+                breaker = cls._breakers[host] = cls(host)
+            return breaker
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """Forget all breakers (used by tests)."""
+        with cls._breakers_lock:
+            cls._breakers.clear()
+
+    @property
+    def state(self) -> str:
+        """closed, open or half_open."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError if the call should not be made."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_progress:
+                raise CircuitOpenError(f"Circuit for {self.host} is open")
+            self._trial_in_progress = True
+
+    def record_success(self) -> None:
+        """The call succeeded (or failed in a way that says the host is up)."""
+        with self._lock:
+            if self._opened_at is not None:
+                _LOGGER.info("CircuitBreaker: %s is reachable again, closing circuit", self.host)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        """The call failed with a connection error, timeout, 429, 5xx or unexpected error."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_progress:
+                    _LOGGER.warning("CircuitBreaker: %s failed %d times in a row, failing calls for %.0fs",
+                                    self.host, self._failures, self.reset_timeout)
+                self._opened_at = time.monotonic()
+            self._trial_in_progress = False
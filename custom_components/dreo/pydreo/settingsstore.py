@@ -0,0 +1,257 @@
+"""Per device store of device settings (values read with setting_get)."""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError # pylint: disable=redefined-builtin
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Seconds a setting value is considered fresh.
+SETTINGS_TTL = 30 * 60
+
+# Maximum number of setting reads refreshing in the background at once.
+SETTINGS_REFRESH_CONCURRENCY = 4
+
+# Seconds changes are collected for before the file is written.
+SETTINGS_SAVE_DELAY = 10.0
+
+# Seconds a caller that needs a setting it doesn't have waits for it to be fetched.
+SETTINGS_FETCH_TIMEOUT = 10.0
+
+SETTINGS_STORE_VERSION = 1
+
+
+class DeviceSettingsStore:
+    """Setting values per device serial number, kept in memory and optionally in a file.
+
+    get() and cached() return the stored value when there is one; a missing or stale value is
+    refreshed in the background (at most SETTINGS_REFRESH_CONCURRENCY at a time), and get()
+    only waits for it if given a timeout.  put() records a value written to the device.
+    Listeners are called (on whichever thread learned the value) when a value changes.
+
+    Changes are persisted in batches: with a path, the file is rewritten (by one writer,
+    through its own temporary file) save_delay seconds after the first unsaved change, so a
+    burst of refreshes costs one write.  flush() (and shutdown()) write pending changes now."""
+
+    def __init__(self,
+                 fetch: Callable[[str, str], object],
+                 ttl: float = SETTINGS_TTL,
+                 max_concurrency: int = SETTINGS_REFRESH_CONCURRENCY,
+                 path: str = None,
+                 save_delay: float = SETTINGS_SAVE_DELAY):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer : threading.Timer = None
+        self._values : dict[str, dict[str, tuple[object, float]]] = {}
+        self._refreshing : dict[tuple[str, str], Future] = {}
+        self._max_concurrency = max_concurrency
+        self._executor : ThreadPoolExecutor = None
+        self._listeners : list[Callable[[str, str, object], None]] = []
+        self.save_count = 0
+
+    def add_listener(self, listener: Callable[[str, str, object], None]) -> None:
+        """Call listener(serial_number, key, value) whenever a stored value changes."""
+        self._listeners.append(listener)
+
+    def peek(self, serial_number: str, key: str, default=None):
+        """The stored value (fresh or not) without fetching anything."""
+        with self._lock:
+            entry = self._values.get(serial_number, {}).get(key)
+        return entry[0] if entry is not None else default
+
+    def is_fresh(self, serial_number: str, key: str) -> bool:
+        """True if there is a stored value younger than the TTL."""
+        with self._lock:
+            entry = self._values.get(serial_number, {}).get(key)
+        return entry is not None and time.time() - entry[1] < self.ttl
+
+    def get(self, serial_number: str, key: str, default=None, timeout: float = None):
+        """The value of a setting, from memory when possible (see class docs).  A missing
+        value is fetched in the background; with a timeout, get() waits up to that long for
+        it, otherwise it returns default straight away."""
+        with self._lock:
+            entry = self._values.get(serial_number, {}).get(key)
+        if entry is not None:
+            if time.time() - entry[1] >= self.ttl:
+                self.refresh_in_background(serial_number, key)
+            return entry[0]
+        future = self.refresh_in_background(serial_number, key)
+        if timeout:
+            try:
+                future.result(timeout)
+            except TimeoutError:
+                _LOGGER.debug("DeviceSettingsStore: %s for %s not fetched within %.0fs",
+                              key, serial_number, timeout)
+        return self.peek(serial_number, key, default)
+
+    def cached(self, serial_number: str, key: str, default=None):
+        """The stored value without ever blocking; a missing or stale value is refreshed in the
+        background (and listeners told when it arrives)."""
+        with self._lock:
+            entry = self._values.get(serial_number, {}).get(key)
+        if entry is None or time.time() - entry[1] >= self.ttl:
+            self.refresh_in_background(serial_number, key)
+        return entry[0] if entry is not None else default
+
+    def refresh(self, serial_number: str, key: str):
+        """Fetch a setting now and store it.  Returns the value (None if the fetch failed)."""
+        value = self._fetch(serial_number, key)
+        if value is not None:
+            self._store(serial_number, key, value)
+        return value
+
+    def refresh_in_background(self, serial_number: str, key: str) -> Future:
+        """Fetch a setting on the store's worker threads, unless that's already under way.
+        Returns the Future for the fetch (the one already under way, if there is one)."""
+        with self._lock:
+            future = self._refreshing.get((serial_number, key))
+            if future is not None and not future.done():
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency,
+                                                    thread_name_prefix="DreoSettingsRefresh")
+            future = self._executor.submit(self._background_refresh, serial_number, key)
+            self._refreshing[(serial_number, key)] = future
+            return future
+
+    def _background_refresh(self, serial_number: str, key: str) -> None:
+        try:
+            self.refresh(serial_number, key)
+        except Exception: # pylint: disable=broad-except
+            _LOGGER.exception("DeviceSettingsStore: refreshing %s for %s failed", key, serial_number)
+        finally:
+            with self._lock:
+                self._refreshing.pop((serial_number, key), None)
+
+    def put(self, serial_number: str, key: str, value) -> None:
+        """Record a value that was successfully written to the device."""
+        self._store(serial_number, key, value)
+
+    def _store(self, serial_number: str, key: str, value) -> None:
+        with self._lock:
+            previous = self._values.get(serial_number, {}).get(key)
+            self._values.setdefault(serial_number, {})[key] = (value, time.time())
+        self._changed()
+        if previous is None or previous[0] != value:
+            for listener in list(self._listeners):
+                listener(serial_number, key, value)
+
+    def forget(self, serial_number: str) -> None:
+        """Drop everything stored for a device."""
+        with self._lock:
+            forgotten = self._values.pop(serial_number, None)
+        if forgotten is not None:
+            self._changed()
+
+    def _changed(self) -> None:
+        """Note unsaved changes: schedule a save of the file, unless one is already scheduled."""
+        if self.path is None:
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self._save_later)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_later(self) -> None:
+        with self._lock:
+            self._save_timer = None
+        self.save()
+
+    def to_data(self) -> dict:
+        """Everything stored, as the JSON document that is saved."""
+        with self._lock:
+            return {
+                "version": SETTINGS_STORE_VERSION,
+                "settings": {
+                    serial_number: {key: {"value": value, "updated": updated}
+                                    for key, (value, updated) in settings.items()}
+                    for serial_number, settings in self._values.items()
+                },
+            }
+
+    def load_data(self, data: dict) -> int:
+        """Add stored values from a document made by to_data().  Returns how many."""
+        if not isinstance(data, dict) or data.get("version") != SETTINGS_STORE_VERSION:
+            return 0
+        count = 0
+        with self._lock:
+            for serial_number, settings in data.get("settings", {}).items():
+                for key, entry in settings.items():
+                    self._values.setdefault(serial_number, {})[key] = (entry["value"], entry["updated"])
+                    count += 1
+        return count
+
+    def load(self, path: str = None) -> int:
+        """Load stored values from a file (and save to it from then on).  Returns how many."""
+        if path is not None:
+            self.path = path
+        if self.path is None or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as ex:
+            _LOGGER.warning("DeviceSettingsStore: unable to read %s: %s", self.path, ex)
+            return 0
+        count = self.load_data(data)
+        _LOGGER.debug("DeviceSettingsStore: loaded %d settings from %s", count, self.path)
+        return count
+
+    def save(self) -> None:
+        """Write the stored values to the file now, atomically.  One writer at a time, each
+        through its own temporary file."""
+        if self.path is None:
+            return
+        with self._save_lock:
+            data = self.to_data()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path), suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as file:
+                    json.dump(data, file)
+                os.replace(temp_path, self.path)
+                temp_path = None
+                self.save_count += 1
+            except OSError as ex:
+                _LOGGER.warning("DeviceSettingsStore: unable to write %s: %s", self.path, ex)
+            finally:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def flush(self) -> None:
+        """Write any changes still waiting for their delayed save."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
+
+    def as_dict(self) -> dict:
+        """Diagnostics view: the stored values and their age in seconds."""
+        now = time.time()
+        with self._lock:
+            return {serial_number: {key: {"value": value, "age": round(now - updated)}
+                                    for key, (value, updated) in settings.items()}
+                    for serial_number, settings in self._values.items()}
+
+    def shutdown(self) -> None:
+        """Stop the background refresh threads, and write any unsaved changes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        self.flush()
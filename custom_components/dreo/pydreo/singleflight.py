@@ -0,0 +1,64 @@
+"""Coalescing of identical in-flight REST calls."""
+
+import copy
+import logging
+import threading
+from collections.abc import Callable, Hashable
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+class _Call:
+    """A call in flight, and its outcome once done."""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error : BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it runs wait for
+    it and get (a deep copy of) its result, or its exception.  Only use this for idempotent
+    calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls : dict[Hashable, _Call] = {}
+        self.coalesced_count = 0
+
+    def do(self, key: Hashable, func: Callable[[], object]):
+        """Run func, or wait for the identical call already running."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced_count += 1
+
+        if not leader:
+            _LOGGER.debug("SingleFlight: waiting for in-flight call %s", key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
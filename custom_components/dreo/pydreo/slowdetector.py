@@ -0,0 +1,114 @@
+"""Detection of slow device update parsing and slow attribute callbacks."""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+# Default thresholds (seconds) above which a parse or callback counts as slow.
+SLOW_PARSE_THRESHOLD = 0.05
+SLOW_CALLBACK_THRESHOLD = 0.1
+
+# Number of slowest operations kept for diagnostics.
+SLOW_OPERATIONS_TOP_N = 10
+
+SLOW_KIND_PARSE = "parse"
+SLOW_KIND_CALLBACK = "callback"
+
+
+class SlowOperationDetector:
+    """Flags device update parses and attribute callbacks that take longer than a threshold.
+
+    WebSocket reports are parsed, and their callbacks run, on the MessageDispatcher's worker
+    pool (DISPATCH_MAX_WORKERS threads shared by all devices, one device at a time per
+    worker), so check_parse and check_callback are called from those workers; REST state
+    updates, optimistic updates and rollbacks call them from whichever thread applied the
+    update.  A slow parse or callback delays that device's later updates, and while it holds
+    a worker the other devices share fewer.  Calls come from several threads at once, so the
+    counts and the slowest list are only touched under the lock.
+
+    The first slow operation of each kind for a device is logged as a warning; after that
+    they're only logged at debug.  The slowest operations seen are kept for diagnostics.
+    A threshold of None (or 0) turns that check off."""
+
+    def __init__(self,
+                 parse_threshold: float = SLOW_PARSE_THRESHOLD,
+                 callback_threshold: float = SLOW_CALLBACK_THRESHOLD,
+                 top_n: int = SLOW_OPERATIONS_TOP_N):
+        self.parse_threshold = parse_threshold
+        self.callback_threshold = callback_threshold
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._warned : set[tuple[str, str]] = set()
+        self._slowest : list[tuple[float, int, dict]] = []
+        self._sequence = itertools.count()
+        self.slow_count = 0
+
+    def check_parse(self, device, message: dict, duration: float) -> bool:
+        """Check the time a device took to handle an update message.  Returns True if slow."""
+        if not self.parse_threshold or duration < self.parse_threshold:
+            return False
+        reported = message.get("reported") if isinstance(message, dict) else None
+        keys = sorted(reported) if isinstance(reported, dict) else []
+        self._record(SLOW_KIND_PARSE, device, duration, {"keys": keys})
+        return True
+
+    def check_callback(self, device, callback, duration: float) -> bool:
+        """Check the time an attribute callback took.  Returns True if slow."""
+        if not self.callback_threshold or duration < self.callback_threshold:
+            return False
+        self._record(SLOW_KIND_CALLBACK, device, duration, {"callback": _callback_name(callback)})
+        return True
+
+    def _record(self, kind: str, device, duration: float, detail: dict) -> None:
+        entry = {
+            "kind": kind,
+            "serial_number": device.serial_number,
+            "model": device.model,
+            "duration": round(duration, 4),
+            "time": time.time(),
+            **detail,
+        }
+        with self._lock:
+            self.slow_count += 1
+            first = (device.serial_number, kind) not in self._warned
+            self._warned.add((device.serial_number, kind))
+            item = (duration, next(self._sequence), entry)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, item)
+            elif self.top_n:
+                heapq.heappushpop(self._slowest, item)
+
+        log = _LOGGER.warning if first else _LOGGER.debug
+        log("Slow %s for %s (%s) took %.3fs: %s%s",
+            kind, device.name, device.model, duration, detail,
+            " (further slow operations for this device are logged at debug)" if first else "")
+
+    def slowest(self) -> list[dict]:
+        """The slowest operations seen, slowest first."""
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._slowest, key=lambda item: -item[0])]
+
+    def as_dict(self) -> dict:
+        """Diagnostics view."""
+        with self._lock:
+            slow_count = self.slow_count
+        return {
+            "parse_threshold": self.parse_threshold,
+            "callback_threshold": self.callback_threshold,
+            "slow_count": slow_count,
+            "slowest": self.slowest(),
+        }
+
+
+def _callback_name(callback) -> str:
+    owner = getattr(callback, "__self__", None)
+    name = getattr(callback, "__qualname__", None) or repr(callback)
+    if owner is not None and not isinstance(owner, type):
+        return f"{name} ({getattr(owner, 'entity_id', None) or type(owner).__name__})"
+    return name
@@ -0,0 +1,133 @@
+"""Timing spans for the phases of start up."""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from .constant import LOGGER_NAME
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class TimingSpan:
+    """A timed phase, with any phases timed inside it (on the same thread) as children."""
+
+    def __init__(self, name: str, detail: dict):
+        self.name = name
+        self.detail = detail
+        self.children : list["TimingSpan"] = []
+        self.start = time.monotonic()
+        self.end : float = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds the span took (so far, if it's still open)."""
+        return (self.end if self.end is not None else time.monotonic()) - self.start
+
+    def as_dict(self) -> dict:
+        """Nested dict suitable for diagnostics."""
+        data = {"name": self.name, "duration": round(self.duration, 4), **self.detail}
+        if self.children:
+            data["children"] = [child.as_dict() for child in self.children]
+        return data
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class StartupTiming:
+    """Collects timing spans for start up.
+
+    Spans opened with span() nest under the span currently open on the same thread;
+    spans opened with nothing open are top level phases.  Once finish() is called, new top
+    level spans are still timed but no longer kept, so later calls (a device refresh, a
+    setting read) don't grow the record.  Safe to use from several threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started : float = None
+        self._finished : float = None
+        self.spans : list[TimingSpan] = []
+
+    def begin(self) -> None:
+        """Start timing a new start up, discarding any earlier spans."""
+        with self._lock:
+            self._started = time.monotonic()
+            self._finished = None
+            self.spans = []
+
+    def finish(self) -> None:
+        """Mark start up as complete."""
+        self._finished = time.monotonic()
+
+    @property
+    def total(self) -> float | None:
+        """Seconds from begin() to finish() (or now), if begin() was called."""
+        if self._started is None:
+            return None
+        return (self._finished if self._finished is not None else time.monotonic()) - self._started
+
+    @contextmanager
+    def span(self, name: str, **detail):
+        """Time the enclosed block as a span."""
+        stack : list[TimingSpan] = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        timing_span = TimingSpan(name, detail)
+        with self._lock:
+            if stack:
+                stack[-1].children.append(timing_span)
+            elif self._finished is None:
+                self.spans.append(timing_span)
+        stack.append(timing_span)
+        try:
+            yield timing_span
+        finally:
+            timing_span.end = time.monotonic()
+            stack.pop()
+            _LOGGER.debug("StartupTiming: %s %s took %.3fs", name, detail or "", timing_span.duration)
+
+    def phase_totals(self) -> dict[str, float]:
+        """Total seconds per top level phase, in the order phases first started."""
+        totals : dict[str, float] = {}
+        with self._lock:
+            for timing_span in self.spans:
+                totals[timing_span.name] = totals.get(timing_span.name, 0.0) + timing_span.duration
+        return totals
+
+    def child_durations(self, phase: str) -> list[float]:
+        """Durations of the direct children of every top level span with the given name."""
+        with self._lock:
+            return [child.duration
+                    for timing_span in self.spans if timing_span.name == phase
+                    for child in timing_span.children]
+
+    def summary(self, label: str = "setup") -> str:
+        """One line summary, e.g. "setup 8.2s: login 0.9, list 0.6, states 5.8 (p95 0.41)"."""
+        parts = []
+        for phase, seconds in self.phase_totals().items():
+            part = f"{phase} {seconds:.1f}"
+            children = self.child_durations(phase)
+            if len(children) > 1:
+                part += f" (p95 {_percentile(children, 95):.2f})"
+            parts.append(part)
+        total = self.total
+        if total is None:
+            total = sum(self.phase_totals().values())
+        return f"{label} {total:.1f}s: " + ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        """Diagnostics view: total, per phase totals and the full span tree."""
+        total = self.total
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "total": round(total, 4) if total is not None else None,
+            "phases": {phase: round(seconds, 4) for phase, seconds in self.phase_totals().items()},
+            "spans": [timing_span.as_dict() for timing_span in spans],
+        }
@@ -0,0 +1,98 @@
+"""Shared background event loop for the WebSockets of every Dreo account."""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .constant import LOGGER_NAME
+from .messagedispatcher import DISPATCH_MAX_WORKERS
+
+_LOGGER = logging.getLogger(LOGGER_NAME)
+
+
+class TransportHub:
+    """Runs every account's WebSocket on a single background thread and event loop.
+
+    Each CommandTransport still owns its own socket, dispatcher and journal (so messages are
+    routed per account); the hub only provides the loop they run on, plus one worker pool
+    shared by their dispatchers.  The loop thread is started on first use and stopped once
+    the last transport finishes."""
+
+    _shared : "TransportHub" = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "TransportHub":
+        """Return the process-wide hub."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = TransportHub()
+            return cls._shared
+
+    def __init__(self, dispatch_workers: int = DISPATCH_MAX_WORKERS):
+        self._lock = threading.Lock()
+        self._loop : asyncio.AbstractEventLoop = None
+        self._thread : threading.Thread = None
+        self._running : dict[object, Future] = {}
+        self._dispatch_workers = dispatch_workers
+        self._dispatch_executor : ThreadPoolExecutor = None
+
+    @property
+    def dispatch_executor(self) -> ThreadPoolExecutor:
+        """Worker pool shared by the message dispatchers of all transports."""
+        with self._lock:
+            if self._dispatch_executor is None:
+                self._dispatch_executor = ThreadPoolExecutor(max_workers=self._dispatch_workers,
+                                                             thread_name_prefix="DreoDispatch")
+            return self._dispatch_executor
+
+    @property
+    def active_transports(self) -> int:
+        """Number of transports currently running on the hub."""
+        with self._lock:
+            return len(self._running)
+
+    def is_running(self, transport) -> bool:
+        """Returns True if the transport has a coroutine running on the hub."""
+        with self._lock:
+            return transport in self._running
+
+    def start(self, transport, coro: Coroutine) -> Future:
+        """Run a transport's main coroutine on the hub loop."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(name="DreoWebSocketStream",
+                                                target=self._run_loop,
+                                                args=(self._loop,),
+                                                daemon=True)
+                self._thread.start()
+                _LOGGER.debug("TransportHub: started event loop thread")
+            future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+            self._running[transport] = future
+
+        future.add_done_callback(lambda _: self._release(transport, future))
+        return future
+
+    def _release(self, transport, future: Future) -> None:
+        with self._lock:
+            if self._running.get(transport) is future:
+                del self._running[transport]
+            if self._running or self._loop is None:
+                return
+            loop = self._loop
+            self._loop = None
+            self._thread = None
+
+        _LOGGER.debug("TransportHub: no transports left, stopping event loop thread")
+        loop.call_soon_threadsafe(loop.stop)
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
@@ -0,0 +1,56 @@
+"""Fast-path parsing of WebSocket frames.
+
+Every frame from the Dreo cloud carries a `devicesn` and a `method` at the top level.  Most
+frames we don't care about (unknown or shared devices, non-report methods) can be rejected by
+looking at just those two fields, without decoding the whole JSON document.
+"""
+
+import json
+import re
+
+try:
+    import orjson  # pylint: disable=import-error
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    _json_loads = orjson.loads
+else:
+    JSON_BACKEND = "json"
+    _json_loads = json.loads
+
+WS_REPORT_METHODS = frozenset(("report", "control-report"))
+
+_DEVICESN_PATTERN = re.compile(r'"devicesn"\s*:\s*"([^"\\]*)"')
+_METHOD_PATTERN = re.compile(r'"method"\s*:\s*"([^"\\]*)"')
+
+
+def parse_envelope(frame: str | bytes) -> tuple[str | None, str | None]:
+    """Return (devicesn, method) from a raw frame without decoding it.
+
+    Either value is None if it can't be found for certain at the top level of the frame, in
+    which case the caller should fall back to a full decode."""
+    if isinstance(frame, (bytes, bytearray)):
+        frame = frame.decode("utf-8", errors="replace")
+
+    return (_top_level_value(_DEVICESN_PATTERN, frame),
+            _top_level_value(_METHOD_PATTERN, frame))
+
+
+def _top_level_value(pattern: re.Pattern, frame: str) -> str | None:
+    """The value of a key that occurs exactly once in the frame, directly inside the outermost
+    object.  A key that's repeated (e.g. also inside a nested payload) or only nested is None."""
+    matches = list(pattern.finditer(frame))
+    if len(matches) != 1:
+        return None
+    match = matches[0]
+    prefix = frame[:match.start()]
+    if prefix.count("{") - prefix.count("}") != 1:
+        return None
+    return match.group(1)
+
+
+def loads(frame: str | bytes):
+    """Decode a frame using the fastest available JSON backend."""
+    return _json_loads(frame)
@@ -14,6 +14,18 @@ import logging
 from .dreobasedevice import DreoBaseDeviceHA
 from .pydreo import PyDreo
 from .pydreo.pydreobasedevice import PyDreoBaseDevice
+from .pydreo.metrics import (
+    MetricsRegistry,
+    METRIC_WS_FRAMES_IN,
+    METRIC_WS_FRAMES_OUT,
+    METRIC_WS_BYTES_IN,
+    METRIC_WS_BYTES_OUT,
+    METRIC_WS_RECONNECTS,
+    METRIC_REST_CALLS,
+    METRIC_REST_LATENCY,
+    METRIC_DEVICE_PARSE_TIME,
+    METRIC_DEVICE_CALLBACK_TIME
+)
 from .pydreo.constant import (
     HUMIDITY_KEY,
     MODE_KEY,
@@ -29,6 +41,7 @@ from .pydreo.pydreoevaporativecooler import (
 )
 
 from .haimports import *  # pylint: disable=W0401,W0614
+from .devicelist import async_register_entity_factory
 
 from .const import (
     LOGGER,
@@ -143,6 +156,104 @@ SENSORS: tuple[DreoSensorEntityDescription, ...] = (
     )
 )
 
+@dataclass
+class DreoMetricSensorEntityDescription(SensorEntityDescription):
+    """Describe a Dreo integration metric sensor."""
+
+    value_fn: Callable[[MetricsRegistry], StateType] = None
+
+
+def _recent_mean_ms(metrics: MetricsRegistry, name: str) -> float | None:
+    """Recent mean, in milliseconds, of a histogram."""
+    recent_mean = metrics.histogram(name).recent_mean
+    return round(recent_mean * 1000, 3) if recent_mean is not None else None
+
+
+METRIC_SENSORS: tuple[DreoMetricSensorEntityDescription, ...] = (
+    DreoMetricSensorEntityDescription(
+        key="WebSocket frames in",
+        translation_key="metric_ws_frames_in",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.value(METRIC_WS_FRAMES_IN),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="WebSocket frames out",
+        translation_key="metric_ws_frames_out",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.value(METRIC_WS_FRAMES_OUT),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="WebSocket bytes in",
+        translation_key="metric_ws_bytes_in",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="B",
+        value_fn=lambda metrics: metrics.value(METRIC_WS_BYTES_IN),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="WebSocket bytes out",
+        translation_key="metric_ws_bytes_out",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement="B",
+        value_fn=lambda metrics: metrics.value(METRIC_WS_BYTES_OUT),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="WebSocket reconnects",
+        translation_key="metric_ws_reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.value(METRIC_WS_RECONNECTS) or 0,
+    ),
+    DreoMetricSensorEntityDescription(
+        key="REST calls",
+        translation_key="metric_rest_calls",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.total(METRIC_REST_CALLS),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="REST latency",
+        translation_key="metric_rest_latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="ms",
+        value_fn=lambda metrics: _recent_mean_ms(metrics, METRIC_REST_LATENCY),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="Update parse time",
+        translation_key="metric_parse_time",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="ms",
+        value_fn=lambda metrics: _recent_mean_ms(metrics, METRIC_DEVICE_PARSE_TIME),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="Callback time",
+        translation_key="metric_callback_time",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement="ms",
+        value_fn=lambda metrics: _recent_mean_ms(metrics, METRIC_DEVICE_CALLBACK_TIME),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="Suppressed commands",
+        translation_key="metric_suppressed_commands",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.value("command.suppressed"),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="Coalesced REST calls",
+        translation_key="metric_coalesced_rest_calls",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.value("rest.coalesced"),
+    ),
+    DreoMetricSensorEntityDescription(
+        key="Replaced offline commands",
+        translation_key="metric_replaced_offline_commands",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.value("command.journal_collapsed"),
+    ),
+)
+
 def get_entries(pydreo_devices : list[PyDreoBaseDevice]) -> list[DreoSensorHA]:
     """Add Sensor entries for Dreo devices."""
     sensor_ha_collection : list[DreoSensorHA] = []
@@ -175,9 +286,14 @@ async def async_setup_entry(
     """Set up the Dreo Sensor platform."""
     _LOGGER.info("Starting Dreo Sensor Platform")
 
-    pydreo_manager : PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager : PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
     async_add_entities(get_entries(pydreo_manager.devices))
+    async_register_entity_factory(hass, config_entry, Platform.SENSOR, async_add_entities, get_entries)
+    async_add_entities(
+        DreoMetricSensorHA(config_entry, pydreo_manager.metrics, description)
+        for description in METRIC_SENSORS
+    )
 
 
 class DreoSensorHA(DreoBaseDeviceHA, SensorEntity):
@@ -214,3 +330,35 @@ class DreoSensorHA(DreoBaseDeviceHA, SensorEntity):
     def native_value(self) -> StateType:
         """Return the state of the sensor."""
         return self.entity_description.value_fn(self.device)
+
+
+class DreoMetricSensorHA(SensorEntity):
+    """Diagnostic sensor reporting one of the integration's runtime metrics.
+
+    These are disabled by default and polled, so they cost nothing unless enabled."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        metrics: MetricsRegistry,
+        description: DreoMetricSensorEntityDescription,
+    ) -> None:
+        self._metrics = metrics
+        self.entity_description = description
+        self._attr_name = f"Dreo {description.key}"
+        self._attr_unique_id = f"{config_entry.entry_id}-metric-{description.translation_key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=f"Dreo ({config_entry.title})",
+            manufacturer="Dreo",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._metrics)
@@ -11,6 +11,7 @@ from dataclasses import dataclass
 import logging
 
 from .haimports import *  # pylint: disable=W0401,W0614
+from .devicelist import async_register_entity_factory
 from .dreobasedevice import DreoBaseDeviceHA
 from .dreochefmaker import DreoChefMakerHA
 from .pydreo import PyDreo, PyDreoBaseDevice
@@ -147,17 +148,19 @@ async def async_setup_entry(
     """Set up the Dreo Switch platform."""
     _LOGGER.info("Starting Dreo Switch Platform")
 
-    pydreo_manager: PyDreo = hass.data[DOMAIN][PYDREO_MANAGER]
+    pydreo_manager: PyDreo = hass.data[DOMAIN][config_entry.entry_id][PYDREO_MANAGER]
 
+    async_add_entities(get_switch_entities(pydreo_manager.devices))
+    async_register_entity_factory(hass, config_entry, Platform.SWITCH, async_add_entities, get_switch_entities)
+
+def get_switch_entities(pydreo_devices : list[PyDreoBaseDevice]) -> list[SwitchEntity]:
+    """Get all the switch entities for the devices: chef makers and per feature switches."""
     switch_entities_ha : list[SwitchEntity] = []
-    for pydreo_device in pydreo_manager.devices:
+    for pydreo_device in pydreo_devices:
         if pydreo_device.type == DreoDeviceType.CHEF_MAKER:
             switch_entities_ha.append(DreoChefMakerHA(pydreo_device))
-    switch_entities_to_add = get_entries(pydreo_manager.devices)
-
-    switch_entities_ha.extend(switch_entities_to_add)
-
-    async_add_entities(switch_entities_ha)
+    switch_entities_ha.extend(get_entries(pydreo_devices))
+    return switch_entities_ha
 
 class DreoSwitchHA(DreoBaseDeviceHA, SwitchEntity):
     """Representation of a Switch describing a read-write property of a Dreo device."""
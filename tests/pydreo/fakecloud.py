@@ -0,0 +1,326 @@
+"""A local stand-in for the Dreo cloud (REST API + WebSocket) for end-to-end and load testing.
+
+Point PyDreo at it with the api_base_url / ws_base_url overrides:
+
+    with FakeDreoCloud() as cloud:
+        cloud.add_devices_from_file("get_devices_HTF005S.json")
+        manager = PyDreo("EMAIL", "PASSWORD", api_base_url=cloud.api_base_url, ws_base_url=cloud.ws_base_url)
+
+Devices are fed from the api_responses fixtures (or added directly, e.g. from a generated
+fleet).  Latency, jitter, REST throttling and WebSocket disconnects are configurable.
+"""
+# pylint: disable=invalid-name
+import asyncio
+import copy
+import glob
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import websockets
+
+from .call_json import get_response_from_file
+from .defaults import Defaults
+
+logger = logging.getLogger(__name__)
+
+LOGIN_PATH = "/api/oauth/login"
+DEVICE_LIST_PATH = "/api/v2/user-device/device/list"
+DEVICE_STATE_PATH = "/api/user-device/device/state"
+SETTING_PATH = "/api/user-device/setting"
+
+API_RESPONSES_PATH = "tests/pydreo/api_responses/"
+
+
+class FakeDreoCloud:
+    """Serves the Dreo REST API and WebSocket protocol from in-memory device state.
+
+    latency / jitter : seconds added to every REST response and WebSocket report
+    rest_rate_limit : REST requests per second before answering 429 (None = unlimited)
+    disconnect_every : close a WebSocket after this many control frames (None = never)
+    """
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 rest_rate_limit: float | None = None,
+                 disconnect_every: int | None = None,
+                 region: str = "NA"):
+        self.latency = latency
+        self.jitter = jitter
+        self.rest_rate_limit = rest_rate_limit
+        self.disconnect_every = disconnect_every
+        self.region = region
+
+        self._lock = threading.Lock()
+        self._devices : list[dict] = []
+        self._states : dict[str, dict] = {}
+        self._settings : dict[tuple[str, str], any] = {}
+        self.received_commands : list[dict] = []
+        self.rest_request_count = 0
+        self.throttled_count = 0
+        self.ws_connection_count = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+        self._http : ThreadingHTTPServer = None
+        self._http_thread : threading.Thread = None
+        self._ws_loop : asyncio.AbstractEventLoop = None
+        self._ws_server = None
+        self._ws_thread : threading.Thread = None
+        self._ws_port : int = None
+        self._ws_connections : set = set()
+
+    # ------------------------------------------------------------------ devices
+
+    def add_device(self, device: dict, state_response: dict | None = None) -> None:
+        """Add a device list entry and (optionally) its devicestate response."""
+        with self._lock:
+            self._devices.append(device)
+            if state_response is not None:
+                self._states[device["sn"]] = copy.deepcopy(state_response)
+
+    def add_devices_from_file(self, devices_file_name: str) -> None:
+        """Add every device from a get_devices_*.json fixture, with its state and settings fixtures."""
+        for device in get_response_from_file(devices_file_name)["data"]["list"]:
+            state = None
+            try:
+                state = get_response_from_file(f"get_device_state_{device['sn']}.json")
+            except FileNotFoundError:
+                logger.debug("FakeDreoCloud: no state fixture for %s", device["sn"])
+            self.add_device(device, state)
+
+            prefix = f"get_device_setting_{device['sn']}_"
+            for setting_file in glob.glob(f"{API_RESPONSES_PATH}{prefix}*.json"):
+                setting = get_response_from_file(os.path.basename(setting_file))
+                self.set_setting(device["sn"], setting["data"]["dataKey"], setting["data"]["dataValue"])
+
+    def set_setting(self, device_sn: str, data_key: str, value) -> None:
+        """Seed a device setting."""
+        with self._lock:
+            self._settings[(device_sn, data_key)] = value
+
+    def get_setting(self, device_sn: str, data_key: str):
+        """Current value of a device setting (None if it was never set)."""
+        with self._lock:
+            return self._settings.get((device_sn, data_key))
+
+    def get_state(self, device_sn: str, key: str):
+        """Current value of a state key for a device."""
+        with self._lock:
+            mixed = self._states[device_sn]["data"]["mixed"]
+            return mixed[key]["state"] if key in mixed else None
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @property
+    def api_base_url(self) -> str:
+        """Base URL for PyDreo(api_base_url=...)."""
+        return f"http://127.0.0.1:{self._http.server_address[1]}"
+
+    @property
+    def ws_base_url(self) -> str:
+        """Base URL for PyDreo(ws_base_url=...)."""
+        return f"ws://127.0.0.1:{self._ws_port}"
+
+    def start(self) -> "FakeDreoCloud":
+        """Start the REST and WebSocket servers on free local ports."""
+        handler = type("FakeDreoHandler", (_FakeDreoRequestHandler,), {"cloud": self})
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._http.daemon_threads = True
+        self._http_thread = threading.Thread(target=self._http.serve_forever, name="FakeDreoRest", daemon=True)
+        self._http_thread.start()
+
+        started = threading.Event()
+        self._ws_loop = asyncio.new_event_loop()
+        self._ws_thread = threading.Thread(target=self._run_ws, args=(started,), name="FakeDreoWs", daemon=True)
+        self._ws_thread.start()
+        started.wait(10)
+        return self
+
+    def stop(self) -> None:
+        """Shut down both servers."""
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+        if self._ws_loop is not None:
+            async def close():
+                self._ws_server.close()
+                await self._ws_server.wait_closed()
+
+            asyncio.run_coroutine_threadsafe(close(), self._ws_loop).result(10)
+            self._ws_loop.call_soon_threadsafe(self._ws_loop.stop)
+            self._ws_thread.join(10)
+            self._ws_loop.close()
+
+    def __enter__(self) -> "FakeDreoCloud":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------ REST
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _throttled(self) -> bool:
+        with self._lock:
+            self.rest_request_count += 1
+            if self.rest_rate_limit is None:
+                return False
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.rest_rate_limit:
+                self.throttled_count += 1
+                return True
+            return False
+
+    def handle_rest(self, method: str, path: str, query: dict, body: dict) -> tuple[int, dict]:
+        """Answer a REST call with (status, response body)."""
+        if self._throttled():
+            return 429, {"code": 429, "msg": "Too Many Requests"}
+        time.sleep(self._delay())
+
+        if method == "POST" and path == LOGIN_PATH:
+            return 200, {"code": 0, "msg": "OK",
+                         "data": {"region": self.region, "access_token": Defaults.token}}
+        if method == "GET" and path == DEVICE_LIST_PATH:
+            with self._lock:
+                devices = list(self._devices)
+            return 200, {"code": 0, "msg": "OK", "data": {"list": devices}}
+        if method == "GET" and path == DEVICE_STATE_PATH:
+            with self._lock:
+                state = self._states.get(query.get("deviceSn"))
+                return 200, copy.deepcopy(state) if state is not None else {}
+        if method == "GET" and path == SETTING_PATH:
+            key = (query.get("deviceSn"), query.get("dataKey"))
+            with self._lock:
+                if key not in self._settings:
+                    return 200, {}
+                return 200, {"code": 0, "msg": "OK",
+                             "data": {"dataKey": key[1], "dataValue": self._settings[key]}}
+        if method == "PUT" and path == SETTING_PATH:
+            device_sn = body.get("deviceSn")
+            with self._lock:
+                self._settings[(device_sn, body.get("dataKey"))] = body.get("dataValue")
+                state = self._states.get(device_sn)
+                return 200, copy.deepcopy(state) if state is not None else {"code": 0, "msg": "OK", "data": {}}
+        return 404, {"code": 404, "msg": "Not Found"}
+
+    # ------------------------------------------------------------------ WebSocket
+
+    def _run_ws(self, started: threading.Event) -> None:
+        asyncio.set_event_loop(self._ws_loop)
+
+        async def serve():
+            self._ws_server = await websockets.serve(self._ws_handler, "127.0.0.1", 0)
+            self._ws_port = self._ws_server.sockets[0].getsockname()[1]
+            started.set()
+
+        self._ws_loop.run_until_complete(serve())
+        self._ws_loop.run_forever()
+
+    async def _ws_handler(self, ws) -> None:
+        self.ws_connection_count += 1
+        self._ws_connections.add(ws)
+        control_frames = 0
+        try:
+            async for frame in ws:
+                if frame == "2":
+                    continue
+                message = json.loads(frame)
+                if message.get("method") != "control":
+                    continue
+                control_frames += 1
+                self._apply_control(message)
+                await asyncio.sleep(self._delay())
+                await ws.send(json.dumps({"devicesn": message["devicesn"],
+                                          "method": "control-report",
+                                          "reported": message.get("params", {})}))
+                if self.disconnect_every and control_frames >= self.disconnect_every:
+                    await ws.close()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._ws_connections.discard(ws)
+
+    def _apply_control(self, message: dict) -> None:
+        with self._lock:
+            self.received_commands.append(message)
+            state = self._states.get(message.get("devicesn"))
+            if state is None:
+                return
+            mixed = state["data"]["mixed"]
+            for key, value in message.get("params", {}).items():
+                mixed[key] = {**mixed.get(key, {}), "state": value}
+
+    def push_report(self, device_sn: str, reported: dict) -> None:
+        """Send a report to every connected client, as when a device changes on its own."""
+        with self._lock:
+            state = self._states.get(device_sn)
+            if state is not None:
+                for key, value in reported.items():
+                    state["data"]["mixed"][key] = {**state["data"]["mixed"].get(key, {}), "state": value}
+        frame = json.dumps({"devicesn": device_sn, "method": "report", "reported": reported})
+
+        async def send_all():
+            for ws in list(self._ws_connections):
+                await ws.send(frame)
+
+        asyncio.run_coroutine_threadsafe(send_all(), self._ws_loop).result(10)
+
+    def drop_connections(self) -> None:
+        """Close every open WebSocket, as a network blip or server restart would."""
+        async def close_all():
+            for ws in list(self._ws_connections):
+                await ws.close()
+
+        asyncio.run_coroutine_threadsafe(close_all(), self._ws_loop).result(10)
+
+
+class _FakeDreoRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to FakeDreoCloud.handle_rest."""
+
+    cloud : FakeDreoCloud = None
+
+    def _handle(self, method: str) -> None:
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = {}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = json.loads(self.rfile.read(length))
+        status, response = self.cloud.handle_rest(method, url.path, query, body)
+
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        """Handle GET."""
+        self._handle("GET")
+
+    def do_POST(self):
+        """Handle POST."""
+        self._handle("POST")
+
+    def do_PUT(self):
+        """Handle PUT."""
+        self._handle("PUT")
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        logger.debug("FakeDreoCloud: " + format, *args) # pylint: disable=logging-not-lazy
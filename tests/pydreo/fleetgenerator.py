@@ -0,0 +1,176 @@
+"""Synthetic fleets of Dreo devices, cloned from the api_responses fixtures.
+
+Each generated device is a copy of a fixture device with a unique sn/deviceId and a
+randomized (but valid) "mixed" state.  A fleet can be used as an in-memory
+debug_test_mode payload, written out as a debug_test_mode directory, or loaded into
+FakeDreoCloud:
+
+    fleet = FleetGenerator(seed=1).generate(1000)
+    manager = PyDreo("EMAIL", "PASSWORD", debug_test_mode=True, debug_test_mode_payload=fleet.payload())
+"""
+import copy
+import glob
+import json
+import os
+import random
+import re
+from dataclasses import dataclass
+
+from custom_components.dreo.pydreo.constant import SPEED_RANGE, WINDLEVEL_KEY
+from custom_components.dreo.pydreo.models import SUPPORTED_DEVICES, SUPPORTED_MODEL_PREFIXES
+
+from .call_json import get_response_from_file
+
+API_RESPONSES_PATH = "tests/pydreo/api_responses/"
+DEBUG_TEST_MODE_DIRECTORY_NAME = "e2e_test_data"
+DEBUG_TEST_MODE_DEVICES_FILE_NAME = "get_devices.json"
+
+# Fleet deviceIds are numbered from here so they never clash with the fixtures.
+DEVICE_ID_BASE = 9_000_000_000_000_000_000
+
+# State keys that are randomized within a range from the device definition.
+RANGED_STATE_KEYS = {WINDLEVEL_KEY: SPEED_RANGE}
+
+# State keys that identify or describe the device rather than its state; never randomized.
+FIXED_STATE_KEYS = frozenset(("connected", "wrong", "mcuon", "scheon", "timeron", "childlockon"))
+
+
+@dataclass
+class FleetTemplate:
+    """A fixture device and its devicestate response."""
+    model: str
+    device: dict
+    state: dict
+
+
+@dataclass
+class FleetDevice:
+    """A generated device list entry and its devicestate response."""
+    device: dict
+    state: dict
+
+    @property
+    def serial_number(self) -> str:
+        """The generated serial number."""
+        return self.device["sn"]
+
+
+class Fleet(list):
+    """A list of FleetDevice with helpers to feed it to PyDreo."""
+
+    def get_devices_response(self) -> dict:
+        """The devicelist response for the whole fleet."""
+        return {
+            "code": 0,
+            "msg": "OK",
+            "data": {
+                "currentPage": 1,
+                "pageSize": len(self),
+                "totalNum": len(self),
+                "totalPage": 1,
+                "list": [fleet_device.device for fleet_device in self],
+            },
+        }
+
+    def payload(self) -> dict:
+        """In-memory payload for PyDreo(debug_test_mode=True, debug_test_mode_payload=...)."""
+        payload = {"get_devices": self.get_devices_response()}
+        for fleet_device in self:
+            payload[fleet_device.serial_number] = fleet_device.state
+        return payload
+
+    def write_debug_test_mode_dir(self, base_dir: str) -> str:
+        """Write the fleet as a debug_test_mode directory under base_dir (as read by
+        debug_test_mode.get_debug_test_mode_payload).  Returns the directory path."""
+        directory = os.path.join(base_dir, DEBUG_TEST_MODE_DIRECTORY_NAME)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, DEBUG_TEST_MODE_DEVICES_FILE_NAME), "w", encoding="utf-8") as file:
+            json.dump(self.get_devices_response(), file)
+        for fleet_device in self:
+            with open(os.path.join(directory, f"{fleet_device.serial_number}.json"), "w", encoding="utf-8") as file:
+                json.dump(fleet_device.state, file)
+        return directory
+
+    def add_to_cloud(self, cloud) -> None:
+        """Load the fleet into a FakeDreoCloud."""
+        for fleet_device in self:
+            cloud.add_device(fleet_device.device, fleet_device.state)
+
+
+def load_templates() -> dict[str, FleetTemplate]:
+    """Every fixture device that has a devicestate fixture, keyed by model."""
+    templates = {}
+    for devices_file in sorted(glob.glob(f"{API_RESPONSES_PATH}get_devices_*.json")):
+        for device in get_response_from_file(os.path.basename(devices_file))["data"]["list"]:
+            state_file = f"get_device_state_{device['sn']}.json"
+            if not os.path.exists(API_RESPONSES_PATH + state_file):
+                continue
+            templates.setdefault(device["model"], FleetTemplate(device["model"], device,
+                                                                get_response_from_file(state_file)))
+    return templates
+
+
+def _device_ranges(model: str) -> dict:
+    """The device_ranges of the model's definition, looked up the way PyDreo does."""
+    definition = SUPPORTED_DEVICES.get(model)
+    if definition is None:
+        for prefix in SUPPORTED_MODEL_PREFIXES:
+            if model.startswith(prefix) and prefix in SUPPORTED_DEVICES:
+                definition = SUPPORTED_DEVICES[prefix]
+                break
+    if definition is None or not definition.device_ranges:
+        return {}
+    return definition.device_ranges
+
+
+class FleetGenerator:
+    """Clones fixture devices into fleets of any size and mix.
+
+    mix is a list of models (picked uniformly) or a dict of model -> weight; by default
+    every fixture model is used.  A seed makes fleets reproducible."""
+
+    def __init__(self, mix: list[str] | dict[str, float] | None = None, seed: int | None = None):
+        self.templates = load_templates()
+        if mix is None:
+            mix = list(self.templates)
+        if not isinstance(mix, dict):
+            mix = {model: 1 for model in mix}
+        unknown = set(mix) - set(self.templates)
+        if unknown:
+            raise ValueError(f"No fixtures for models: {sorted(unknown)}")
+        self._models = list(mix)
+        self._weights = [mix[model] for model in self._models]
+        self._random = random.Random(seed)
+
+    def generate(self, count: int) -> Fleet:
+        """Generate count devices."""
+        fleet = Fleet()
+        for index in range(count):
+            model = self._random.choices(self._models, self._weights)[0]
+            fleet.append(self._clone(self.templates[model], index))
+        return fleet
+
+    def _clone(self, template: FleetTemplate, index: int) -> FleetDevice:
+        device = copy.deepcopy(template.device)
+        serial_prefix = re.sub(r"_\d+$", "", template.device["sn"])
+        device["sn"] = f"{serial_prefix}_F{index:05d}"
+        device["deviceId"] = str(DEVICE_ID_BASE + index)
+        device["deviceName"] = f"{template.device.get('deviceName') or template.model} {index}"
+
+        state = copy.deepcopy(template.state)
+        ranges = _device_ranges(template.model)
+        for key, value in state.get("data", {}).get("mixed", {}).items():
+            if isinstance(value, dict) and "state" in value:
+                value["state"] = self._randomize(key, value["state"], ranges)
+        return FleetDevice(device, state)
+
+    def _randomize(self, key: str, value, ranges: dict):
+        """A random value for a state key that is still valid for the device."""
+        if key in FIXED_STATE_KEYS:
+            return value
+        if isinstance(value, bool):
+            return self._random.choice((True, False))
+        if isinstance(value, int) and key in RANGED_STATE_KEYS and RANGED_STATE_KEYS[key] in ranges:
+            low, high = ranges[RANGED_STATE_KEYS[key]]
+            return self._random.randint(low, high)
+        return value
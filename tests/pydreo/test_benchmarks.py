@@ -0,0 +1,223 @@
+"""Benchmarks for the device parsing and callback hot paths.
+
+Skipped unless PYDREO_BENCHMARK=1.  Results are compared against the JSON baselines in
+PYDREO_BENCHMARK_BASELINE (default tests/pydreo/benchmarks/baseline.json); a benchmark
+fails if it is more than PYDREO_BENCHMARK_TOLERANCE (default 1.0, i.e. 100%) slower than
+its baseline (and by more than PYDREO_BENCHMARK_NOISE_FLOOR seconds per call, default
+5e-6) on each of BENCHMARK_ATTEMPTS measurements.  Every benchmark fails if there are no
+baselines at all; one missing from the baselines (a new benchmark) is skipped.  Run with
+PYDREO_BENCHMARK_SAVE=1 to record new baselines instead.
+
+Timings only compare on the same machine, so baselines aren't committed.  The benchmark
+job in .github/workflows/pytest.yaml records them from the pull request's base branch and
+then checks the pull request against them on the same runner; locally:
+
+    PYDREO_BENCHMARK=1 PYDREO_BENCHMARK_SAVE=1 pytest tests/pydreo/test_benchmarks.py
+    PYDREO_BENCHMARK=1 pytest -rs tests/pydreo/test_benchmarks.py
+"""
+# pylint: disable=used-before-assignment
+import gc
+import glob
+import json
+import logging
+import os
+import statistics
+import time
+import pytest
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, API_REPONSE_BASE_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+BENCHMARK_ENABLED = os.environ.get("PYDREO_BENCHMARK") == "1"
+BENCHMARK_SAVE = os.environ.get("PYDREO_BENCHMARK_SAVE") == "1"
+BENCHMARK_TOLERANCE = float(os.environ.get("PYDREO_BENCHMARK_TOLERANCE", "1.0"))
+BENCHMARK_BASELINE_PATH = os.environ.get("PYDREO_BENCHMARK_BASELINE",
+                                         os.path.join(os.path.dirname(__file__), "benchmarks", "baseline.json"))
+# Differences smaller than this (seconds per call) are timer noise, not regressions.
+BENCHMARK_NOISE_FLOOR = float(os.environ.get("PYDREO_BENCHMARK_NOISE_FLOOR", "5e-6"))
+
+# Each timing run lasts at least BENCHMARK_MIN_RUN_TIME seconds; the median of
+# BENCHMARK_REPEAT runs is kept.
+BENCHMARK_MIN_RUN_TIME = 0.1
+BENCHMARK_REPEAT = 7
+
+# Times a benchmark is measured before a regression is reported.
+BENCHMARK_ATTEMPTS = 3
+
+# Features the Home Assistant platforms probe for.
+FEATURES = ("light_on", "brightness", "color_temperature", "temperature", "humidity",
+            "horizontally_oscillating", "display_auto_off", "panel_sound", "mute_on", "work_time")
+
+CALLBACK_FAN_OUT = (1, 10, 50)
+
+pytestmark = pytest.mark.skipif(not BENCHMARK_ENABLED, reason="Set PYDREO_BENCHMARK=1 to run benchmarks")
+
+
+def device_files() -> list[str]:
+    """get_devices fixtures whose device has a state fixture."""
+    files = []
+    for path in sorted(glob.glob(f"{API_REPONSE_BASE_PATH}get_devices_*.json")):
+        with open(path, encoding="utf-8") as file:
+            devices = json.load(file)["data"]["list"]
+        if all(os.path.exists(f"{API_REPONSE_BASE_PATH}get_device_state_{d['sn']}.json") for d in devices):
+            files.append(os.path.basename(path))
+    return files
+
+
+def measure(func, repeat: int = BENCHMARK_REPEAT) -> float:
+    """Median time per call, in seconds.  Like timeit, garbage collection is off while timing."""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(func, repeat)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _measure(func, repeat: int) -> float:
+    # Calibrate the iteration count the way timeit.autorange does.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= BENCHMARK_MIN_RUN_TIME:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return statistics.median(timings)
+
+
+class BenchmarkBaselines:
+    """Results of this run, checked against (or saved as) the stored baselines."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.baselines : dict[str, float] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.baselines = json.load(file)
+        self.results : dict[str, float] = {}
+
+    def check(self, name: str, func) -> None:
+        """Time func, record the result and fail if it regressed past the tolerance.  A result
+        over the limit is measured again (up to BENCHMARK_ATTEMPTS times in all) before failing,
+        since a real regression shows up every time and a noisy neighbour doesn't."""
+        baseline = self.baselines.get(name)
+        seconds = measure(func)
+        if BENCHMARK_SAVE:
+            self.results[name] = seconds
+            logger.info("%s: %.2f us", name, seconds * 1e6)
+            return
+        if not self.baselines:
+            pytest.fail(f"No baselines in {self.path}; record them first with PYDREO_BENCHMARK_SAVE=1")
+        if baseline is None:
+            pytest.skip(f"No baseline for {name} in {self.path} (new benchmark?)")
+        limit = max(baseline * (1 + BENCHMARK_TOLERANCE), baseline + BENCHMARK_NOISE_FLOOR)
+        for _ in range(BENCHMARK_ATTEMPTS - 1):
+            if seconds <= limit:
+                break
+            seconds = min(seconds, measure(func))
+        self.results[name] = seconds
+        logger.info("%s: %.2f us (baseline %.2f us)", name, seconds * 1e6, baseline * 1e6)
+        assert seconds <= limit, (
+            f"{name} regressed: {seconds * 1e6:.2f} us vs baseline {baseline * 1e6:.2f} us "
+            f"(tolerance {BENCHMARK_TOLERANCE:.0%})"
+        )
+
+    def save(self) -> None:
+        """Merge this run's results into the baseline file."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump({**self.baselines, **self.results}, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+
+@pytest.fixture(scope="module")
+def baselines():
+    """Baselines shared by the module; saved at the end if PYDREO_BENCHMARK_SAVE=1."""
+    results = BenchmarkBaselines(BENCHMARK_BASELINE_PATH)
+    yield results
+    if BENCHMARK_SAVE and results.results:
+        results.save()
+        logger.info("Saved %d benchmark baselines to %s", len(results.results), results.path)
+
+
+@pytest.fixture(name="quiet_library")
+def fixture_quiet_library():
+    """Measure with the library logging at WARNING, as it does in Home Assistant by default."""
+    library_logger = logging.getLogger(LOGGER_NAME)
+    level = library_logger.level
+    library_logger.setLevel(logging.WARNING)
+    yield
+    library_logger.setLevel(level)
+
+
+class TestBenchmarks(TestBase):
+    """Benchmarks per device class."""
+
+    def load_device(self, devices_file_name: str) -> PyDreoBaseDevice:
+        """Load the single device in a get_devices fixture."""
+        self.get_devices_file_name = devices_file_name
+        self.pydreo_manager.load_devices()
+        return self.pydreo_manager.devices[0]
+
+    @staticmethod
+    def mixed_state(device: PyDreoBaseDevice) -> dict:
+        """The REST mixed state the device was loaded from."""
+        return device.raw_state["data"]["mixed"]
+
+    @pytest.mark.parametrize("devices_file_name", device_files())
+    def test_parsing(self, devices_file_name, baselines, quiet_library): # pylint: disable=unused-argument
+        """update_state and handle_server_update_base on fixture data."""
+        device = self.load_device(devices_file_name)
+        name = type(device).__name__ + "." + device.model
+        mixed = self.mixed_state(device)
+        reported = {key: value[STATE_KEY] for key, value in mixed.items()
+                    if isinstance(value, dict) and STATE_KEY in value}
+        single_key = POWERON_KEY if POWERON_KEY in reported else next(iter(reported))
+        single_report = {"devicesn": device.serial_number, "method": "report",
+                         REPORTED_KEY: {single_key: reported[single_key]}}
+        full_report = {"devicesn": device.serial_number, "method": "report", REPORTED_KEY: reported}
+
+        baselines.check(f"{name}.update_state", lambda: device.update_state(mixed))
+        baselines.check(f"{name}.handle_server_update_base.single",
+                        lambda: device.handle_server_update_base(single_report))
+        baselines.check(f"{name}.handle_server_update_base.full",
+                        lambda: device.handle_server_update_base(full_report))
+
+    @pytest.mark.parametrize("devices_file_name", device_files())
+    def test_lookups(self, devices_file_name, baselines, quiet_library): # pylint: disable=unused-argument
+        """is_feature_supported, preset_mode and preset_modes."""
+        device = self.load_device(devices_file_name)
+        name = type(device).__name__ + "." + device.model
+
+        def feature_lookups():
+            for feature in FEATURES:
+                device.is_feature_supported(feature)
+
+        baselines.check(f"{name}.is_feature_supported", feature_lookups)
+        for attribute in ("preset_mode", "preset_modes"):
+            if hasattr(type(device), attribute):
+                baselines.check(f"{name}.{attribute}", lambda a=attribute: getattr(device, a))
+
+    @pytest.mark.parametrize("devices_file_name", device_files())
+    def test_callback_fan_out(self, devices_file_name, baselines, quiet_library): # pylint: disable=unused-argument
+        """_do_callbacks with 1, 10 and 50 subscribers."""
+        device = self.load_device(devices_file_name)
+        name = type(device).__name__ + "." + device.model
+        for subscribers in CALLBACK_FAN_OUT:
+            device._attr_cbs.clear() # pylint: disable=protected-access
+            for _ in range(subscribers):
+                device.add_attr_callback(lambda: None)
+            baselines.check(f"{name}._do_callbacks.{subscribers}",
+                            device._do_callbacks) # pylint: disable=protected-access
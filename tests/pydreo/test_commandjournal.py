@@ -0,0 +1,68 @@
+"""Tests for journaling commands while the WebSocket is disconnected."""
+import asyncio
+import time
+from custom_components.dreo.pydreo.commandjournal import CommandJournal
+from custom_components.dreo.pydreo.commandtransport import CommandTransport
+from .testbase import FakeWebSocket, control
+
+class TestCommandJournal:
+    """Test CommandJournal class."""
+
+    def test_collapses_per_device(self):
+        """Later values for a key replace earlier ones, one message per device."""
+        journal = CommandJournal()
+        journal.add(control("SN1", {"windlevel": 1}))
+        journal.add(control("SN2", {"poweron": False}))
+        journal.add(control("SN1", {"windlevel": 3, "oscon": True}))
+
+        messages = journal.drain()
+        assert [m["devicesn"] for m in messages] == ["SN2", "SN1"]
+        assert messages[1]["params"] == {"windlevel": 3, "oscon": True}
+        assert journal.collapsed_count == 1
+        assert len(journal) == 0
+
+    def test_expiry(self):
+        """Values older than the TTL are not flushed."""
+        journal = CommandJournal(ttl=0.05)
+        journal.add(control("SN1", {"windlevel": 1}))
+        time.sleep(0.1)
+        journal.add(control("SN1", {"poweron": True}))
+
+        messages = journal.drain()
+        assert messages[0]["params"] == {"poweron": True}
+        assert journal.expired_count == 1
+
+    def test_bounded(self):
+        """The least recently commanded device is dropped when the journal is full."""
+        journal = CommandJournal(max_devices=2)
+        journal.add(control("SN1", {"windlevel": 1}))
+        journal.add(control("SN2", {"windlevel": 2}))
+        journal.add(control("SN3", {"windlevel": 3}))
+
+        assert [m["devicesn"] for m in journal.drain()] == ["SN2", "SN3"]
+        assert journal.dropped_count == 1
+
+    def test_transport_journals_and_flushes(self):
+        """Commands sent while disconnected are journaled and flushed on the next socket."""
+        transport = CommandTransport(lambda message: None)
+        transport._transport_enabled = True # pylint: disable=protected-access
+
+        start = time.monotonic()
+        transport.send_message(control("SN1", {"poweron": False}))
+        transport.send_message(control("SN1", {"poweron": True}))
+        assert time.monotonic() - start < 1
+        assert len(transport.journal) == 1
+
+        ws = FakeWebSocket()
+
+        async def reconnect():
+            transport.scheduler.reset()
+            transport._submit_journal() # pylint: disable=protected-access
+            sender = asyncio.create_task(transport.scheduler.run(ws, transport.journal.add))
+            await asyncio.sleep(0.05)
+            sender.cancel()
+
+        asyncio.run(reconnect())
+        assert len(ws.sent) == 1
+        assert ws.messages[0]["params"] == {"poweron": True}
+        assert len(transport.journal) == 0
@@ -0,0 +1,51 @@
+"""Tests for awaitable commands confirmed by reported echo."""
+# pylint: disable=used-before-assignment
+import asyncio
+import logging
+import threading
+from unittest.mock import patch
+import pytest
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, PATCH_SEND_COMMAND
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestCommandTracker(TestBase):
+    """Test PyDreoBaseDevice.async_set."""
+
+    def echo_later(self, device_sn: str, reported: dict, delay: float = 0.05):
+        """Simulate the cloud reporting back a value from another thread."""
+        def report():
+            self.pydreo_manager._transport_consume_message( # pylint: disable=protected-access
+                {"devicesn": device_sn, "method": "report", "reported": reported})
+        threading.Timer(delay, report).start()
+
+    def test_async_set_confirmed(self):
+        """async_set resolves once the matching report arrives."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        fan = self.pydreo_manager.devices[0]
+
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            mock_send_command.side_effect = lambda device, params: self.echo_later(device.serial_number, params)
+            asyncio.run(fan.async_set(WINDLEVEL_KEY, 4, timeout=5))
+            mock_send_command.assert_called_once_with(fan, {WINDLEVEL_KEY: 4})
+
+        assert fan.fan_speed == 4
+        assert fan.command_ack_latency["count"] == 1
+        assert fan.command_ack_latency["last"] > 0
+
+    def test_async_set_ignores_other_values(self):
+        """A report with a different value doesn't confirm the command."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        fan = self.pydreo_manager.devices[0]
+
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            mock_send_command.side_effect = lambda device, params: self.echo_later(device.serial_number,
+                                                                                  {WINDLEVEL_KEY: 2})
+            with pytest.raises(CommandTimeoutError):
+                asyncio.run(fan.async_set(WINDLEVEL_KEY, 4, timeout=0.3))
+
+        assert fan.command_ack_latency["count"] == 0
@@ -0,0 +1,63 @@
+"""Tests for the device state event stream."""
+# pylint: disable=used-before-assignment
+import asyncio
+import logging
+from unittest.mock import patch
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, PATCH_SEND_COMMAND
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestDreoEvents(TestBase):
+    """Test the PyDreo events() stream."""
+
+    def test_report_and_optimistic_events(self):
+        """Reports and optimistic updates produce events with old and new values."""
+        fan = self.load_fan()
+        original_speed = fan.fan_speed
+
+        async def collect() -> list:
+            stream = self.pydreo_manager.events()
+            first = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0)
+
+            fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: original_speed + 1}})
+            # Same value again: nothing changed, so no event.
+            fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: original_speed + 1}})
+            self.pydreo_manager.optimistic_updates = True
+            with patch(PATCH_SEND_COMMAND):
+                fan.fan_speed = original_speed + 2
+
+            events = [await asyncio.wait_for(first, 5), await asyncio.wait_for(anext(stream), 5)]
+            await stream.aclose()
+            return events
+
+        report, optimistic = asyncio.run(collect())
+        assert report.serial_number == fan.serial_number
+        assert report.source == DreoEventSource.REPORT
+        assert report.changes == {WINDLEVEL_KEY: (original_speed, original_speed + 1)}
+        assert optimistic.source == DreoEventSource.OPTIMISTIC
+        assert optimistic.changes == {WINDLEVEL_KEY: (original_speed + 1, original_speed + 2)}
+        assert optimistic.timestamp >= report.timestamp
+        assert not self.pydreo_manager.event_bus.has_subscribers
+
+    def test_filter_narrows_keys(self):
+        """A key filter drops unrelated events and strips unrelated keys."""
+        fan = self.load_fan()
+        original_speed = fan.fan_speed
+
+        async def collect() -> DreoStateEvent:
+            event_filter = DreoEventFilter.create(keys=[WINDLEVEL_KEY])
+            subscription = self.pydreo_manager.event_bus.subscribe(event_filter, max_queue=1)
+            fan.handle_server_update_base({REPORTED_KEY: {POWERON_KEY: not fan.is_on}})
+            fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: original_speed + 1, POWERON_KEY: True}})
+            fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: original_speed + 2}})
+            await asyncio.sleep(0)
+            subscription.close()
+            assert subscription.dropped_count == 1
+            return await asyncio.wait_for(anext(subscription), 5)
+
+        event = asyncio.run(collect())
+        assert event.changed_keys == {WINDLEVEL_KEY}
+        assert event.changes[WINDLEVEL_KEY] == (original_speed + 1, original_speed + 2)
@@ -0,0 +1,73 @@
+"""End-to-end tests against the local fake Dreo cloud (real HTTP and WebSocket, no patching)."""
+# pylint: disable=used-before-assignment
+import logging
+import time
+from  .imports import * # pylint: disable=W0401,W0614
+from .fakecloud import FakeDreoCloud
+from .testbase import wait_for
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestFakeCloud:
+    """Drive PyDreo against FakeDreoCloud."""
+
+    def test_end_to_end(self):
+        """Login, device load, settings, commands and reports all go over the wire."""
+        with FakeDreoCloud(latency=0.01, jitter=0.005) as cloud:
+            cloud.add_devices_from_file("get_devices_HTF005S.json")
+            manager = PyDreo("EMAIL", "PASSWORD",
+                             api_base_url=cloud.api_base_url,
+                             ws_base_url=cloud.ws_base_url)
+            assert manager.login()
+            assert manager.load_devices()
+            fan : PyDreoTowerFan = manager.devices[0]
+            assert cloud.rest_request_count >= 3
+
+            manager.start_transport()
+            try:
+                assert wait_for(lambda: manager._transport.is_connected) # pylint: disable=protected-access
+                new_speed = fan.fan_speed + 1
+                fan.fan_speed = new_speed
+                assert wait_for(lambda: fan.fan_speed == new_speed)
+                assert cloud.get_state(fan.serial_number, WINDLEVEL_KEY) == new_speed
+
+                cloud.push_report(fan.serial_number, {WINDLEVEL_KEY: new_speed - 1})
+                assert wait_for(lambda: fan.fan_speed == new_speed - 1)
+
+                # Commands sent across a dropped connection still arrive after the reconnect.
+                cloud.drop_connections()
+                fan.fan_speed = new_speed
+                assert wait_for(lambda: fan.fan_speed == new_speed)
+                assert cloud.ws_connection_count >= 2
+            finally:
+                manager.stop_transport()
+
+    def test_settings_and_throttling(self):
+        """Settings round-trip over REST, and throttled GETs are retried after Retry-After."""
+        with FakeDreoCloud(rest_rate_limit=3) as cloud:
+            cloud.add_devices_from_file("get_devices_HTF005S.json")
+            cloud.set_setting("HTF005S_1", DreoDeviceSetting.FAN_TEMP_OFFSET, 2)
+            manager = PyDreo("EMAIL", "PASSWORD", api_base_url=cloud.api_base_url)
+            assert manager.login()
+            time.sleep(1)
+            assert manager.load_devices()
+            assert manager.load_deferred_settings(wait=True) == 1
+            fan = manager.devices[0]
+
+            time.sleep(1)
+            # Setting reads come from the settings store, and a successful write goes through to it.
+            requests_so_far = cloud.rest_request_count
+            assert manager.get_device_setting(fan, DreoDeviceSetting.FAN_TEMP_OFFSET) == 2
+            manager.set_device_setting(fan, DreoDeviceSetting.FAN_TEMP_OFFSET, -1)
+            assert cloud.get_setting(fan.serial_number, DreoDeviceSetting.FAN_TEMP_OFFSET) == -1
+            assert manager.get_device_setting(fan, DreoDeviceSetting.FAN_TEMP_OFFSET) == -1
+            assert fan.temperature_offset == -1
+            assert cloud.rest_request_count == requests_so_far + 1
+
+            time.sleep(1)
+            for _ in range(4):
+                response, _ = manager.call_dreo_api(DREO_API_DEVICELIST)
+                assert response is not None
+            assert cloud.throttled_count == 1
+            assert manager.metrics.value(f"rest.retries.{DREO_API_DEVICELIST}") == 1
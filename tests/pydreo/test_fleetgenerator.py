@@ -0,0 +1,47 @@
+"""Tests for the synthetic fleet generator."""
+# pylint: disable=used-before-assignment
+import json
+import logging
+import os
+from  .imports import * # pylint: disable=W0401,W0614
+from .fleetgenerator import FleetGenerator
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestFleetGenerator:
+    """Test FleetGenerator."""
+
+    def test_fleet_loads_in_debug_test_mode(self):
+        """A generated fleet has unique ids and loads through PyDreo."""
+        fleet = FleetGenerator(seed=1).generate(200)
+        assert len({d.serial_number for d in fleet}) == 200
+        assert len({d.device["deviceId"] for d in fleet}) == 200
+
+        manager = PyDreo("EMAIL", "PASSWORD", debug_test_mode=True, debug_test_mode_payload=fleet.payload())
+        assert manager.login()
+        assert manager.load_devices()
+        assert len(manager.devices) == 200
+
+        for device in manager.devices:
+            if isinstance(device, PyDreoTowerFan):
+                low, high = device.speed_range
+                assert low <= device.fan_speed <= high
+
+    def test_mix_and_seed(self):
+        """The mix restricts the models and the seed makes fleets reproducible."""
+        generator = FleetGenerator(mix={"DR-HTF005S": 3, "DR-HCF001S": 1}, seed=7)
+        fleet = generator.generate(40)
+        assert {d.device["model"] for d in fleet} == {"DR-HTF005S", "DR-HCF001S"}
+        again = FleetGenerator(mix={"DR-HTF005S": 3, "DR-HCF001S": 1}, seed=7).generate(40)
+        assert [d.state for d in fleet] == [d.state for d in again]
+
+    def test_write_debug_test_mode_dir(self, tmp_path):
+        """The fleet can be written out in the debug_test_mode directory layout."""
+        fleet = FleetGenerator(seed=3).generate(5)
+        directory = fleet.write_debug_test_mode_dir(str(tmp_path))
+        with open(os.path.join(directory, "get_devices.json"), encoding="utf-8") as file:
+            devices = json.load(file)["data"]["list"]
+        assert [d["sn"] for d in devices] == [d.serial_number for d in fleet]
+        for fleet_device in fleet:
+            assert os.path.exists(os.path.join(directory, f"{fleet_device.serial_number}.json"))
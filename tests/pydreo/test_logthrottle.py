@@ -0,0 +1,53 @@
+"""Tests for throttled logging."""
+# pylint: disable=used-before-assignment
+import logging
+from unittest.mock import patch
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase
+from custom_components.dreo.pydreo.logthrottle import LogThrottle
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+PATCH_MONOTONIC = "custom_components.dreo.pydreo.logthrottle.time.monotonic"
+
+class TestLogThrottle(TestBase):
+    """Test LogThrottle and its use by the device classes."""
+
+    def test_exponential_suppression(self, caplog):
+        """Repeats are suppressed for a doubling window and then summarized."""
+        throttle = LogThrottle(logging.getLogger(LOGGER_NAME), initial_window=10, max_window=25)
+        now = [1000.0]
+        with patch(PATCH_MONOTONIC, side_effect=lambda: now[0]), caplog.at_level(logging.ERROR):
+            assert throttle.log("SN1", logging.ERROR, "bad value %s", 1)
+            assert not throttle.log("SN1", logging.ERROR, "bad value %s", 2)
+            assert throttle.log("SN2", logging.ERROR, "bad value %s", 3)
+            now[0] += 11
+            assert throttle.log("SN1", logging.ERROR, "bad value %s", 4)
+            now[0] += 11
+            # The window doubled to 20s.
+            assert not throttle.log("SN1", logging.ERROR, "bad value %s", 5)
+            now[0] += 10
+            assert throttle.log("SN1", logging.ERROR, "bad value %s", 6)
+
+        messages = [r.getMessage() for r in caplog.records if r.levelno == logging.ERROR]
+        assert messages[0] == "bad value 1"
+        assert messages[2].startswith("bad value 4 (repeated 1 more times in the last 11s")
+        assert messages[3].startswith("bad value 6 (repeated 1 more times")
+        assert messages[3].endswith("next report in 25s)")
+
+        summary = throttle.summary()
+        assert summary[0] == {"key": "SN1", "message": "bad value %s", "count": 5,
+                              "suppressed_since_last_log": 0}
+
+    def test_unmapped_value_throttled(self, caplog):
+        """An unmapped state value only logs an error once per device."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        fan = self.pydreo_manager.devices[0]
+        state = {MODE_KEY: {STATE_KEY: 99}}
+        with caplog.at_level(logging.ERROR):
+            for _ in range(5):
+                assert fan.get_state_update_value_mapped(state, MODE_KEY, {1: "normal"}) is None
+        errors = [r for r in caplog.records if "not in mapping" in r.getMessage()]
+        assert len(errors) == 1
@@ -0,0 +1,99 @@
+"""Tests for the inbound WebSocket message dispatcher."""
+import threading
+import time
+from custom_components.dreo.pydreo.messagedispatcher import MessageDispatcher
+
+class TestMessageDispatcher:
+    """Test MessageDispatcher class."""
+
+    def test_per_device_ordering(self):
+        """Messages for one device are consumed in arrival order."""
+        consumed = []
+        dispatcher = MessageDispatcher(consumed.append, max_pending_per_device=100, merge_reports=False)
+        for i in range(50):
+            dispatcher.dispatch({"devicesn": "SN1", "reported": {"windlevel": i}})
+        assert dispatcher.wait_idle(5)
+        assert [m["reported"]["windlevel"] for m in consumed] == list(range(50))
+        dispatcher.stop()
+
+    def test_slow_device_does_not_block_others(self):
+        """A slow consumer for one device doesn't hold up another device."""
+        release = threading.Event()
+        fast_done = threading.Event()
+
+        def consumer(message):
+            if message["devicesn"] == "SLOW":
+                release.wait(5)
+            else:
+                fast_done.set()
+
+        dispatcher = MessageDispatcher(consumer)
+        start = time.monotonic()
+        dispatcher.dispatch({"devicesn": "SLOW"})
+        dispatcher.dispatch({"devicesn": "FAST"})
+        assert time.monotonic() - start < 1
+        assert fast_done.wait(5)
+        release.set()
+        assert dispatcher.wait_idle(5)
+        dispatcher.stop()
+
+    def test_consumer_exception_does_not_stop_queue(self):
+        """An exception in the consumer is logged and the next message still runs."""
+        consumed = []
+
+        def consumer(message):
+            if message["n"] == 0:
+                raise ValueError("boom")
+            consumed.append(message["n"])
+
+        dispatcher = MessageDispatcher(consumer)
+        dispatcher.dispatch({"devicesn": "SN1", "n": 0})
+        dispatcher.dispatch({"devicesn": "SN1", "n": 1})
+        assert dispatcher.wait_idle(5)
+        assert consumed == [1]
+        dispatcher.stop()
+
+    def test_reports_merge_while_queued(self):
+        """Reports queued behind a busy consumer are merged into one update."""
+        release = threading.Event()
+        consumed = []
+
+        def consumer(message):
+            release.wait(5)
+            consumed.append(message)
+
+        dispatcher = MessageDispatcher(consumer)
+        dispatcher.dispatch({"devicesn": "SN1", "method": "report", "reported": {"windlevel": 1}})
+        time.sleep(0.1)  # Let the worker pick up the first message and block.
+        dispatcher.dispatch({"devicesn": "SN1", "method": "report", "reported": {"windlevel": 2}})
+        dispatcher.dispatch({"devicesn": "SN1", "method": "report", "reported": {"poweron": True}})
+        dispatcher.dispatch({"devicesn": "SN1", "method": "report", "reported": {"windlevel": 3}})
+        release.set()
+        assert dispatcher.wait_idle(5)
+
+        assert len(consumed) == 2
+        assert consumed[1]["reported"] == {"windlevel": 3, "poweron": True}
+        assert dispatcher.merged_count == 2
+        assert dispatcher.dropped_count == 0
+        dispatcher.stop()
+
+    def test_full_queue_drops_oldest(self):
+        """Non-mergeable messages beyond the per-device limit drop the oldest."""
+        release = threading.Event()
+        consumed = []
+
+        def consumer(message):
+            release.wait(5)
+            consumed.append(message["n"])
+
+        dispatcher = MessageDispatcher(consumer, max_pending_per_device=2, merge_reports=False)
+        dispatcher.dispatch({"devicesn": "SN1", "n": 0})
+        time.sleep(0.1)
+        for i in range(1, 5):
+            dispatcher.dispatch({"devicesn": "SN1", "n": i})
+        release.set()
+        assert dispatcher.wait_idle(5)
+
+        assert consumed == [0, 3, 4]
+        assert dispatcher.dropped_count == 2
+        dispatcher.stop()
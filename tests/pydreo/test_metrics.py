@@ -0,0 +1,76 @@
+"""Tests for the runtime metrics registry."""
+# pylint: disable=used-before-assignment
+import logging
+from unittest.mock import patch
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, PATCH_BASE_PATH
+from custom_components.dreo.pydreo.metrics import (
+    MetricsRegistry,
+    METRIC_DEVICE_PARSE_TIME,
+    METRIC_DEVICE_CALLBACK_TIME
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestMetrics(TestBase):
+    """Test MetricsRegistry and its use in PyDreo."""
+
+    def test_registry(self):
+        """Counters, gauges and histograms show up in the snapshot."""
+        metrics = MetricsRegistry()
+        metrics.counter("rest.calls.login").inc()
+        metrics.counter("rest.calls.devicelist").inc(2)
+        metrics.gauge("pending", lambda: 4)
+        metrics.histogram("latency").observe(0.002)
+        metrics.histogram("latency").observe(20)
+
+        assert metrics.total("rest.calls") == 3
+        assert metrics.value("pending") == 4
+        assert metrics.value("missing") is None
+        snapshot = metrics.snapshot()
+        assert snapshot["counters"] == {"rest.calls.devicelist": 2, "rest.calls.login": 1}
+        latency = snapshot["histograms"]["latency"]
+        assert latency["count"] == 2
+        assert latency["buckets"]["le_0.005"] == 1
+        assert latency["buckets"]["le_inf"] == 1
+        assert latency["max"] == 20
+
+    def test_recent_mean(self):
+        """The recent mean follows a change in latency that the lifetime mean hides."""
+        histogram = MetricsRegistry().histogram("latency")
+        for _ in range(1000):
+            histogram.observe(0.1)
+        for _ in range(50):
+            histogram.observe(1.0)
+        assert histogram.mean < 0.15
+        assert histogram.recent_mean > 0.9
+
+    def test_device_update_timed(self):
+        """Server updates record parse and callback times."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        device = self.pydreo_manager.devices[0]
+        device.add_attr_callback(lambda: None)
+        device.handle_server_update_base({"devicesn": device.serial_number,
+                                          "method": "report",
+                                          REPORTED_KEY: {POWERON_KEY: True}})
+        metrics = self.pydreo_manager.metrics
+        assert metrics.histogram(METRIC_DEVICE_PARSE_TIME).count == 1
+        assert metrics.histogram(METRIC_DEVICE_CALLBACK_TIME).count == 1
+        assert metrics.value("command.suppressed") == 0
+
+
+class TestRestMetrics:
+    """Test the REST metrics recorded by call_dreo_api."""
+
+    def test_rest_calls_counted(self):
+        """call_dreo_api counts calls and errors per API."""
+        manager = PyDreo("EMAIL", "PASSWORD")
+        with patch(f"{PATCH_BASE_PATH}.Helpers.call_api", side_effect=[({}, 200), (None, None)]):
+            manager.call_dreo_api("devicelist")
+            manager.call_dreo_api("devicelist")
+        assert manager.metrics.value("rest.calls.devicelist") == 2
+        assert manager.metrics.value("rest.errors.devicelist") == 1
+        assert manager.metrics.histogram("rest.latency.devicelist").count == 2
+        assert manager.metrics.histogram("rest.latency").count == 2
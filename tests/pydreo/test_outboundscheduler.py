@@ -0,0 +1,146 @@
+"""Tests for outbound priority lanes."""
+import asyncio
+import json
+import time
+from custom_components.dreo.pydreo.outboundscheduler import OutboundScheduler, CommandLane, command_lane
+from custom_components.dreo.pydreo.ratelimiter import TokenBucket, AccountRateLimiter
+from .testbase import FakeWebSocket, control
+
+async def wait_until(condition, timeout: float = 5) -> bool:
+    """Yield to the event loop until condition() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return condition()
+
+class TestOutboundScheduler:
+    """Test OutboundScheduler class."""
+
+    def test_command_lane(self):
+        """Commands are classified by their params."""
+        assert command_lane({"poweron": False}) == CommandLane.SAFETY
+        assert command_lane({"childlockon": True}) == CommandLane.SAFETY
+        assert command_lane({"poweron": True}) == CommandLane.CONTROL
+        assert command_lane({"windlevel": 3}) == CommandLane.CONTROL
+        assert command_lane({"rgblevel": 2}) == CommandLane.COSMETIC
+        assert command_lane({"ledalwayson": True, "windlevel": 2}) == CommandLane.CONTROL
+
+    def test_safety_goes_first(self):
+        """A heater shutoff queued behind cosmetic tweaks is sent before them."""
+        scheduler = OutboundScheduler()
+        ws = FakeWebSocket()
+
+        async def run():
+            scheduler.reset()
+            scheduler.submit(CommandLane.KEEPALIVE, '2')
+            for i in range(40):
+                scheduler.submit_command(control(f"LIGHT{i}", {"rgblevel": i}))
+            scheduler.submit_command(control("HEATER", {"poweron": False}))
+            sender = asyncio.create_task(scheduler.run(ws, lambda content: None))
+            await asyncio.sleep(0.05)
+            sender.cancel()
+
+        asyncio.run(run())
+        first = json.loads(ws.sent[0])
+        assert first["devicesn"] == "HEATER"
+        assert '2' not in ws.sent[:2]
+
+    def test_lane_rate_limit(self):
+        """A rate limited lane is paced by its token bucket."""
+        scheduler = OutboundScheduler({CommandLane.COSMETIC: (20, 1)})
+        ws = FakeWebSocket()
+
+        async def run():
+            scheduler.reset()
+            for i in range(5):
+                scheduler.submit_command(control("SN1", {"rgblevel": i}))
+            sender = asyncio.create_task(scheduler.run(ws, lambda content: None))
+            await wait_until(lambda: len(ws.sent) == 5)
+            sender.cancel()
+
+        start = time.monotonic()
+        asyncio.run(run())
+        assert time.monotonic() - start >= 0.15
+        assert scheduler.sent_by_lane["COSMETIC"] == 5
+
+    def test_later_command_is_not_overtaken(self):
+        """Frames for a device keep their order across lanes; a shutoff drops what it overrides."""
+        scheduler = OutboundScheduler({CommandLane.CONTROL: (20, 1)})
+        ws = FakeWebSocket()
+
+        async def run():
+            scheduler.reset()
+            for i in range(3):
+                scheduler.submit_command(control("FAN", {"windlevel": i}))
+            scheduler.submit_command(control("HEATER", {"poweron": True}))
+            scheduler.submit_command(control("HEATER", {"htalevel": 2}))
+            scheduler.submit_command(control("HEATER", {"poweron": False}))
+            sender = asyncio.create_task(scheduler.run(ws, lambda content: None))
+            await wait_until(lambda: scheduler.pending == 0)
+            sender.cancel()
+
+        asyncio.run(run())
+        sent = [json.loads(frame) for frame in ws.sent]
+        # The queued poweron True is dropped; the level change still goes before the shutoff.
+        assert [m["params"] for m in sent if m["devicesn"] == "HEATER"] == [{"htalevel": 2}, {"poweron": False}]
+        assert [m["params"] for m in sent if m["devicesn"] == "FAN"] == \
+            [{"windlevel": 0}, {"windlevel": 1}, {"windlevel": 2}]
+        assert scheduler.superseded_count == 1
+
+    def test_keepalive_not_blocked_by_rate_limit(self):
+        """Keep-alives go out while rate limited commands wait."""
+        scheduler = OutboundScheduler({CommandLane.CONTROL: (5, 1)})
+        ws = FakeWebSocket()
+
+        async def run():
+            scheduler.reset()
+            for i in range(3):
+                scheduler.submit_command(control("SN1", {"windlevel": i}))
+            sender = asyncio.create_task(scheduler.run(ws, lambda content: None))
+            await wait_until(lambda: len(ws.sent) == 1)
+            # The next command has to wait ~0.2s for its token; the keep-alive doesn't.
+            scheduler.submit(CommandLane.KEEPALIVE, '2')
+            await wait_until(lambda: len(ws.sent) == 2, timeout=0.1)
+            keepalive_sent = list(ws.sent)
+            await wait_until(lambda: scheduler.pending == 0)
+            sender.cancel()
+            return keepalive_sent
+
+        keepalive_sent = asyncio.run(run())
+        assert keepalive_sent[1] == '2'
+        assert len(ws.sent) == 4
+
+    def test_token_bucket_wait_time(self):
+        """The bucket reports how long the next caller would wait."""
+        bucket = TokenBucket(rate=10, capacity=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.wait_time > 0
+        assert bucket.reserve() > 0
+
+    def test_shared_account_bucket(self):
+        """The account's WebSocket bucket paces every lane but keep-alives, and can be retuned."""
+        limiter = AccountRateLimiter(websocket_rate=(20, 1))
+        scheduler = OutboundScheduler({}, shared_bucket=limiter.websocket)
+        ws = FakeWebSocket()
+
+        async def run():
+            scheduler.reset()
+            for i in range(3):
+                scheduler.submit_command(control("SN1", {"windlevel": i}))
+                scheduler.submit_command(control(f"HEATER{i}", {"poweron": False}))
+            scheduler.submit(CommandLane.KEEPALIVE, '2')
+            sender = asyncio.create_task(scheduler.run(ws, lambda content: None))
+            await wait_until(lambda: len(ws.sent) == 7)
+            sender.cancel()
+
+        start = time.monotonic()
+        asyncio.run(run())
+        assert time.monotonic() - start >= 0.25
+        assert limiter.wait_times()["websocket"] > 0
+        assert scheduler.wait_time(CommandLane.KEEPALIVE) == 0
+
+        limiter.configure(websocket_rate=(1000, 50))
+        time.sleep(0.01)
+        assert limiter.websocket.capacity == 50
+        assert limiter.wait_times()["websocket"] == 0
@@ -0,0 +1,154 @@
+"""Tests for behaviour shared by all devices in PyDreoBaseDevice."""
+# pylint: disable=used-before-assignment
+import logging
+import time
+from unittest.mock import patch, call, MagicMock
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, PATCH_SEND_COMMAND
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestPyDreoBaseDevice(TestBase):
+    """Test PyDreoBaseDevice class."""
+
+    def test_optimistic_update_confirmed(self):
+        """With optimistic updates on, the value is applied immediately and kept once reported."""
+        fan = self.load_fan()
+        self.pydreo_manager.optimistic_updates = True
+        callback = MagicMock()
+        fan.add_attr_callback(callback)
+        original_speed = fan.fan_speed
+
+        with patch(PATCH_SEND_COMMAND):
+            fan.fan_speed = original_speed + 1
+        assert fan.fan_speed == original_speed + 1
+        assert fan.is_pending(WINDLEVEL_KEY)
+        callback.assert_called_once()
+
+        fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: original_speed + 1}})
+        assert not fan.is_pending(WINDLEVEL_KEY)
+        assert fan.fan_speed == original_speed + 1
+
+    def test_optimistic_update_rolls_back(self):
+        """An unconfirmed optimistic value is rolled back to the last confirmed one."""
+        fan = self.load_fan()
+        self.pydreo_manager.optimistic_updates = True
+        self.pydreo_manager.optimistic_timeout = 0.1
+        callback = MagicMock()
+        fan.add_attr_callback(callback)
+        original_speed = fan.fan_speed
+
+        with patch(PATCH_SEND_COMMAND):
+            fan.fan_speed = original_speed + 1
+        assert fan.fan_speed == original_speed + 1
+
+        deadline = time.monotonic() + 5
+        while fan.is_pending(WINDLEVEL_KEY) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        # The value is back as soon as the update stops being pending; listeners follow.
+        assert fan.fan_speed == original_speed
+        while callback.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert callback.call_count == 2
+
+    def test_report_during_rollback_wins(self):
+        """A report that settles the key before the rollback timer fires is never overwritten."""
+        fan = self.load_fan()
+        self.pydreo_manager.optimistic_updates = True
+        self.pydreo_manager.optimistic_timeout = 60
+        original_speed = fan.fan_speed
+
+        with patch(PATCH_SEND_COMMAND):
+            fan.fan_speed = original_speed + 1
+        fan.handle_server_update_base({"devicesn": fan.serial_number, "method": "report",
+                                       REPORTED_KEY: {WINDLEVEL_KEY: original_speed + 2}})
+        # The timer firing late finds nothing to roll back.
+        fan._rollback_optimistic(WINDLEVEL_KEY, original_speed + 1) # pylint: disable=protected-access
+        assert fan.fan_speed == original_speed + 2
+        assert not fan.is_pending(WINDLEVEL_KEY)
+
+    def test_rollback_runs_overrides_outside_the_lock(self):
+        """A handle_server_update override that checks pending state doesn't deadlock a rollback."""
+        fan = self.load_fan()
+        self.pydreo_manager.optimistic_updates = True
+        self.pydreo_manager.optimistic_timeout = 0.05
+        original_speed = fan.fan_speed
+        handle_server_update = fan.handle_server_update
+        seen_pending = []
+
+        def checking_handle_server_update(message):
+            seen_pending.append(fan.is_pending(WINDLEVEL_KEY))
+            handle_server_update(message)
+
+        fan.handle_server_update = checking_handle_server_update
+        with patch(PATCH_SEND_COMMAND):
+            fan.fan_speed = original_speed + 1
+
+        deadline = time.monotonic() + 5
+        while len(seen_pending) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert seen_pending == [True, False]
+        assert fan.fan_speed == original_speed
+
+    def test_optimistic_updates_off_by_default(self):
+        """Without optimistic updates the value only changes when reported."""
+        fan = self.load_fan()
+        original_speed = fan.fan_speed
+
+        with patch(PATCH_SEND_COMMAND):
+            fan.fan_speed = original_speed + 1
+        assert fan.fan_speed == original_speed
+        assert not fan.is_pending(WINDLEVEL_KEY)
+
+    def test_redundant_command_suppression(self):
+        """With suppression on, re-asserting the confirmed value isn't sent unless forced."""
+        fan = self.load_fan()
+        self.pydreo_manager.suppress_redundant_commands = True
+        current_speed = fan.fan_speed
+
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan.fan_speed = current_speed
+            mock_send_command.assert_not_called()
+        assert self.pydreo_manager.suppressed_command_count == 1
+
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan.fan_speed = current_speed + 1
+            mock_send_command.assert_called_once_with(fan, {WINDLEVEL_KEY: current_speed + 1})
+
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan._send_command(WINDLEVEL_KEY, current_speed, force=True) # pylint: disable=protected-access
+            mock_send_command.assert_called_once_with(fan, {WINDLEVEL_KEY: current_speed})
+
+        # Reports update the confirmed value used for comparison, and settle the outstanding commands.
+        fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: current_speed}})
+        fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: current_speed + 1}})
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan.fan_speed = current_speed + 1
+            mock_send_command.assert_not_called()
+        assert self.pydreo_manager.suppressed_command_count == 2
+
+    def test_revert_before_echo_is_sent(self):
+        """Setting a value and reverting it before the device echoes the first command sends both."""
+        fan = self.load_fan()
+        self.pydreo_manager.suppress_redundant_commands = True
+        fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: 1}})
+
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan.fan_speed = 3
+            fan.fan_speed = 1
+            assert mock_send_command.call_args_list == [call(fan, {WINDLEVEL_KEY: 3}), call(fan, {WINDLEVEL_KEY: 1})]
+
+        # Once both are echoed, re-asserting the confirmed value is redundant again.
+        fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: 3}})
+        fan.handle_server_update_base({REPORTED_KEY: {WINDLEVEL_KEY: 1}})
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan.fan_speed = 1
+            mock_send_command.assert_not_called()
+
+    def test_redundant_command_suppression_off_by_default(self):
+        """Without suppression, every command is sent."""
+        fan = self.load_fan()
+        with patch(PATCH_SEND_COMMAND) as mock_send_command:
+            fan.fan_speed = fan.fan_speed
+            mock_send_command.assert_called_once()
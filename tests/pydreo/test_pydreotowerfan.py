@@ -23,6 +23,9 @@ class TestPyDreoTowerFan(TestBase):
         assert fan.preset_modes == ['normal', 'natural', 'sleep', 'auto']
         assert fan.oscillating is True
         assert fan.is_feature_supported("temperature_offset") is True
+        # The calibration setting is loaded after start up.
+        assert fan.temperature_offset == 0
+        assert self.pydreo_manager.load_deferred_settings(wait=True) == 1
         assert fan.temperature_offset == -2
 
         with patch(PATCH_SEND_COMMAND) as mock_send_command:
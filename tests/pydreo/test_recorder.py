@@ -0,0 +1,84 @@
+"""Tests for recording and replaying WebSocket traffic."""
+# pylint: disable=used-before-assignment
+import json
+import logging
+import time
+from custom_components.dreo.pydreo.recorder import (
+    TrafficRecorder,
+    read_recording,
+    replay_recording,
+    RECORD_INBOUND,
+    RECORD_OUTBOUND,
+    RECORD_SESSION
+)
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestTrafficRecorder(TestBase):
+    """Test TrafficRecorder and PyDreo replay."""
+
+    def test_record_redacts_and_appends(self, tmp_path):
+        """Frames are appended with offsets and direction, and sensitive values are blanked."""
+        path = tmp_path / "traffic.jsonl"
+        with TrafficRecorder(str(path)) as recorder:
+            recorder.record(RECORD_OUTBOUND, '{"token":"secret","devicesn":"SN1"}')
+            recorder.record(RECORD_INBOUND, '{"devicesn": "SN1", "email": "me@example.com"}')
+        with TrafficRecorder(str(path)) as recorder:
+            recorder.record(RECORD_INBOUND, "2")
+
+        frames = [frame for frame in read_recording(str(path)) if frame[1] != RECORD_SESSION]
+        assert [direction for _, direction, _ in frames] == [RECORD_OUTBOUND, RECORD_INBOUND, RECORD_INBOUND]
+        assert "secret" not in path.read_text(encoding="utf-8")
+        assert "me@example.com" not in path.read_text(encoding="utf-8")
+        assert json.loads(frames[0][2])["devicesn"] == "SN1"
+
+    def test_replay_through_pydreo(self, tmp_path):
+        """Recorded inbound frames update devices when replayed."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        fan = self.pydreo_manager.devices[0]
+        new_speed = fan.fan_speed + 1
+
+        path = tmp_path / "traffic.jsonl"
+        transport = CommandTransport(lambda _: None)
+        transport.recorder = TrafficRecorder(str(path))
+        frame = json.dumps({"devicesn": fan.serial_number,
+                            "method": "report",
+                            "reported": {WINDLEVEL_KEY: new_speed}})
+        transport._ws_consume_frame(frame) # pylint: disable=protected-access
+        transport.recorder.close()
+        transport.stop_transport()
+
+        assert self.pydreo_manager.replay_recording(str(path), speed=None) == 1
+        assert fan.fan_speed == new_speed
+
+    def test_replay_speed(self, tmp_path):
+        """Replay keeps the recorded spacing divided by the speed."""
+        path = tmp_path / "traffic.jsonl"
+        path.write_text('[0,"in","a"]\n[0.2,"out","b"]\n[0.4,"in","c"]\n{truncated', encoding="utf-8")
+
+        consumed = []
+        start = time.monotonic()
+        assert replay_recording(str(path), consumed.append, speed=2) == 2
+        elapsed = time.monotonic() - start
+        assert consumed == ["a", "c"]
+        assert 0.19 <= elapsed < 1
+
+    def test_replay_appended_sessions(self, tmp_path):
+        """A session appended to a recording replays from its own start, not the first one's."""
+        path = tmp_path / "traffic.jsonl"
+        path.write_text('[0,"session","2026-01-01T00:00:00"]\n[0.4,"in","a"]\n'
+                        '[0,"session","2026-01-02T00:00:00"]\n[0.2,"in","b"]\n'
+                        # An older recording without markers: the offsets go back.
+                        '[0.3,"in","c"]\n[0.1,"in","d"]\n', encoding="utf-8")
+
+        consumed = []
+        start = time.monotonic()
+        assert replay_recording(str(path), consumed.append, speed=2) == 4
+        elapsed = time.monotonic() - start
+        assert consumed == ["a", "b", "c", "d"]
+        # 0.2s for a, then 0.1s for b, 0.05s more for c, and d right away.
+        assert 0.34 <= elapsed < 0.6
@@ -0,0 +1,35 @@
+"""Tests for refreshing the device list without reloading"""
+# pylint: disable=used-before-assignment
+import logging
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestRefreshDevices(TestBase):
+    """Test PyDreo.refresh_devices."""
+
+    def test_refresh_devices(self):
+        """Devices added to and removed from the account are picked up; the rest are kept."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        assert len(self.pydreo_manager.devices) == 1
+        fan = self.pydreo_manager.devices[0]
+
+        # Nothing changed.
+        assert self.pydreo_manager.refresh_devices() == ([], [])
+        assert self.pydreo_manager.devices == [fan]
+
+        # The fan was swapped for a heater in the Dreo app.
+        self.get_devices_file_name = "get_devices_HSH009S.json"
+        added, removed = self.pydreo_manager.refresh_devices()
+        assert [device.serial_number for device in added] == ["HSH009S_1"]
+        assert removed == [fan]
+        heater = added[0]
+        assert self.pydreo_manager.devices == [heater]
+        assert heater.htalevel_range == (1, 3)
+
+        # The existing heater object is left alone on the next refresh.
+        assert self.pydreo_manager.refresh_devices() == ([], [])
+        assert self.pydreo_manager.devices[0] is heater
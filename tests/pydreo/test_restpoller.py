@@ -0,0 +1,81 @@
+"""Tests for REST polling while the WebSocket is down."""
+# pylint: disable=used-before-assignment
+import logging
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, wait_for
+from custom_components.dreo.pydreo.restpoller import DegradedModePoller
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestDegradedModePoller(TestBase):
+    """Test DegradedModePoller and its use by PyDreo."""
+
+    def test_polls_only_while_websocket_down(self):
+        """Devices are polled once the WebSocket has been down long enough, and no longer once it's back."""
+        self.get_devices_file_name = "get_devices_HSH009S.json"
+        self.pydreo_manager.load_devices()
+        heater = self.pydreo_manager.devices[0]
+        refreshed = []
+        heater.add_attr_callback(lambda: refreshed.append(heater.available))
+
+        disconnected_for = [0.0]
+        polled = []
+        def poll(device):
+            polled.append(device)
+            return self.pydreo_manager.load_device_state(device)
+
+        poller = DegradedModePoller(lambda: disconnected_for[0], lambda: self.pydreo_manager.devices, poll,
+                                    degraded_after=60, active_interval=30, idle_interval=300)
+        self.pydreo_manager.degraded_poller = poller
+
+        # WebSocket is fine, or only briefly down: nothing is polled.
+        assert poller.check() == 0
+        disconnected_for[0] = 10
+        assert poller.check() == 0
+        assert not poller.degraded
+
+        # Down too long: every device is polled, then not again until its interval passes.
+        disconnected_for[0] = 61
+        assert poller.check() == 1
+        assert poller.degraded
+        assert wait_for(lambda: poller.poll_count == 1)
+        assert polled == [heater]
+        assert wait_for(lambda: refreshed == [True])
+        assert poller.check() == 0
+        assert 0 < poller.as_dict()["next_poll"][heater.serial_number] <= poller.interval_for(heater)
+
+        # Back up: polling stops.
+        disconnected_for[0] = 0
+        assert poller.check() == 0
+        assert not poller.degraded
+        assert poller.as_dict()["next_poll"] == {}
+        poller.stop()
+
+    def test_failed_poll_marks_device_unavailable(self):
+        """Running devices are polled more often; a device that can't be polled is unavailable until the WebSocket returns."""
+        self.get_devices_file_name = "get_devices_HSH009S.json"
+        self.pydreo_manager.load_devices()
+        heater = self.pydreo_manager.devices[0]
+        heater._is_on = True # pylint: disable=protected-access
+        refreshed = []
+        heater.add_attr_callback(lambda: refreshed.append(heater.available))
+
+        results = [False]
+        poller = DegradedModePoller(lambda: 120.0, lambda: self.pydreo_manager.devices, lambda device: results[0],
+                                    active_interval=30, idle_interval=300)
+        self.pydreo_manager.degraded_poller = poller
+
+        assert poller.interval_for(heater) == 30
+        poller.check()
+        assert wait_for(lambda: poller.failure_count == 1)
+        assert wait_for(lambda: refreshed == [False])
+        assert not heater.available
+        # Failed polls back off to the idle interval.
+        assert poller.interval_for(heater) == 300
+
+        poller._disconnected_for = lambda: 0.0 # pylint: disable=protected-access
+        poller.check()
+        assert heater.available
+        assert refreshed == [False, True]
+        poller.stop()
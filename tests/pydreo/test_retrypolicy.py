@@ -0,0 +1,121 @@
+"""Tests for REST retries, backoff and the circuit breaker."""
+# pylint: disable=used-before-assignment
+import logging
+from unittest.mock import patch, MagicMock
+import pytest
+import requests
+from  .imports import * # pylint: disable=W0401,W0614
+from custom_components.dreo.pydreo.helpers import Helpers
+from custom_components.dreo.pydreo.retrypolicy import RetryPolicy, CircuitBreaker, parse_retry_after
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+PATCH_REQUESTS = "custom_components.dreo.pydreo.helpers.requests"
+PATCH_SLEEP = "custom_components.dreo.pydreo.helpers.time.sleep"
+URL = "https://app-api-us.example.com"
+POLICY = RetryPolicy(max_attempts=3, backoff_base=0.1, backoff_cap=0.2)
+
+
+def response(status: int, body: bytes = b"{}", headers: dict = None) -> MagicMock:
+    """A fake requests.Response."""
+    r = MagicMock()
+    r.status_code = status
+    r.content = body
+    r.json.return_value = {}
+    r.headers = headers or {}
+    return r
+
+
+@pytest.fixture(name="mock_sleep", autouse=True)
+def fixture_mock_sleep():
+    """Don't actually wait between retries."""
+    with patch(PATCH_SLEEP) as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.fixture(name="mock_requests")
+def fixture_mock_requests():
+    """Patch requests (keeping its exception classes), with fresh circuit breakers."""
+    CircuitBreaker.reset_all()
+    with patch(PATCH_REQUESTS) as mock_requests:
+        mock_requests.exceptions = requests.exceptions
+        yield mock_requests
+    CircuitBreaker.reset_all()
+
+
+class TestRetryPolicy:
+    """Test Helpers.call_api retries and the circuit breaker."""
+
+    def test_get_retried_on_5xx(self, mock_requests, mock_sleep):
+        """Idempotent GETs are retried with jittered backoff after a 5xx."""
+        mock_requests.get.side_effect = [response(503), response(502), response(200)]
+        reasons = []
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, POLICY, reasons.append) == ({}, 200)
+        assert reasons == ["HTTP 503", "HTTP 502"]
+        for call in mock_sleep.call_args_list:
+            assert 0 <= call.args[0] <= 0.2
+        assert mock_requests.get.call_args.kwargs["timeout"] == (POLICY.connect_timeout, POLICY.read_timeout)
+
+    def test_put_not_retried_on_5xx(self, mock_requests):
+        """Non-idempotent calls aren't retried once they may have been processed."""
+        mock_requests.put.side_effect = [response(500), response(200)]
+        assert Helpers.call_api(URL, "/setting", "put", {}, {}, POLICY) == (None, None)
+        mock_requests.put.side_effect = [requests.exceptions.ConnectTimeout(), response(200)]
+        assert Helpers.call_api(URL, "/setting", "put", {}, {}, POLICY) == ({}, 200)
+
+    def test_retry_after(self, mock_requests, mock_sleep):
+        """A 429's Retry-After is honoured, and one that is too long ends the call."""
+        mock_requests.get.side_effect = [response(429, headers={"Retry-After": "2"}), response(200)]
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, POLICY) == ({}, 200)
+        mock_sleep.assert_called_once_with(2.0)
+
+        mock_requests.get.side_effect = [response(429, headers={"Retry-After": "3600"}), response(200)]
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, POLICY) == (None, None)
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+    def test_circuit_breaker(self, mock_requests):
+        """Repeated failures open the host's circuit; a trial call after the timeout closes it."""
+        mock_requests.get.side_effect = requests.exceptions.ConnectionError()
+        single = RetryPolicy(max_attempts=1)
+        for _ in range(5):
+            assert Helpers.call_api(URL, "/state", "get", {}, {}, single) == (None, None)
+        breaker = CircuitBreaker.for_host("app-api-us.example.com")
+        assert breaker.state == "open"
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, single) == (None, None)
+        assert mock_requests.get.call_count == 5
+
+        breaker.reset_timeout = 0
+        mock_requests.get.side_effect = [response(200)]
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, single) == ({}, 200)
+        assert breaker.state == "closed"
+
+    def test_backoff_budget(self, mock_requests, mock_sleep):
+        """All of a call's waits together stay within max_total_backoff."""
+        mock_requests.get.side_effect = [response(429, headers={"Retry-After": "4"}),
+                                         response(429, headers={"Retry-After": "4"}),
+                                         response(200)]
+        budget = RetryPolicy(max_attempts=3, max_total_backoff=5)
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, budget) == (None, None)
+        mock_sleep.assert_called_once_with(4.0)
+
+    def test_throttling_trips_circuit(self, mock_requests):
+        """429s count as failures, so a throttled account stops calling for a while."""
+        mock_requests.get.side_effect = lambda *args, **kwargs: response(429)
+        single = RetryPolicy(max_attempts=1)
+        for _ in range(5):
+            assert Helpers.call_api(URL, "/state", "get", {}, {}, single) == (None, None)
+        assert CircuitBreaker.for_host("app-api-us.example.com").state == "open"
+
+    def test_unexpected_error_ends_trial(self, mock_requests):
+        """A half open trial that raises something unexpected doesn't leave the circuit stuck."""
+        breaker = CircuitBreaker.for_host("app-api-us.example.com")
+        breaker.reset_timeout = 0
+        for _ in range(5):
+            breaker.record_failure()
+        mock_requests.get.side_effect = [ValueError("bad"), response(200)]
+        single = RetryPolicy(max_attempts=1)
+        with pytest.raises(ValueError):
+            Helpers.call_api(URL, "/state", "get", {}, {}, single)
+        assert Helpers.call_api(URL, "/state", "get", {}, {}, single) == ({}, 200)
+        assert breaker.state == "closed"
@@ -0,0 +1,77 @@
+"""Tests for the per device settings store."""
+# pylint: disable=used-before-assignment
+import logging
+import os
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase, wait_for
+from custom_components.dreo.pydreo.settingsstore import DeviceSettingsStore
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestDeviceSettingsStore(TestBase):
+    """Test DeviceSettingsStore and its use by PyDreo."""
+
+    def test_fetch_once_then_memory(self):
+        """The first read fetches; later reads are memory lookups until the TTL passes."""
+        fetched = []
+        values = {"key": 1}
+
+        def fetch(serial_number, key):
+            fetched.append((serial_number, key))
+            return values.get(key)
+
+        changes = []
+        store = DeviceSettingsStore(fetch, ttl=60)
+        store.add_listener(lambda sn, key, value: changes.append((sn, key, value)))
+        assert store.get("SN", "key", timeout=5) == 1
+        assert store.get("SN", "key") == 1
+        assert len(fetched) == 1
+
+        # Without a timeout a missing value doesn't wait for the fetch.
+        assert store.get("SN", "other", default=0) == 0
+
+        # Stale values are returned straight away and refreshed in the background.
+        store.ttl = 0
+        values["key"] = 2
+        assert store.get("SN", "key") == 1
+        assert wait_for(lambda: store.peek("SN", "key") == 2)
+        assert changes == [("SN", "key", 1), ("SN", "key", 2)]
+        store.shutdown()
+
+    def test_persistence(self, tmp_path):
+        """Values survive a restart through the JSON file, written once per batch of changes."""
+        path = str(tmp_path / "settings.json")
+        store = DeviceSettingsStore(lambda sn, key: None, path=path, save_delay=60)
+        store.put("SN", "kHafFanTempOffsetKey", -2)
+        store.put("SN", "kHafFanTempOffsetKey", -1)
+        store.put("SN", "kHafFanTempOffsetKey", -2)
+        assert store.save_count == 0
+        store.shutdown()
+        assert store.save_count == 1
+        assert os.listdir(tmp_path) == ["settings.json"]
+
+        restored = DeviceSettingsStore(lambda sn, key: None)
+        assert restored.load(path) == 1
+        assert restored.is_fresh("SN", "kHafFanTempOffsetKey")
+        assert restored.get("SN", "kHafFanTempOffsetKey") == -2
+
+        # Forgetting a device is saved too.
+        store.forget("SN")
+        store.flush()
+        assert DeviceSettingsStore(lambda sn, key: None).load(path) == 0
+
+    def test_temperature_offset_from_store(self):
+        """temperature_offset reads the store, and a new stored value triggers the device callbacks."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        fan = self.pydreo_manager.devices[0]
+        callbacks = []
+        fan.add_attr_callback(lambda: callbacks.append(True))
+        self.pydreo_manager.load_deferred_settings(wait=True)
+        original = fan.temperature_offset
+
+        self.pydreo_manager.settings_store.put(fan.serial_number, DreoDeviceSetting.FAN_TEMP_OFFSET,
+                                               original + 1)
+        assert fan.temperature_offset == original + 1
+        assert callbacks
@@ -0,0 +1,59 @@
+"""Tests for coalescing of identical REST calls."""
+# pylint: disable=used-before-assignment
+import logging
+import threading
+import time
+from unittest.mock import patch
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import PATCH_BASE_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+SETTING = {DEVICESN_KEY: "SN1", DREO_API_SETTING_DATA_KEY: "kHafFanTempOffsetKey"}
+
+def setting_response(value) -> tuple:
+    """A setting_get response."""
+    return ({"code": 0, "data": {DREO_API_SETTING_DATA_VALUE: value}}, 200)
+
+class TestSingleFlight:
+    """Test the single-flight layer in call_dreo_api."""
+
+    def test_concurrent_gets_coalesced(self):
+        """Concurrent identical GETs make one network call and all get the result."""
+        manager = PyDreo("EMAIL", "PASSWORD")
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_call(*_args, **_kwargs):
+            started.set()
+            release.wait(5)
+            return setting_response(2)
+
+        results = []
+        with patch(f"{PATCH_BASE_PATH}.Helpers.call_api", side_effect=slow_call) as call_api:
+            threads = [threading.Thread(target=lambda: results.append(
+                manager.call_dreo_api(DREO_API_SETTING_GET, dict(SETTING)))) for _ in range(5)]
+            threads[0].start()
+            started.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            while manager.metrics.value("rest.coalesced") < 4:
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+            assert call_api.call_count == 1
+            assert [r[0]["data"][DREO_API_SETTING_DATA_VALUE] for r in results] == [2] * 5
+            # Each caller has its own copy.
+            assert len({id(r[0]) for r in results}) == 5
+
+    def test_sequential_gets_not_cached(self):
+        """A GET after the previous one finished goes to the network, so an error isn't reused."""
+        manager = PyDreo("EMAIL", "PASSWORD")
+        with patch(f"{PATCH_BASE_PATH}.Helpers.call_api",
+                   side_effect=[({"code": 1, "msg": "error"}, 200), setting_response(3)]) as call_api:
+            assert manager.call_dreo_api(DREO_API_SETTING_GET, dict(SETTING))[0]["code"] == 1
+            assert manager.call_dreo_api(DREO_API_SETTING_GET, dict(SETTING))[0]["data"] == {"dataValue": 3}
+            assert call_api.call_count == 2
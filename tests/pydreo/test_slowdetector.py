@@ -0,0 +1,63 @@
+"""Tests for the slow parse and slow callback detector."""
+# pylint: disable=used-before-assignment
+import logging
+import time
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase
+from custom_components.dreo.pydreo.slowdetector import SlowOperationDetector
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestSlowOperationDetector(TestBase):
+    """Test SlowOperationDetector and its use in PyDreoBaseDevice."""
+
+    def test_slow_callback_logged_once(self, caplog):
+        """A slow callback warns once per device and is kept in the slowest table."""
+        fan = self.load_fan()
+        detector = self.pydreo_manager.slow_detector
+        detector.callback_threshold = 0.01
+        fan.add_attr_callback(lambda: time.sleep(0.02))
+        report = {"devicesn": fan.serial_number, "method": "report", REPORTED_KEY: {POWERON_KEY: True}}
+
+        with caplog.at_level(logging.WARNING):
+            fan.handle_server_update_base(report)
+            fan.handle_server_update_base(report)
+        warnings = [r for r in caplog.records if r.levelno == logging.WARNING and "Slow callback" in r.message]
+        assert len(warnings) == 1
+        assert "DR-HTF005S" in warnings[0].message
+
+        slowest = detector.as_dict()["slowest"]
+        assert detector.slow_count == 2
+        assert slowest[0]["kind"] == "callback"
+        assert slowest[0]["serial_number"] == "HTF005S_1"
+        assert slowest[0]["duration"] >= slowest[1]["duration"]
+
+    def test_slow_parse(self):
+        """A slow handle_server_update records the reported keys."""
+        fan = self.load_fan()
+        detector = self.pydreo_manager.slow_detector
+        detector.parse_threshold = 0.01
+        original = fan.handle_server_update
+
+        def slow_handle(message):
+            time.sleep(0.02)
+            original(message)
+
+        fan.handle_server_update = slow_handle
+        fan.handle_server_update_base({"devicesn": fan.serial_number, "method": "report",
+                                       REPORTED_KEY: {POWERON_KEY: True, WINDLEVEL_KEY: 2}})
+        entry = detector.slowest()[0]
+        assert entry["kind"] == "parse"
+        assert entry["keys"] == sorted([POWERON_KEY, WINDLEVEL_KEY])
+
+    def test_top_n_and_disabled(self):
+        """Only the slowest top_n are kept, and a threshold of 0 turns the check off."""
+        detector = SlowOperationDetector(callback_threshold=0.01, top_n=2)
+        device = type("Device", (), {"serial_number": "SN", "model": "M", "name": "N"})()
+        for duration in (0.05, 0.02, 0.08, 0.03):
+            detector.check_callback(device, print, duration)
+        assert [e["duration"] for e in detector.slowest()] == [0.08, 0.05]
+
+        detector.callback_threshold = 0
+        assert not detector.check_callback(device, print, 10)
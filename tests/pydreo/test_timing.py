@@ -0,0 +1,50 @@
+"""Tests for start up timing spans."""
+# pylint: disable=used-before-assignment
+import logging
+from  .imports import * # pylint: disable=W0401,W0614
+from .testbase import TestBase
+from custom_components.dreo.pydreo.timing import StartupTiming
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+class TestStartupTiming(TestBase):
+    """Test StartupTiming and its use in PyDreo."""
+
+    def test_load_devices_spans(self):
+        """Login, device list and per device state loading are timed."""
+        timing = self.pydreo_manager.startup_timing
+        timing.begin()
+        self.pydreo_manager.enabled = False
+        assert self.pydreo_manager.login()
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        timing.finish()
+
+        assert list(timing.phase_totals()) == ["login", "list", "states"]
+        states = timing.as_dict()["spans"][2]
+        assert states["count"] == 1
+        device = states["children"][0]
+        assert device["name"] == "device"
+        assert device["sn"] == "HTF005S_1"
+        # Settings are loaded after start up, so only the state is fetched per device.
+        assert [child["name"] for child in device["children"]] == ["state"]
+        assert timing.summary().startswith("setup ")
+        assert "states" in timing.summary()
+
+        # After finish(), later calls are not recorded.
+        self.pydreo_manager.load_devices()
+        assert len(timing.spans) == 3
+
+    def test_summary_p95(self):
+        """Phases with several children show their p95."""
+        timing = StartupTiming()
+        with timing.span("states"):
+            for _ in range(3):
+                with timing.span("device"):
+                    pass
+        with timing.span("platforms"):
+            pass
+        summary = timing.summary()
+        assert summary.startswith("setup 0.0s: states 0.0 (p95 ")
+        assert summary.endswith(", platforms 0.0")
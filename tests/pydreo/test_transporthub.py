@@ -0,0 +1,39 @@
+"""Tests for the shared WebSocket transport hub."""
+import asyncio
+import threading
+from custom_components.dreo.pydreo.transporthub import TransportHub
+
+class TestTransportHub:
+    """Test TransportHub class."""
+
+    def test_transports_share_one_loop_thread(self):
+        """Coroutines from several transports run on the same thread, which stops when they finish."""
+        hub = TransportHub()
+        release = threading.Event()
+        threads = []
+
+        async def transport_main():
+            threads.append(threading.current_thread())
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+
+        first, second = object(), object()
+        future_1 = hub.start(first, transport_main())
+        future_2 = hub.start(second, transport_main())
+        assert hub.is_running(first) and hub.is_running(second)
+        assert hub.active_transports == 2
+
+        release.set()
+        future_1.result(5)
+        future_2.result(5)
+        assert len(threads) == 2
+        assert threads[0] is threads[1]
+        assert threads[0] is not threading.current_thread()
+
+        threads[0].join(5)
+        assert not threads[0].is_alive()
+        assert hub.active_transports == 0
+
+    def test_shared_is_singleton(self):
+        """Every caller gets the same process-wide hub."""
+        assert TransportHub.shared() is TransportHub.shared()
@@ -0,0 +1,77 @@
+"""Tests (and a small benchmark) for WebSocket envelope parsing."""
+import json
+import logging
+import os
+import time
+from custom_components.dreo.pydreo.wsenvelope import parse_envelope, loads, WS_REPORT_METHODS, JSON_BACKEND
+from custom_components.dreo.pydreo.commandtransport import CommandTransport
+
+logger = logging.getLogger(__name__)
+
+RECORDED_FRAMES_PATH = os.path.join(os.path.dirname(__file__), "ws_frames", "recorded_frames_1.txt")
+KNOWN_DEVICES = {"HTF005S_1", "HSH009S_1", "HCF001S_1"}
+
+def load_recorded_frames() -> list[str]:
+    """Load the recorded frames, one JSON frame per line."""
+    with open(RECORDED_FRAMES_PATH, "r", encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip()]
+
+def accepts(device_sn: str, method: str) -> bool:
+    """Same rule PyDreo applies."""
+    return device_sn in KNOWN_DEVICES and (method is None or method in WS_REPORT_METHODS)
+
+class TestWsEnvelope:
+    """Test envelope parsing."""
+
+    def test_parse_envelope(self):
+        """Envelope fields are found regardless of position or whitespace."""
+        assert parse_envelope('{"devicesn":"SN1","method":"report","reported":{}}') == ("SN1", "report")
+        assert parse_envelope('{"reported": {"x": 1}, "method" : "control-report", "devicesn": "SN2"}') == \
+            ("SN2", "control-report")
+        assert parse_envelope(b'{"devicesn":"SN3"}') == ("SN3", None)
+        assert parse_envelope("3") == (None, None)
+
+    def test_nested_keys_fall_back(self):
+        """Keys inside nested payloads are never mistaken for the envelope."""
+        # Repeated: the nested copy comes first.
+        assert parse_envelope('{"reported":{"devicesn":"SN9","method":"control"},'
+                              '"devicesn":"SN1","method":"report"}') == (None, None)
+        # Only nested: the frame has no top level method.
+        assert parse_envelope('{"devicesn":"SN1","reported":{"method":"control"}}') == ("SN1", None)
+
+    def test_envelope_matches_full_decode(self):
+        """The fast path agrees with a full decode for every recorded frame."""
+        for frame in load_recorded_frames():
+            message = json.loads(frame)
+            assert parse_envelope(frame) == (message.get("devicesn"), message.get("method"))
+            assert loads(frame) == message
+
+    def test_transport_skips_uninteresting_frames(self):
+        """Frames rejected by the filter are never decoded or dispatched."""
+        consumed = []
+        transport = CommandTransport(consumed.append, accepts)
+        frames = load_recorded_frames()
+        for frame in frames:
+            transport._ws_consume_frame(frame) # pylint: disable=protected-access
+        transport.dispatcher.wait_idle(5)
+
+        expected = [f for f in frames if accepts(*parse_envelope(f))]
+        assert transport.skipped_frame_count == len(frames) - len(expected)
+        assert len(consumed) + transport.dispatcher.merged_count == len(expected)
+        transport.dispatcher.stop()
+
+    def test_benchmark_recorded_frames(self):
+        """Compare full decoding of every frame against envelope-first routing."""
+        frames = load_recorded_frames() * 50
+
+        start = time.perf_counter()
+        full = [m for m in (json.loads(f) for f in frames) if accepts(m.get("devicesn"), m.get("method"))]
+        full_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = [loads(f) for f in frames if accepts(*parse_envelope(f))]
+        fast_elapsed = time.perf_counter() - start
+
+        logger.info("%d frames: full decode %.2f ms, envelope-first (%s) %.2f ms",
+                    len(frames), full_elapsed * 1000, JSON_BACKEND, fast_elapsed * 1000)
+        assert fast == full
@@ -1,7 +1,9 @@
 """Base class for all tests. Contains a mock for call_dreo_api() function and instantiated Dreo object."""
 # pylint: disable=W0201
+import json
 import logging
 import os
+import time
 from typing import Optional
 from unittest.mock import patch
 import pytest
@@ -19,6 +21,31 @@ PATCH_CALL_DREO_API = f'{PATCH_BASE_PATH}.PyDreo.call_dreo_api'
 
 Defaults = defaults.Defaults
 
+def wait_for(condition, timeout: float = 10) -> bool:
+    """Poll until condition() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not condition():
+        time.sleep(0.01)
+    return condition()
+
+def control(device_sn: str, params: dict) -> dict:
+    """Build a control message like PyDreo.send_command does."""
+    return {"devicesn": device_sn, "method": "control", "params": params, "timestamp": "0"}
+
+class FakeWebSocket:
+    """Records frames sent on it."""
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, frame):
+        """Record a sent frame."""
+        self.sent.append(frame)
+
+    @property
+    def messages(self) -> list[dict]:
+        """The sent frames, decoded."""
+        return [json.loads(frame) for frame in self.sent]
+
 class TestBase:
     """Base class for all tests.
 
@@ -64,6 +91,12 @@ class TestBase:
         yield
         self.mock_api_call.stop()
 
+    def load_fan(self) -> PyDreoTowerFan:
+        """Load the HTF005S tower fan."""
+        self.get_devices_file_name = "get_devices_HTF005S.json"
+        self.pydreo_manager.load_devices()
+        return self.pydreo_manager.devices[0]
+
 
     def call_dreo_api(self,
         api: str,